@@ -0,0 +1,32 @@
+import sys
+
+import pytest
+
+# Stands in for soffice: logs one line (its profile) per run and writes
+# <name>.pdf to --outdir for each source, taking 0.2 s per document
+FAKE_OFFICE = '''#!{python}
+import os, sys, time
+args = sys.argv[1:]
+profile = next(a for a in args if a.startswith("-env:UserInstallation="))
+out_dir = args[args.index("--outdir") + 1]
+sources = args[args.index("--outdir") + 2:]
+with open(os.environ["FAKE_OFFICE_LOG"], "a") as log:
+    log.write(profile + "\\n")
+for source in sources:
+    if "crash" in source:
+        sys.exit(81)
+    time.sleep(0.2)
+    name = os.path.splitext(os.path.basename(source))[0] + ".pdf"
+    with open(os.path.join(out_dir, name), "wb") as f:
+        f.write(b"%PDF-1.4 " + open(source, "rb").read())
+'''
+
+
+@pytest.fixture
+def fake_office(tmp_path, monkeypatch):
+    binary = tmp_path / "soffice"
+    binary.write_text(FAKE_OFFICE.format(python=sys.executable))
+    binary.chmod(0o755)
+    log = tmp_path / "office.log"
+    monkeypatch.setenv("FAKE_OFFICE_LOG", str(log))
+    return str(binary), log
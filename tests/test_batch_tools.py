@@ -0,0 +1,90 @@
+import asyncio
+from io import BytesIO
+
+from docx import Document
+
+from word_document_server.tools.batch_tools import apply_operations
+from word_document_server.tools.document_tools import temp_files
+
+
+def _new_document_id() -> str:
+    doc = Document()
+    doc.add_paragraph("Introduction")
+    buffer = BytesIO()
+    doc.save(buffer)
+    return temp_files.add("batch.docx", data=buffer.getvalue())
+
+
+def _texts(file_id: str):
+    return [p.text for p in Document(BytesIO(temp_files.get_bytes(file_id))).paragraphs]
+
+
+def test_apply_operations_runs_all_in_order():
+    """Every operation is applied to one document and reported individually."""
+    file_id = _new_document_id()
+    try:
+        result = asyncio.run(apply_operations(file_id, [
+            {"op": "add_heading", "text": "Summary", "level": 2},
+            {"op": "add_paragraph", "text": "Total: {{total}}"},
+            {"op": "search_and_replace", "find_text": "{{total}}", "replace_text": "42"},
+            {"op": "insert_numbered_list_near_text", "target_text": "Introduction",
+             "list_items": ["One", "Two"], "bullet_type": "number"},
+            {"op": "add_table", "rows": 1, "cols": 2, "data": [["a", "b"]]},
+            {"op": "set_table_cell_shading", "table_index": 0, "row_index": 0,
+             "col_index": 1, "fill_color": "FF0000"},
+        ]))
+
+        assert result["success"], result
+        assert [r["success"] for r in result["results"]] == [True] * 6
+        assert _texts(file_id) == ["Introduction", "One", "Two", "Summary", "Total: 42"]
+    finally:
+        temp_files.discard(file_id)
+
+
+def test_apply_operations_rolls_back_on_failure():
+    """A failing operation leaves the document exactly as it was before the call."""
+    file_id = _new_document_id()
+    try:
+        before = _texts(file_id)
+        result = asyncio.run(apply_operations(file_id, [
+            {"op": "add_paragraph", "text": "Should not survive"},
+            {"op": "delete_paragraph", "paragraph_index": 99},
+            {"op": "add_paragraph", "text": "Never reached"},
+        ]))
+
+        assert not result["success"]
+        assert [r["success"] for r in result["results"]] == [True, False]
+        assert "Invalid paragraph index" in result["results"][1]["message"]
+        assert _texts(file_id) == before
+    finally:
+        temp_files.discard(file_id)
+
+
+def test_apply_operations_rejects_unknown_operation():
+    file_id = _new_document_id()
+    try:
+        result = asyncio.run(apply_operations(file_id, [{"op": "explode"}]))
+        assert not result["success"]
+        assert "Unknown operation 'explode'" in result["results"][0]["message"]
+    finally:
+        temp_files.discard(file_id)
+
+
+def test_apply_operations_reports_and_checks_version():
+    file_id = _new_document_id()
+    try:
+        ok = asyncio.run(apply_operations(file_id, [{"op": "add_paragraph", "text": "A"}], expected_version=1))
+        assert ok["success"] and ok["version"] == 2
+
+        failed = asyncio.run(apply_operations(file_id, [
+            {"op": "add_paragraph", "text": "B"},
+            {"op": "delete_paragraph", "paragraph_index": 99},
+        ]))
+        assert not failed["success"]
+        assert temp_files.version(file_id) == 2  # rolled back, version unchanged
+
+        stale = asyncio.run(apply_operations(file_id, [{"op": "add_page_break"}], expected_version=1))
+        assert not stale["success"] and "Version conflict" in stale["error"]
+        assert _texts(file_id) == ["Introduction", "A"]
+    finally:
+        temp_files.discard(file_id)
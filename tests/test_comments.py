@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+import time
+
+from docx import Document
+
+from word_document_server.core.comments import CommentIndex, extract_all_comments
+from word_document_server.tools import comment_tools
+
+
+def _save(tmp_path):
+    doc = Document()
+    doc.add_paragraph("Introduction without comments")
+    first = doc.add_paragraph("Revenue grew by ten percent")
+    doc.add_comment(first.runs, text="Source?", author="Alice", initials="A")
+    start = doc.add_paragraph("Start of a long passage")
+    end = doc.add_paragraph("that ends here")
+    doc.add_comment([start.runs[0], end.runs[0]], text="Tighten this", author="Bob")
+    table = doc.add_table(rows=1, cols=1)
+    cell_para = table.cell(0, 0).paragraphs[0]
+    cell_para.add_run("In a cell")
+    doc.add_comment(cell_para.runs, text="Check the table", author="alice")
+    path = str(tmp_path / "review.docx")
+    doc.save(path)
+    old = time.time() - 10
+    os.utime(path, (old, old))
+    return path
+
+
+def test_comments_are_mapped_to_paragraphs(tmp_path):
+    path = _save(tmp_path)
+    index = CommentIndex.from_docx(path)
+
+    assert [(c["author"], c["text"], c["paragraph_index"], c["in_table"]) for c in index.comments] == [
+        ("Alice", "Source?", 1, False),
+        ("Bob", "Tighten this", 2, False),
+        ("alice", "Check the table", None, True),
+    ]
+    assert index.comments[0]["reference_text"] == "Revenue grew by ten percent"
+    # A range over two paragraphs is found from either of them
+    assert [c["text"] for c in index.for_paragraph(3)] == ["Tighten this"]
+    assert index.for_paragraph(0) == []
+    assert [c["text"] for c in index.by_author("ALICE")] == ["Source?", "Check the table"]
+
+    # Building from a loaded Document gives the same result
+    assert extract_all_comments(Document(path)) == index.comments
+
+
+def test_comment_tools_use_index(tmp_path):
+    path = _save(tmp_path)
+
+    all_comments = json.loads(asyncio.run(comment_tools.get_all_comments(path)))
+    assert all_comments["total_comments"] == 3
+
+    by_author = json.loads(asyncio.run(comment_tools.get_comments_by_author(path, "Bob")))
+    assert [c["text"] for c in by_author["comments"]] == ["Tighten this"]
+
+    for_paragraph = json.loads(asyncio.run(comment_tools.get_comments_for_paragraph(path, 1)))
+    assert for_paragraph["paragraph_text"] == "Revenue grew by ten percent"
+    assert [c["text"] for c in for_paragraph["comments"]] == ["Source?"]
+
+    out_of_range = json.loads(asyncio.run(comment_tools.get_comments_for_paragraph(path, 10)))
+    assert "Document has 4 paragraphs" in out_of_range["error"]
+
+
+def test_document_without_comments(tmp_path):
+    doc = Document()
+    doc.add_paragraph("Plain")
+    path = str(tmp_path / "plain.docx")
+    doc.save(path)
+
+    index = CommentIndex.from_docx(path)
+    assert index.comments == [] and index.paragraph_texts == ["Plain"]
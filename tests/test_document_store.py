@@ -0,0 +1,201 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+from docx import Document
+
+from word_document_server.tools import content_tools
+from word_document_server.tools.document_tools import temp_files
+from word_document_server.utils.document_store import DocumentStore
+
+
+def _docx_bytes(*paragraphs: str) -> bytes:
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def test_open_reuses_live_document():
+    """The same parsed Document is returned until the entry is discarded."""
+    store = DocumentStore()
+    file_id = store.add("sample.docx", data=_docx_bytes("Hello"))
+
+    doc = store.open(file_id)
+    assert store.open(file_id) is doc
+
+    store.discard(file_id)
+    assert file_id not in store
+    with pytest.raises(KeyError):
+        store.open(file_id)
+
+
+def test_get_bytes_serializes_only_when_dirty():
+    """Bytes are regenerated after an edit and cached until the next one."""
+    data = _docx_bytes("First")
+    store = DocumentStore()
+    file_id = store.add("sample.docx", data=data)
+
+    store.open(file_id)
+    assert store.get_bytes(file_id) is data
+
+    store.open(file_id).add_paragraph("Second")
+    store.mark_dirty(file_id)
+    saved = store.get_bytes(file_id)
+    assert saved is not data
+    assert store.get_bytes(file_id) is saved
+
+    texts = [p.text for p in Document(BytesIO(saved)).paragraphs]
+    assert texts == ["First", "Second"]
+
+
+def test_content_tools_edit_without_reparsing():
+    """Consecutive tool calls share one parsed document."""
+    file_id = temp_files.add("session.docx", data=_docx_bytes())
+    try:
+        asyncio.run(content_tools.add_heading(file_id, "Title", level=1))
+        doc = temp_files.open(file_id)
+        asyncio.run(content_tools.add_paragraph(file_id, "Body text"))
+        assert temp_files.open(file_id) is doc
+
+        texts = [p.text for p in Document(BytesIO(temp_files.get_bytes(file_id))).paragraphs]
+        assert texts == ["Title", "Body text"]
+    finally:
+        temp_files.discard(file_id)
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_respects_byte_budget():
+    """The least recently used entry is evicted once the budget is exceeded."""
+    data = _docx_bytes("Budget")
+    store = DocumentStore(max_bytes=len(data) * 2, ttl=0)
+    first = store.add("first.docx", data=data)
+    second = store.add("second.docx", data=data)
+
+    store.open(first)  # first is now the most recently used
+    third = store.add("third.docx", data=data)
+
+    assert first in store and third in store
+    assert second not in store
+    stats = store.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == len(data) * 2
+    assert stats["evictions"] == 1
+
+
+def test_ttl_expires_idle_entries():
+    """Entries untouched for longer than the TTL are dropped."""
+    clock = _FakeClock()
+    store = DocumentStore(max_bytes=0, ttl=60, clock=clock)
+    idle = store.add("idle.docx", data=_docx_bytes())
+    active = store.add("active.docx", data=_docx_bytes())
+
+    clock.now += 45
+    store.open(active)
+    clock.now += 30
+
+    assert idle not in store
+    assert active in store
+    assert store.stats()["expirations"] == 1
+
+
+def test_dirty_entries_are_not_evicted_without_spill_dir(caplog):
+    """Without a spill directory, unsaved edits are kept over the budget; the TTL still drops them."""
+    clock = _FakeClock()
+    data = _docx_bytes("Budget")
+    store = DocumentStore(max_bytes=len(data), ttl=60, clock=clock)
+    edited = store.add("edited.docx", data=data)
+    store.open(edited).add_paragraph("Unsaved edit")
+    store.mark_dirty(edited)
+
+    clean = store.add("clean.docx", data=data)
+    assert edited in store and clean in store
+    third = store.add("third.docx", data=data)
+    # The clean entry made room; the edited one stays even though the budget is exceeded
+    assert edited in store and clean not in store and third in store
+    assert store.stats()["evictions"] == 1
+
+    clock.now += 61
+    with caplog.at_level("WARNING", logger="word_document_server.utils.document_store"):
+        assert edited not in store
+    assert store.stats()["dropped_unsaved"] == 1
+    assert "unsaved edits" in caplog.text
+    with pytest.raises(KeyError, match="MCP_STORE_TTL"):
+        store.open(edited)
+
+
+def test_evicted_entries_spill_to_disk_and_restore(tmp_path):
+    """Evicted documents, including unsaved edits, come back from the spill directory."""
+    data = _docx_bytes("Spilled")
+    store = DocumentStore(max_bytes=len(data), ttl=0, spill_dir=str(tmp_path))
+    first = store.add("first.docx", data=data)
+    store.open(first).add_paragraph("Unsaved edit")
+    store.mark_dirty(first)
+
+    second = store.add("second.docx", data=data)
+    stats = store.stats()
+    assert stats["spills"] == 1 and stats["spilled_entries"] == 1
+    assert first in store
+    assert store.filename(first) == "first.docx"
+
+    texts = [p.text for p in store.open(first).paragraphs]
+    assert texts == ["Spilled", "Unsaved edit"]
+    assert store.stats()["restores"] == 1
+    assert store.version(first) == 2
+    assert list(tmp_path.iterdir()) == [tmp_path / f"{second}.docx"]
+
+
+def test_replace_block_between_manual_anchors_accepts_file_id():
+    file_id = temp_files.add("anchors.docx", data=_docx_bytes("Intro", "START", "old", "END"))
+    try:
+        result = asyncio.run(content_tools.replace_block_between_manual_anchors_tool(
+            file_id, "START", ["new"], end_anchor_text="END"
+        ))
+        assert "Replaced content" in result
+        saved = Document(BytesIO(temp_files.get_bytes(file_id)))
+        assert [p.text for p in saved.paragraphs] == ["Intro", "START", "new", "END"]
+    finally:
+        temp_files.discard(file_id)
+
+
+def test_versions_change_with_edits_and_survive_rollback():
+    store = DocumentStore()
+    file_id = store.add("versions.docx", data=_docx_bytes("One"))
+    assert store.version(file_id) == 1
+    snapshot = store.get_bytes(file_id)
+
+    assert store.mark_dirty(file_id) == 2
+    store.revert(file_id, snapshot, version=1)
+    assert store.version(file_id) == 1
+    store.revert(file_id, snapshot)
+    assert store.version(file_id) == 2
+
+
+def test_expected_version_rejects_concurrent_stale_edits():
+    """Two agents editing from the same version: one edit lands, the other gets a conflict."""
+    file_id = temp_files.add("shared.docx", data=_docx_bytes("Intro"))
+
+    async def edit_both():
+        return await asyncio.gather(
+            content_tools.add_paragraph(file_id, "From A", expected_version=1),
+            content_tools.add_paragraph(file_id, "From B", expected_version=1),
+        )
+
+    try:
+        results = asyncio.run(edit_both())
+        assert sum("Version conflict" in result for result in results) == 1
+        assert temp_files.version(file_id) == 2
+        assert len(temp_files.open(file_id).paragraphs) == 2
+
+        assert "added" in asyncio.run(content_tools.add_paragraph(file_id, "Retry", expected_version=2))
+    finally:
+        temp_files.discard(file_id)
@@ -0,0 +1,89 @@
+import zipfile
+
+from docx import Document
+
+from word_document_server.utils.document_utils import extract_document_text, get_document_properties
+from word_document_server.utils.docx_stream import count_tables, iter_document_text, scan_document
+
+
+def _sample(path):
+    doc = Document()
+    doc.core_properties.title = "Policy"
+    doc.add_heading("Scope", level=1)
+    para = doc.add_paragraph("Applies to ")
+    para.add_run("all staff").bold = True
+    para.paragraph_format.tab_stops.add_tab_stop(914400)
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "cell one"
+    table.cell(0, 1).text = "cell two"
+    tabbed = doc.add_paragraph("a")
+    tabbed.add_run().add_tab()
+    tabbed.add_run("b")
+    doc.add_paragraph("Closing words")
+    doc.save(str(path))
+    return doc
+
+
+def test_stream_matches_python_docx_text_in_document_order(tmp_path):
+    path = tmp_path / "policy.docx"
+    _sample(path)
+
+    assert list(iter_document_text(str(path))) == [
+        "Scope", "Applies to all staff", "cell one", "cell two", "a\tb", "Closing words"
+    ]
+    assert extract_document_text(str(path)).splitlines()[2] == "cell one"
+
+
+def test_scan_counts_match_document(tmp_path):
+    path = tmp_path / "policy.docx"
+    doc = _sample(path)
+
+    counts = scan_document(str(path))
+    assert counts["paragraph_count"] == len(doc.paragraphs)
+    assert counts["table_count"] == len(doc.tables)
+    assert counts["section_count"] == len(doc.sections)
+    assert counts["word_count"] == 13
+
+    properties = get_document_properties(str(path), exact=True)
+    assert properties["title"] == "Policy"
+    assert properties["word_count"] == 13
+    assert properties["counts_source"] == "document.xml"
+
+
+def test_document_properties_default_to_app_xml_statistics(tmp_path):
+    path = tmp_path / "policy.docx"
+    _sample(path)
+    # Rewrite app.xml as Word would after counting
+    with zipfile.ZipFile(str(path)) as zin:
+        members = [(info, zin.read(info.filename)) for info in zin.infolist()]
+    app_xml = (
+        b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        b'<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+        b'<Pages>3</Pages><Words>1200</Words><Characters>6000</Characters>'
+        b'<Paragraphs>40</Paragraphs></Properties>'
+    )
+    with zipfile.ZipFile(str(path), 'w') as zout:
+        for info, data in members:
+            zout.writestr(info, app_xml if info.filename == 'docProps/app.xml' else data)
+
+    properties = get_document_properties(str(path))
+    assert properties["counts_source"] == "app.xml"
+    assert (properties["page_count"], properties["word_count"], properties["paragraph_count"]) == (3, 1200, 40)
+    assert properties["table_count"] == len(Document(str(path)).tables)
+    assert properties["title"] == "Policy"
+
+
+def test_document_properties_count_when_app_xml_has_template_zeros(tmp_path):
+    path = tmp_path / "created.docx"
+    doc = Document()
+    for i in range(5):
+        doc.add_paragraph(f"one two three {i}")
+    outer = doc.add_table(rows=1, cols=1)
+    outer.cell(0, 0).add_table(rows=1, cols=1)
+    doc.add_table(rows=1, cols=1)
+    doc.save(str(path))
+
+    properties = get_document_properties(str(path))
+    assert properties["counts_source"] == "document.xml"
+    assert (properties["word_count"], properties["paragraph_count"], properties["table_count"]) == (20, 5, 2)
+    assert count_tables(str(path)) == 2
@@ -0,0 +1,108 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from docx import Document
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from word_document_server.utils.document_store import DocumentStore
+from word_document_server.utils.download import download_response, parse_range
+
+
+def _docx_bytes(*paragraphs: str) -> bytes:
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _client(store: DocumentStore) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/mcp/download/{file_id}")
+    def download(file_id: str, request: Request):
+        return download_response(store.download_source(file_id), request.headers)
+
+    return TestClient(app)
+
+
+def test_download_streams_document_with_content_etag():
+    """The whole document is served with a SHA-256 ETag and answers If-None-Match with 304."""
+    data = _docx_bytes("Hello")
+    store = DocumentStore()
+    file_id = store.add("report.docx", data=data)
+    client = _client(store)
+
+    response = client.get(f"/mcp/download/{file_id}")
+    assert response.status_code == 200
+    assert response.content == data
+    etag = response.headers["etag"]
+    assert etag == f'"{hashlib.sha256(data).hexdigest()}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert 'filename="report.docx"' in response.headers["content-disposition"]
+
+    response = client.get(f"/mcp/download/{file_id}", headers={"If-None-Match": f'W/{etag}'})
+    assert response.status_code == 304 and response.content == b""
+
+    # An edit changes the bytes and therefore the ETag
+    store.open(file_id).add_paragraph("World")
+    store.mark_dirty(file_id)
+    response = client.get(f"/mcp/download/{file_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    # The etag reported by get_document_version revalidates the download
+    assert store.etag(file_id) == response.headers["etag"]
+    response = client.get(f"/mcp/download/{file_id}", headers={"If-None-Match": store.etag(file_id)})
+    assert response.status_code == 304
+
+
+def test_download_serves_ranges_from_spill_file(tmp_path):
+    """Range requests are answered from a spilled document without restoring it."""
+    data = _docx_bytes("Hello")
+    store = DocumentStore(max_bytes=len(data), ttl=0, spill_dir=str(tmp_path))
+    file_id = store.add("a.docx", data=data)
+    store.add("b.docx", data=_docx_bytes("Other"))
+    assert store.stats()["spilled_entries"] == 1
+    client = _client(store)
+
+    response = client.get(f"/mcp/download/{file_id}", headers={"Range": "bytes=10-99"})
+    assert response.status_code == 206
+    assert response.content == data[10:100]
+    assert response.headers["content-range"] == f"bytes 10-99/{len(data)}"
+
+    response = client.get(f"/mcp/download/{file_id}", headers={"Range": "bytes=-20"})
+    assert response.content == data[-20:]
+
+    response = client.get(f"/mcp/download/{file_id}", headers={"Range": f"bytes={len(data)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(data)}"
+
+    # A stale If-Range gets the whole document
+    response = client.get(f"/mcp/download/{file_id}", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200 and response.content == data
+    assert store.stats()["spilled_entries"] == 1
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-0", (0, 0)),
+    ("bytes=5-", (5, 99)),
+    ("bytes=90-200", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=abc", None),
+    ("bytes=9-3", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
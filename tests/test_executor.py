@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+
+from docx import Document
+
+from word_document_server.tools.content_tools import add_paragraph
+from word_document_server.tools.document_tools import create_document, temp_files
+from word_document_server.utils import executor
+from word_document_server.utils.executor import WorkerPool, document_key
+
+
+def test_same_document_is_serialized_and_others_run_in_parallel():
+    pool = WorkerPool("thread", workers=4)
+    active = {"a": 0, "b": 0}
+    overlap = []
+    guard = threading.Lock()
+
+    def work(name):
+        with guard:
+            active[name] += 1
+            overlap.append(dict(active))
+        time.sleep(0.05)
+        with guard:
+            active[name] -= 1
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.run(work, name, key=name) for name in "aabb"))
+        return time.perf_counter() - start
+
+    try:
+        elapsed = asyncio.run(main())
+    finally:
+        pool.shutdown()
+
+    assert all(seen["a"] <= 1 and seen["b"] <= 1 for seen in overlap)
+    assert any(seen["a"] and seen["b"] for seen in overlap)
+    assert elapsed < 0.18  # two keys in parallel, not four calls in a row
+    assert len(pool.document_locks) == 0
+
+
+def test_event_loop_keeps_running_during_a_blocking_call():
+    pool = WorkerPool("thread", workers=2)
+
+    async def main():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(heartbeat())
+        await pool.run(time.sleep, 0.2, key="doc")
+        task.cancel()
+        return ticks
+
+    try:
+        assert asyncio.run(main()) >= 5
+    finally:
+        pool.shutdown()
+
+
+def test_concurrent_edits_to_one_file_id_are_all_kept():
+    doc = Document()
+    file_id = temp_files.add("concurrent.docx", document=doc)
+
+    async def main():
+        await asyncio.gather(*(add_paragraph(file_id, f"Paragraph {i}") for i in range(20)))
+
+    try:
+        asyncio.run(main())
+        texts = [p.text for p in temp_files.open(file_id).paragraphs]
+        assert sorted(texts) == sorted(f"Paragraph {i}" for i in range(20))
+    finally:
+        temp_files.discard(file_id)
+
+
+def test_process_mode_runs_file_tools_in_worker_processes(tmp_path, monkeypatch):
+    pool = WorkerPool("process", workers=1)
+    monkeypatch.setattr(executor, "get_worker_pool", lambda: pool)
+    path = tmp_path / "made_in_worker.docx"
+    try:
+        result = asyncio.run(create_document(str(path), title="Offloaded"))
+    finally:
+        pool.shutdown()
+
+    assert "created successfully" in result
+    assert Document(str(path)).core_properties.title == "Offloaded"
+
+
+def test_document_key_normalizes_paths():
+    assert document_key("report") == document_key("./report.docx")
+
+
+def test_download_waits_for_edit_holding_lock_on_another_loop():
+    """The download server runs its own loop in another thread; it shares the document locks."""
+    from io import BytesIO
+    from word_document_server.utils.document_store import DocumentStore
+
+    pool = WorkerPool("thread", workers=2)
+    store = DocumentStore()
+    buffer = BytesIO()
+    Document().save(buffer)
+    file_id = store.add("shared.docx", data=buffer.getvalue())
+    key = document_key(file_id)
+    events = []
+    edit_started = threading.Event()
+
+    def edit():
+        edit_started.set()
+        time.sleep(0.1)
+        store.open(file_id).add_paragraph("Edited")
+        store.mark_dirty(file_id)
+        events.append("edit done")
+
+    # The MCP loop, in its own thread, holds the lock during the edit
+    mcp = threading.Thread(target=lambda: asyncio.run(pool.run(edit, key=key)))
+    mcp.start()
+    edit_started.wait(1)
+
+    def download():
+        events.append("download")
+        return store.download_source(file_id)
+
+    try:
+        source = asyncio.run(pool.run(download, key=key))
+    finally:
+        mcp.join()
+        pool.shutdown()
+
+    assert events == ["edit done", "download"]
+    assert [p.text for p in Document(BytesIO(source.data)).paragraphs] == ["Edited"]
+    assert len(pool.document_locks) == 0
+
+
+def test_cancelled_waiter_does_not_keep_the_lock():
+    lock = executor.KeyedLock()
+
+    async def main():
+        async with lock.hold("doc"):
+            waiter = asyncio.ensure_future(lock.hold("doc").__aenter__())
+            await asyncio.sleep(0)
+            waiter.cancel()
+        await asyncio.sleep(0)
+        async with lock.hold("doc"):
+            pass
+
+    asyncio.run(main())
+    assert len(lock) == 0
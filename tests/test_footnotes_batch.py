@@ -0,0 +1,57 @@
+import asyncio
+import zipfile
+
+from docx import Document
+from lxml import etree
+
+from word_document_server.core.footnotes import W_NS, add_footnotes_batch
+from word_document_server.tools.footnote_tools import add_footnotes_batch_tool
+
+
+def _write_doc(path, texts):
+    doc = Document()
+    for text in texts:
+        doc.add_paragraph(text)
+    doc.save(str(path))
+
+
+def _footnote_ids(path):
+    with zipfile.ZipFile(str(path)) as zf:
+        document = etree.fromstring(zf.read('word/document.xml'))
+        footnotes = etree.fromstring(zf.read('word/footnotes.xml'))
+    nsmap = {'w': W_NS}
+    refs = [r.get(f'{{{W_NS}}}id') for r in document.xpath('//w:footnoteReference', namespaces=nsmap)]
+    contents = [f.get(f'{{{W_NS}}}id') for f in footnotes.xpath('//w:footnote', namespaces=nsmap)]
+    return refs, contents
+
+
+def test_add_footnotes_batch_adds_all_with_distinct_ids(tmp_path):
+    path = tmp_path / "legal.docx"
+    _write_doc(path, [f"Clause {i}" for i in range(50)])
+
+    entries = [{"search_text": f"Clause {i}", "footnote_text": f"Note {i}"} for i in range(0, 50, 2)]
+    entries.append({"paragraph_index": 1, "footnote_text": "By index", "position": "before"})
+    success, message, details = add_footnotes_batch(str(path), entries)
+
+    assert success, message
+    ids = [item["footnote_id"] for item in details["footnotes"]]
+    assert len(set(ids)) == len(entries)
+    refs, contents = _footnote_ids(path)
+    assert sorted(refs) == sorted(str(i) for i in ids)
+    assert set(refs) <= set(contents)
+    Document(str(path))
+
+
+def test_add_footnotes_batch_writes_nothing_if_a_target_is_missing(tmp_path):
+    path = tmp_path / "legal.docx"
+    _write_doc(path, ["Alpha", "Beta"])
+    before = path.read_bytes()
+
+    result = asyncio.run(add_footnotes_batch_tool(str(path), [
+        {"search_text": "Alpha", "footnote_text": "ok"},
+        {"search_text": "Gamma", "footnote_text": "missing"},
+    ]))
+
+    assert not result["success"]
+    assert "Gamma" in result["message"]
+    assert path.read_bytes() == before
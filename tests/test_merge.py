@@ -0,0 +1,181 @@
+import asyncio
+import struct
+import zlib
+from io import BytesIO
+
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+
+from word_document_server.core.merge import merge_docx_files
+from word_document_server.tools import document_tools
+
+
+def _png() -> bytes:
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(b"\x00\xff\x00\x00")) + chunk(b"IEND", b""))
+
+
+def _add_hyperlink(paragraph, url, text):
+    rid = paragraph.part.relate_to(url, RT.HYPERLINK, is_external=True)
+    link = paragraph._p.makeelement(qn("w:hyperlink"), {qn("r:id"): rid})
+    run = link.makeelement(qn("w:r"), {})
+    t = run.makeelement(qn("w:t"), {})
+    t.text = text
+    run.append(t)
+    link.append(run)
+    paragraph._p.append(link)
+
+
+def _first(tmp_path):
+    doc = Document()
+    doc.add_paragraph("First document")
+    doc.add_paragraph("Bullet one", style="List Bullet")
+    path = str(tmp_path / "first.docx")
+    doc.save(path)
+    return path
+
+
+def _second(tmp_path):
+    doc = Document()
+    custom = doc.styles.add_style("Callout", 1)
+    custom.base_style = doc.styles["Quote"]
+    doc.add_paragraph("Before table", style="Callout")
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "cell"
+    doc.add_paragraph("Step one", style="List Number")
+    doc.add_paragraph().add_run().add_picture(BytesIO(_png()))
+    _add_hyperlink(doc.add_paragraph("See "), "https://example.com/", "example")
+    doc.add_paragraph("After table")
+    path = str(tmp_path / "second.docx")
+    doc.save(path)
+    return path
+
+
+def test_merge_keeps_order_styles_lists_images_and_links(tmp_path):
+    target = str(tmp_path / "merged.docx")
+    merge_docx_files(target, [_first(tmp_path), _second(tmp_path)], add_page_breaks=True)
+    merged = Document(target)
+    body = merged.element.body
+
+    tags = [child.tag.split("}")[1] for child in body.iterchildren()]
+    texts = [p.text for p in merged.paragraphs]
+    assert texts[:3] == ["First document", "Bullet one", ""]
+    assert texts[3:5] == ["Before table", "Step one"]
+    assert texts[-1] == "After table"
+    # The table stays between the paragraphs around it, and sectPr stays last
+    assert tags[tags.index("tbl") - 1] == "p" and merged.tables[0].cell(0, 0).text == "cell"
+    assert body.index(merged.tables[0]._tbl) == 4
+    assert tags[-1] == "sectPr"
+    assert body[2].xpath(".//w:br/@w:type") == ["page"]
+
+    # The custom style and the style it is based on came along
+    assert merged.paragraphs[3].style.name == "Callout"
+    assert merged.styles["Callout"].base_style.name == "Quote"
+
+    # Both lists point at numbering definitions present in the target
+    numbering = merged.part.numbering_part.element
+    num_ids = {n.get(qn("w:numId")) for n in numbering.iterchildren(qn("w:num"))}
+    step = merged.paragraphs[4]._p.xpath("./w:pPr/w:numPr/w:numId/@w:val")
+    assert not step or step[0] in num_ids
+
+    # The image and the hyperlink are related from the target
+    blip = body.xpath(".//a:blip/@r:embed")
+    assert len(blip) == 1
+    assert merged.part.related_parts[blip[0]].blob == _png()
+    link = body.xpath(".//w:hyperlink/@r:id")
+    assert merged.part.rels[link[0]].target_ref == "https://example.com/"
+
+
+def test_numbering_is_remapped(tmp_path):
+    first = Document()
+    first.add_paragraph("Base")
+    first_path = str(tmp_path / "a.docx")
+    first.save(first_path)
+
+    second = Document()
+    numbering = second.part.numbering_part.element
+    abstract = numbering.makeelement(qn("w:abstractNum"), {qn("w:abstractNumId"): "7"})
+    numbering.append(abstract)
+    num = numbering.add_num(7)
+    para = second.add_paragraph("Listed")
+    para._p.get_or_add_pPr().get_or_add_numPr().get_or_add_numId().val = num.numId
+    second_path = str(tmp_path / "b.docx")
+    second.save(second_path)
+
+    target = str(tmp_path / "merged.docx")
+    merge_docx_files(target, [first_path, second_path], add_page_breaks=False)
+    merged = Document(target)
+    numbering = merged.part.numbering_part.element
+    new_id = merged.paragraphs[-1]._p.xpath("./w:pPr/w:numPr/w:numId/@w:val")[0]
+    new_num = numbering.xpath('w:num[@w:numId="%s"]' % new_id)[0]
+    abstract_id = new_num.xpath("w:abstractNumId/@w:val")[0]
+    assert numbering.xpath('w:abstractNum[@w:abstractNumId="%s"]' % abstract_id)
+    # abstractNum definitions stay ahead of num elements
+    tags = [child.tag for child in numbering.iterchildren()]
+    assert tags.index(qn("w:num")) > max(i for i, t in enumerate(tags) if t == qn("w:abstractNum"))
+
+
+def _without_numbering(doc):
+    for rid, rel in list(doc.part.rels.items()):
+        if rel.reltype == RT.NUMBERING:
+            doc.part.drop_rel(rid)
+    return doc
+
+
+def _listed(doc, num_id):
+    para = doc.add_paragraph("Listed")
+    para._p.get_or_add_pPr().get_or_add_numPr().get_or_add_numId().val = num_id
+    return doc
+
+
+def test_base_without_numbering_part(tmp_path):
+    base = _without_numbering(Document())
+    base.add_paragraph("Base")
+    base_path = str(tmp_path / "base.docx")
+    base.save(base_path)
+    source_path = str(tmp_path / "listed.docx")
+    _listed(Document(), 1).save(source_path)
+
+    target = str(tmp_path / "merged.docx")
+    merge_docx_files(target, [base_path, source_path], add_page_breaks=False)
+    merged = Document(target)
+    numbering = merged.part.numbering_part.element
+    new_id = merged.paragraphs[-1]._p.xpath("./w:pPr/w:numPr/w:numId/@w:val")[0]
+    assert numbering.xpath('w:num[@w:numId="%s"]' % new_id)
+
+
+def test_source_without_numbering_part_keeps_num_id(tmp_path):
+    base = _without_numbering(Document())
+    base.add_paragraph("Base")
+    base_path = str(tmp_path / "base.docx")
+    base.save(base_path)
+    source_path = str(tmp_path / "dangling.docx")
+    _listed(_without_numbering(Document()), 5).save(source_path)
+
+    target = str(tmp_path / "merged.docx")
+    merge_docx_files(target, [base_path, source_path], add_page_breaks=False)
+    merged = Document(target)
+    assert merged.paragraphs[-1]._p.xpath("./w:pPr/w:numPr/w:numId/@w:val") == ["5"]
+    assert not any(rel.reltype == RT.NUMBERING for rel in merged.part.rels.values())
+
+
+def test_merge_documents_tool(tmp_path):
+    paths = []
+    for i in range(4):
+        doc = Document()
+        doc.add_paragraph(f"Document {i}")
+        path = str(tmp_path / f"part{i}.docx")
+        doc.save(path)
+        paths.append(path)
+    target = str(tmp_path / "all.docx")
+
+    result = asyncio.run(document_tools.merge_documents(target, paths, add_page_breaks=False))
+    assert result == f"Successfully merged 4 documents into {target}"
+    assert [p.text for p in Document(target).paragraphs] == [f"Document {i}" for i in range(4)]
+
+    missing = asyncio.run(document_tools.merge_documents(target, [str(tmp_path / "nope.docx")]))
+    assert "do not exist" in missing
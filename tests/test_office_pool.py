@@ -0,0 +1,65 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from word_document_server.utils.office_pool import OfficeConversionError, OfficePool
+
+
+def _sources(tmp_path, *names):
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+    return paths
+
+
+def test_workers_convert_in_parallel_with_separate_profiles(tmp_path, fake_office):
+    binary, log = fake_office
+    pool = OfficePool(binary=binary, workers=2, profile_root=str(tmp_path / "profiles"), use_uno=False)
+    # Same file name in two directories: outputs must not collide
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    sources = _sources(tmp_path, "a/doc.docx", "b/doc.docx", "c.docx", "d.docx")
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(4) as callers:
+            list(callers.map(lambda s: pool.convert(s, s + ".pdf"), sources))
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+    for source in sources:
+        with open(source + ".pdf", "rb") as f:
+            assert f.read() == b"%PDF-1.4 " + os.path.relpath(source, tmp_path).encode()
+    assert len(set(log.read_text().split())) == 2
+    assert elapsed < 4 * 0.2 + 0.5
+    assert pool.stats()["conversions"] == 4
+
+
+def test_worker_recovers_after_crash_and_recycles(tmp_path, fake_office):
+    binary, _ = fake_office
+    pool = OfficePool(binary=binary, workers=1, max_jobs=2, profile_root=str(tmp_path / "profiles"),
+                      use_uno=False)
+    crash, first, second, third = _sources(tmp_path, "crash.docx", "1.docx", "2.docx", "3.docx")
+    try:
+        with pytest.raises(OfficeConversionError, match="exit code 81"):
+            pool.convert(crash, crash + ".pdf")
+        for source in (first, second, third):
+            pool.convert(source, source + ".pdf")
+        stats = pool.stats()
+    finally:
+        pool.shutdown()
+
+    assert stats["failures"] == 1 and stats["conversions"] == 3
+    # Once after the crash, once after max_jobs conversions
+    assert stats["restarts"] == 2
+
+
+def test_unavailable_binary_raises():
+    pool = OfficePool(binary=None, use_uno=False)
+    pool.binary = None
+    with pytest.raises(OfficeConversionError, match="not installed"):
+        pool.convert("in.docx", "out.pdf")
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import os
+import time
+
+from docx import Document
+
+from word_document_server.tools import document_tools
+from word_document_server.utils.document_utils import get_document_structure
+
+
+def _save(tmp_path, name="outline.docx"):
+    doc = Document()
+    doc.add_heading("Report", level=0)
+    doc.add_heading("Introduction", level=1)
+    doc.add_paragraph("x" * 150)
+    doc.add_heading("Scope", level=2)
+    doc.add_paragraph("Quote text", style="Quote")
+    doc.add_heading("Results", level=1)
+    table = doc.add_table(rows=4, cols=4)
+    table.cell(0, 0).merge(table.cell(0, 1)).text = "merged header text over 20"
+    table.cell(1, 2).merge(table.cell(2, 2)).text = "tall"
+    path = str(tmp_path / name)
+    doc.save(path)
+    old = time.time() - 10
+    os.utime(path, (old, old))
+    return path, Document(path)
+
+
+def test_outline_matches_python_docx(tmp_path):
+    path, doc = _save(tmp_path)
+    structure = get_document_structure(path)
+
+    assert structure["total_paragraphs"] == len(doc.paragraphs)
+    assert structure["next_start"] is None
+    for entry, para in zip(structure["paragraphs"], doc.paragraphs):
+        assert entry["text"] == para.text[:100] + ("..." if len(para.text) > 100 else "")
+        assert entry["style"] == para.style.name
+
+    table = doc.tables[0]
+    expected_preview = [[(lambda t: t[:20] + ("..." if len(t) > 20 else ""))(table.cell(r, c).text)
+                         for c in range(3)] for r in range(3)]
+    assert structure["tables"] == [{"index": 0, "rows": 4, "columns": 4, "preview": expected_preview}]
+
+
+def test_headings_only_paging_and_style_filter(tmp_path):
+    path, _ = _save(tmp_path)
+
+    first = get_document_structure(path, headings_only=True, limit=2)
+    assert [(p["index"], p["text"], p["level"]) for p in first["paragraphs"]] == [(0, "Report", 0), (1, "Introduction", 1)]
+    assert first["total_paragraphs"] == 4 and first["next_start"] == 2
+
+    rest = get_document_structure(path, headings_only=True, start=first["next_start"], limit=2)
+    assert [p["text"] for p in rest["paragraphs"]] == ["Scope", "Results"]
+    assert rest["next_start"] is None
+
+    quotes = get_document_structure(path, styles=["quote"], include_tables=False)
+    assert [p["index"] for p in quotes["paragraphs"]] == [4]
+    assert "tables" not in quotes
+
+
+def test_outline_tool_compact_json(tmp_path):
+    path, _ = _save(tmp_path)
+
+    compact = asyncio.run(document_tools.get_document_outline(path, headings_only=True, compact=True))
+    assert "\n" not in compact
+    assert len(json.loads(compact)["paragraphs"]) == 4
+
+    second_page = json.loads(asyncio.run(document_tools.get_document_outline(path, start=2, limit=2)))
+    assert [p["index"] for p in second_page["paragraphs"]] == [2, 3]
+    # Tables come with the first page only
+    assert "tables" not in second_page
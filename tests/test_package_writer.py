@@ -0,0 +1,125 @@
+import os
+import stat
+import struct
+import zipfile
+import zlib
+from io import BytesIO
+
+from docx import Document
+
+from word_document_server.core.footnotes import add_footnote_robust
+from word_document_server.utils import package_writer
+from word_document_server.utils.package_writer import (
+    _read_raw_member, raw_copy_supported, rewrite_package, save_document
+)
+
+MEDIA = 'word/media/image1.png'
+
+
+def _png(width: int, height: int) -> bytes:
+    """An uncompressed PNG of random pixels, large and slow to deflate."""
+    rows = b''.join(b'\x00' + os.urandom(width * 3) for _ in range(height))
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows, 0))
+            + chunk(b'IEND', b''))
+
+
+def _package_with_media() -> bytes:
+    doc = Document()
+    doc.add_paragraph("First")
+    doc.add_picture(BytesIO(_png(256, 256)))
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _raw(data, name):
+    with zipfile.ZipFile(BytesIO(data) if isinstance(data, bytes) else data) as zf:
+        return _read_raw_member(zf, zf.getinfo(name))
+
+
+def test_save_document_copies_unchanged_parts_raw():
+    source = _package_with_media()
+    doc = Document(BytesIO(source))
+    doc.add_paragraph("Second")
+
+    buffer = BytesIO()
+    counts = save_document(doc, buffer, source=source)
+    saved = buffer.getvalue()
+
+    assert counts["compressed"] == 1  # only word/document.xml changed
+    assert _raw(saved, MEDIA) == _raw(source, MEDIA)
+    assert [p.text for p in Document(BytesIO(saved)).paragraphs][-1] == "Second"
+    with zipfile.ZipFile(BytesIO(saved)) as zf:
+        assert zf.testzip() is None
+
+
+def test_rewrite_package_keeps_untouched_members_byte_identical(tmp_path):
+    source = _package_with_media()
+    path = tmp_path / "in.docx"
+    path.write_bytes(source)
+
+    rewrite_package(str(path), str(path), {"word/extra.xml": b"<x/>"})
+
+    rewritten = path.read_bytes()
+    assert _raw(rewritten, MEDIA) == _raw(source, MEDIA)
+    with zipfile.ZipFile(BytesIO(rewritten)) as zf:
+        assert zf.read("word/extra.xml") == b"<x/>"
+        assert zf.testzip() is None
+
+
+def test_raw_copy_supported_on_this_interpreter():
+    # Raw copies rely on ZipFile internals; fails here first if a Python upgrade changes them
+    with zipfile.ZipFile(BytesIO(), 'w') as zout:
+        assert raw_copy_supported(zout)
+
+
+def test_falls_back_to_writestr_without_zipfile_internals(monkeypatch):
+    monkeypatch.setattr(package_writer, "raw_copy_supported", lambda zout: False)
+    source = _package_with_media()
+    doc = Document(BytesIO(source))
+    doc.add_paragraph("Second")
+
+    buffer = BytesIO()
+    counts = save_document(doc, buffer, source=source)
+    saved = buffer.getvalue()
+
+    assert counts["compressed"] == 1
+    with zipfile.ZipFile(BytesIO(saved)) as zf, zipfile.ZipFile(BytesIO(source)) as original:
+        assert zf.testzip() is None
+        assert zf.read(MEDIA) == original.read(MEDIA)
+    assert [p.text for p in Document(BytesIO(saved)).paragraphs][-1] == "Second"
+
+
+def test_add_footnote_robust_preserves_media(tmp_path):
+    source = _package_with_media()
+    path = tmp_path / "notes.docx"
+    path.write_bytes(source)
+
+    success, message, _ = add_footnote_robust(str(path), search_text="First", footnote_text="Note")
+
+    assert success, message
+    assert _raw(path.read_bytes(), MEDIA) == _raw(source, MEDIA)
+    Document(str(path))
+
+
+def test_rewrite_keeps_file_mode(tmp_path):
+    path = tmp_path / "shared.docx"
+    path.write_bytes(_package_with_media())
+    os.chmod(path, 0o644)
+
+    rewrite_package(str(path), str(path), {"word/extra.xml": b"<x/>"})
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+    # A new file gets the umask default rather than mkstemp's 0600
+    doc = Document(str(path))
+    target = tmp_path / "new.docx"
+    save_document(doc, str(target), source=str(path))
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o666 & ~umask
@@ -0,0 +1,120 @@
+from docx import Document
+
+from word_document_server.utils.document_utils import (
+    delete_block_under_header, find_paragraph_by_text, find_target_paragraph,
+    insert_header_in_document, insert_numbered_list_in_document,
+    replace_block_between_manual_anchors_in_document
+)
+from word_document_server.utils.paragraph_index import get_paragraph_index
+
+
+def _sample():
+    doc = Document()
+    doc.add_heading("Intro", level=1)
+    doc.add_paragraph("First body")
+    doc.add_paragraph("Second body")
+    doc.add_heading("Terms", level=1)
+    doc.add_paragraph("Term text")
+    return doc
+
+
+def _assert_in_sync(doc):
+    index = get_paragraph_index(doc)
+    paragraphs = doc.paragraphs
+    assert len(index) == len(paragraphs)
+    for i, para in enumerate(paragraphs):
+        assert index.element(i) is para._p
+        assert index.text(i) == para.text
+        assert index.style_name(i) == para.style.name
+
+
+def test_index_stays_in_sync_through_edits():
+    doc = _sample()
+    index = get_paragraph_index(doc)
+
+    insert_header_in_document(doc, target_text="Second body", header_title="Details", header_style="Heading 2")
+    insert_numbered_list_in_document(doc, target_text="Term text", list_items=["a", "b"])
+    delete_block_under_header(doc, "intro")
+
+    # The same index object was updated in place rather than rebuilt
+    assert get_paragraph_index(doc) is index
+    _assert_in_sync(doc)
+    assert [p.text for p in doc.paragraphs] == ["Intro", "Details", "Terms", "Term text", "a", "b"]
+
+
+def test_index_rebuilds_after_untracked_changes():
+    doc = _sample()
+    index = get_paragraph_index(doc)
+    doc.add_paragraph("Appended directly")
+
+    assert get_paragraph_index(doc) is not index
+    assert find_paragraph_by_text(doc, "Appended directly") == [5]
+    _assert_in_sync(doc)
+
+
+def test_lookups_match_paragraph_scan():
+    doc = _sample()
+    assert find_paragraph_by_text(doc, "body", partial_match=True) == [1, 2]
+    assert find_paragraph_by_text(doc, "First body") == [1]
+    assert find_paragraph_by_text(doc, "first body") == []
+    para, position = find_target_paragraph(doc, target_text="Term")
+    assert (para.text, position) == ("Terms", 3)
+
+
+def test_delete_block_under_header_removes_tables():
+    doc = _sample()
+    intro = doc.paragraphs[0]._p
+    table = doc.add_table(rows=1, cols=1)
+    # Place the table inside the Intro block
+    doc.paragraphs[1]._p.addnext(table._tbl)
+
+    header_el, removed = delete_block_under_header(doc, "Intro")
+
+    assert header_el is intro
+    assert removed == 3
+    assert len(doc.tables) == 0
+    assert [p.text for p in doc.paragraphs] == ["Intro", "Terms", "Term text"]
+    _assert_in_sync(doc)
+
+
+def test_delete_block_under_header_keeps_section_properties():
+    doc = _sample()
+    delete_block_under_header(doc, "Terms")
+    assert doc.element.body[-1].tag.endswith('}sectPr')
+    assert [p.text for p in doc.paragraphs][-1] == "Terms"
+
+
+def test_replace_block_between_manual_anchors_in_document():
+    doc = Document()
+    doc.add_paragraph("START")
+    doc.add_paragraph("old 1")
+    doc.add_table(rows=1, cols=1)
+    doc.add_paragraph("old 2")
+    doc.add_paragraph("END")
+    doc.add_paragraph("after")
+
+    message = replace_block_between_manual_anchors_in_document(
+        doc, "START", ["new 1", "new 2"], end_anchor_text="END"
+    )
+
+    assert "removed 3 elements" in message
+    assert [p.text for p in doc.paragraphs] == ["START", "new 1", "new 2", "END", "after"]
+    assert len(doc.tables) == 0
+    _assert_in_sync(doc)
+
+
+def test_store_edits_invalidate_index():
+    from word_document_server.utils.document_store import DocumentStore
+
+    store = DocumentStore()
+    file_id = store.add("sample.docx", document=_sample())
+    doc = store.open(file_id)
+    assert get_paragraph_index(doc).text(1) == "First body"
+
+    # Same paragraph count, text and style edited in place
+    doc.paragraphs[1].text = "Rewritten"
+    doc.paragraphs[2].style = doc.styles["Heading 2"]
+    store.mark_dirty(file_id)
+
+    _assert_in_sync(doc)
+    assert find_target_paragraph(doc, target_text="Rewritten")[1] == 1
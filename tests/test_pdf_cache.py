@@ -0,0 +1,142 @@
+import asyncio
+import os
+from io import BytesIO
+
+from docx import Document
+
+from word_document_server.tools import extended_document_tools
+from word_document_server.tools.document_tools import temp_files
+from word_document_server.utils.document_store import missing_document
+from word_document_server.utils.office_pool import OfficePool
+from word_document_server.utils.pdf_cache import PdfCache
+
+
+def _pdf(path, size):
+    path.write_bytes(b"%PDF" + b"x" * (size - 4))
+    return str(path)
+
+
+def test_fetch_links_cached_pdf_and_evicts_least_recently_used(tmp_path):
+    cache = PdfCache(str(tmp_path / "cache"), max_bytes=250)
+    keys = [PdfCache.key(f"doc {i}".encode(), "LibreOffice 7.6") for i in range(3)]
+    cache.store(keys[0], _pdf(tmp_path / "0.pdf", 100))
+    cache.store(keys[1], _pdf(tmp_path / "1.pdf", 100))
+
+    assert cache.fetch(keys[0], str(tmp_path / "copy.pdf"))
+    assert (tmp_path / "copy.pdf").read_bytes() == (tmp_path / "0.pdf").read_bytes()
+
+    cache.store(keys[2], _pdf(tmp_path / "2.pdf", 100))  # over budget: key 1 is oldest
+    assert not cache.fetch(keys[1], str(tmp_path / "miss.pdf"))
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 200
+
+    # LRU order is kept in file times, so a new instance sees the same entries
+    reopened = PdfCache(str(tmp_path / "cache"), max_bytes=250)
+    assert reopened.fetch(keys[2], str(tmp_path / "again.pdf"))
+
+
+def test_key_depends_on_content_and_converter(tmp_path):
+    path = tmp_path / "in.docx"
+    path.write_bytes(b"same bytes")
+    assert PdfCache.key(str(path), "7.6") == PdfCache.key(b"same bytes", "7.6")
+    assert PdfCache.key(b"same bytes", "7.6") != PdfCache.key(b"same bytes", "24.2")
+    assert PdfCache.key(b"same bytes", "7.6") != PdfCache.key(b"other bytes", "7.6")
+
+
+def test_convert_to_pdf_reuses_cached_result_for_file_id(tmp_path, fake_office, monkeypatch):
+    binary, log = fake_office
+    pool = OfficePool(binary=binary, workers=1, profile_root=str(tmp_path / "profiles"), use_uno=False)
+    monkeypatch.setattr(extended_document_tools, "get_office_pool", lambda: pool)
+    cache = PdfCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(extended_document_tools, "get_pdf_cache", lambda: cache)
+
+    doc = Document()
+    doc.add_paragraph("Cached")
+    buffer = BytesIO()
+    doc.save(buffer)
+    file_id = temp_files.add("memo.docx", data=buffer.getvalue())
+    try:
+        first = asyncio.run(extended_document_tools.convert_to_pdf(file_id, str(tmp_path / "first.pdf")))
+        second = asyncio.run(extended_document_tools.convert_to_pdf(file_id, str(tmp_path / "second.pdf")))
+    finally:
+        temp_files.discard(file_id)
+        pool.shutdown()
+
+    assert "successfully converted" in first and "(cached)" not in first
+    assert "(cached)" in second
+    assert (tmp_path / "second.pdf").read_bytes() == (tmp_path / "first.pdf").read_bytes()
+    assert len(log.read_text().split()) == 1  # LibreOffice ran once
+    assert not any(name.endswith(".docx") for name in os.listdir(tmp_path))
+
+
+def test_convert_many_to_pdf_batches_and_reports_progress(tmp_path, fake_office, monkeypatch):
+    binary, log = fake_office
+    pool = OfficePool(binary=binary, workers=2, profile_root=str(tmp_path / "profiles"), use_uno=False)
+    monkeypatch.setattr(extended_document_tools, "get_office_pool", lambda: pool)
+    cache = PdfCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(extended_document_tools, "get_pdf_cache", lambda: cache)
+
+    names = []
+    for i in range(6):
+        path = tmp_path / f"contract {i}.docx"
+        path.write_bytes(f"contract {i}".encode())
+        names.append(str(path))
+    names.append(str(tmp_path / "missing.docx"))
+    events = []
+
+    async def progress(done, total, result):
+        events.append((done, total, result["filename"], result["success"]))
+
+    try:
+        result = asyncio.run(extended_document_tools.convert_many_to_pdf(names, str(tmp_path / "out"), progress))
+        again = asyncio.run(extended_document_tools.convert_many_to_pdf(names[:2], str(tmp_path / "again")))
+    finally:
+        pool.shutdown()
+
+    assert result["converted"] == 6 and result["failed"] == 1
+    assert [r["filename"] for r in result["results"]] == names
+    assert "does not exist" in result["results"][-1]["error"]
+    assert (tmp_path / "out" / "contract 3.pdf").read_bytes() == b"%PDF-1.4 contract 3"
+    assert [done for done, *_ in events] == list(range(1, 8))
+    # Two workers, three documents per LibreOffice run
+    assert len(log.read_text().split()) == 2
+    assert all(r["cached"] for r in again["results"])
+
+
+def test_convert_many_to_pdf_reports_per_document_errors(tmp_path, fake_office, monkeypatch):
+    binary, _ = fake_office
+    pool = OfficePool(binary=binary, workers=1, profile_root=str(tmp_path / "profiles"), use_uno=False)
+    monkeypatch.setattr(extended_document_tools, "get_office_pool", lambda: pool)
+    cache = PdfCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(extended_document_tools, "get_pdf_cache", lambda: cache)
+
+    good = tmp_path / "good.docx"
+    good.write_bytes(b"good")
+    # Exists but cannot be read as a file
+    unreadable = tmp_path / "folder.docx"
+    unreadable.mkdir()
+
+    try:
+        result = asyncio.run(extended_document_tools.convert_many_to_pdf(
+            [str(unreadable), str(good)], str(tmp_path / "out")))
+    finally:
+        pool.shutdown()
+
+    assert result["converted"] == 1 and result["failed"] == 1
+    assert "Failed to prepare document" in result["results"][0]["error"]
+    assert result["results"][1]["success"]
+
+
+def test_prepare_pdf_job_reports_expired_file_id(tmp_path, monkeypatch):
+    file_id = temp_files.add("expiring.docx", document=Document())
+
+    def expired(name):
+        raise KeyError(missing_document(name))
+
+    # The document expires between the batch's lookup and its serialization
+    monkeypatch.setattr(temp_files, "get_bytes", expired)
+    try:
+        job = extended_document_tools._prepare_pdf_job(0, file_id, str(tmp_path / "out.pdf"), "fake",
+                                                       str(tmp_path))
+    finally:
+        temp_files.discard(file_id)
+    assert job == {"success": False, "error": missing_document(file_id)}
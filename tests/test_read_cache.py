@@ -0,0 +1,67 @@
+import asyncio
+import os
+
+from docx import Document
+
+from word_document_server.tools.document_tools import get_document_text
+from word_document_server.utils.file_utils import check_file_writeable
+from word_document_server.utils.read_cache import ReadCache, get_read_cache
+
+
+def _write(path, *paragraphs):
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    doc.save(str(path))
+    # Age the file past the racy window so results are cacheable
+    os.utime(str(path), ns=(1_000_000_000, 1_000_000_000))
+
+
+def test_get_document_text_is_cached_until_the_file_changes(tmp_path):
+    path = tmp_path / "cached.docx"
+    _write(path, "first")
+    before = get_read_cache().stats()
+
+    assert asyncio.run(get_document_text(str(path))) == "first"
+    assert asyncio.run(get_document_text(str(path))) == "first"
+    after = get_read_cache().stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    # Same mtime, so only the size tells the versions apart
+    _write(path, "second version")
+    assert asyncio.run(get_document_text(str(path))) == "second version"
+
+
+def test_write_tools_invalidate_by_path(tmp_path):
+    path = tmp_path / "doc.docx"
+    _write(path, "x")
+    cache = ReadCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "result"
+
+    cache.get_or_compute(str(path), "op", (), compute)
+    cache.get_or_compute(str(path), "op", (), compute)
+    cache.invalidate(str(path))
+    cache.get_or_compute(str(path), "op", (), compute)
+    assert len(calls) == 2
+
+    asyncio.run(get_document_text(str(path)))
+    check_file_writeable(str(path))
+    misses = get_read_cache().stats()["misses"]
+    asyncio.run(get_document_text(str(path)))
+    assert get_read_cache().stats()["misses"] == misses + 1
+
+
+def test_lru_bound_and_content_hash_keys():
+    cache = ReadCache(max_bytes=10)
+    cache.get_or_compute(b"doc-a", "op", (), lambda: "aaaaaa")
+    cache.get_or_compute(b"doc-b", "op", (), lambda: "bbbbbb")
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["bytes"] == 6
+    # doc-b is still cached, doc-a was evicted
+    assert cache.get_or_compute(b"doc-b", "op", (), lambda: "changed") == "bbbbbb"
+    assert cache.get_or_compute(b"doc-a", "op", (), lambda: "recomputed") == "recomputed"
@@ -0,0 +1,125 @@
+import asyncio
+import os
+from io import BytesIO
+
+import pytest
+from docx import Document
+
+moto = pytest.importorskip("moto")
+
+from word_document_server.tools import document_tools
+from word_document_server.tools.document_tools import temp_files
+from word_document_server.utils import s3_utils
+
+BUCKET = "word-mcp-test"
+
+
+def _docx(text: str) -> bytes:
+    doc = Document()
+    doc.add_paragraph(text)
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AMAZON_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AMAZON_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("S3_BUCKET_NAME", BUCKET)
+    s3_utils.reset_s3_client()
+    with moto.mock_aws():
+        client = s3_utils.get_s3_client()
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+    s3_utils.reset_s3_client()
+
+
+def test_client_is_created_lazily_and_shared():
+    """No client exists until one is needed; afterwards every caller gets the same one."""
+    s3_utils.reset_s3_client()
+    assert s3_utils._client is None
+    client = s3_utils.get_s3_client()
+    assert s3_utils.get_s3_client() is client
+    assert client.meta.config.max_pool_connections == s3_utils.DEFAULT_MAX_POOL_CONNECTIONS
+    s3_utils.reset_s3_client()
+
+
+def test_upload_get_url_uploads_document(s3):
+    file_id = temp_files.add("upload.docx", data=_docx("Hello"))
+    try:
+        url = asyncio.run(document_tools.upload_get_url(file_id))
+        assert isinstance(url, str) and BUCKET in url
+
+        body = s3.get_object(Bucket=BUCKET, Key=f"temp/{file_id}_upload.docx")["Body"].read()
+        assert body == temp_files.get_bytes(file_id)
+    finally:
+        temp_files.discard(file_id)
+
+
+def test_large_bodies_use_multipart_upload(s3, monkeypatch):
+    monkeypatch.setenv("MCP_S3_MULTIPART_THRESHOLD", str(5 * 1024 * 1024))
+    monkeypatch.setenv("MCP_S3_MULTIPART_CHUNKSIZE", str(5 * 1024 * 1024))
+    monkeypatch.setattr(s3_utils, "_transfer_config", None)
+    data = os.urandom(11 * 1024 * 1024)
+
+    s3_utils.upload_bytes(BUCKET, "big.bin", data, content_type="application/octet-stream")
+
+    obj = s3.get_object(Bucket=BUCKET, Key="big.bin")
+    assert obj["Body"].read() == data
+    # Multipart ETags end with the number of parts
+    assert obj["ETag"].strip('"').endswith("-3")
+    assert obj["ContentType"] == "application/octet-stream"
+
+
+def test_unchanged_document_is_not_uploaded_again(s3):
+    """A second upload_get_url without edits only signs a URL; an edit uploads again."""
+    file_id = temp_files.add("dedup.docx", data=_docx("Hello"))
+    key = f"temp/{file_id}_dedup.docx"
+    try:
+        asyncio.run(document_tools.upload_get_url(file_id))
+        s3.delete_object(Bucket=BUCKET, Key=key)
+
+        url = asyncio.run(document_tools.upload_get_url(file_id))
+        assert isinstance(url, str)
+        assert s3.list_objects_v2(Bucket=BUCKET, Prefix=key)["KeyCount"] == 0
+
+        temp_files.open(file_id).add_paragraph("World")
+        temp_files.mark_dirty(file_id)
+        asyncio.run(document_tools.upload_get_url(file_id))
+        body = s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+        assert body == temp_files.get_bytes(file_id)
+    finally:
+        temp_files.discard(file_id)
+
+
+def test_content_keys_share_identical_documents(s3, monkeypatch):
+    monkeypatch.setenv("MCP_S3_CONTENT_KEYS", "1")
+    data = _docx("Same")
+    first = temp_files.add("a.docx", data=data)
+    second = temp_files.add("b.docx", data=data)
+    try:
+        url = asyncio.run(document_tools.upload_get_url(first))
+        asyncio.run(document_tools.upload_get_url(second))
+
+        keys = [obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET)["Contents"]]
+        assert keys == [f"content/{temp_files.digest(first)}.docx"]
+        assert "response-content-disposition" in url
+    finally:
+        temp_files.discard(first)
+        temp_files.discard(second)
+
+
+def test_create_temp_keeps_nothing_on_error(s3, monkeypatch):
+    before = len(temp_files)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("upload failed")
+
+    monkeypatch.setattr(document_tools, "upload_bytes", fail)
+    result = asyncio.run(document_tools.create_temp("failed"))
+    assert result == {"error": "Failed to create document: upload failed"}
+
+    monkeypatch.delenv("S3_BUCKET_NAME")
+    assert asyncio.run(document_tools.create_temp("unconfigured")) == {"error": "S3_BUCKET_NAME not set"}
+    assert len(temp_files) == before
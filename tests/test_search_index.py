@@ -0,0 +1,75 @@
+import os
+import time
+
+from docx import Document
+
+from word_document_server.utils import search_index
+from word_document_server.utils.extended_document_utils import find_text
+from word_document_server.utils.read_cache import get_read_cache
+
+
+def _save(tmp_path, name="search.docx"):
+    doc = Document()
+    doc.add_paragraph("The cat sat on the mat.")
+    doc.add_paragraph("Concatenate CAT strings; cat, dog and cat.")
+    table = doc.add_table(rows=2, cols=3)
+    merged = table.cell(0, 0).merge(table.cell(0, 1))
+    merged.text = "cat in a merged cell"
+    table.cell(0, 2).text = "no match here"
+    table.cell(1, 2).text = "Another cat"
+    path = str(tmp_path / name)
+    doc.save(path)
+    # Outside the read cache's racy window, so the index is cached
+    old = time.time() - 10
+    os.utime(path, (old, old))
+    return path
+
+
+def test_substring_search_matches_paragraphs_and_cells(tmp_path):
+    path = _save(tmp_path)
+    result = find_text(path, "cat")
+
+    assert result["total_count"] == 6
+    assert [(o.get("paragraph_index"), o.get("location"), o["position"]) for o in result["occurrences"]] == [
+        (0, None, 4),
+        (1, None, 3),
+        (1, None, 25),
+        (1, None, 38),
+        # The merged cell is reported once, at its first grid column
+        (None, "Table 0, Row 0, Column 0", 0),
+        (None, "Table 0, Row 1, Column 2", 8),
+    ]
+    assert result["has_more"] is False
+
+
+def test_case_and_whole_word_matching(tmp_path):
+    path = _save(tmp_path)
+
+    assert find_text(path, "cat", match_case=False)["total_count"] == 7
+    whole = find_text(path, "cat", match_case=False, whole_word=True)
+    # "Concatenate" is excluded; "cat," with punctuation counts
+    assert whole["total_count"] == 6
+    assert [o["position"] for o in whole["occurrences"][:4]] == [4, 12, 25, 38]
+    assert find_text(path, "cat sat", whole_word=True)["total_count"] == 1
+    assert find_text(path, "dog cat", whole_word=True)["total_count"] == 0
+
+
+def test_paging_and_index_reuse(tmp_path, monkeypatch):
+    path = _save(tmp_path, "paging.docx")
+    get_read_cache().invalidate(path)
+    builds = []
+    original = search_index.SearchIndex.from_docx
+    monkeypatch.setattr(search_index.SearchIndex, "from_docx",
+                        classmethod(lambda cls, source: builds.append(source) or original(source)))
+
+    first = find_text(path, "cat", limit=2)
+    second = find_text(path, "cat", offset=2, limit=2)
+    last = find_text(path, "cat", offset=4, limit=10)
+
+    assert [o["position"] for o in first["occurrences"]] == [4, 3]
+    assert [o["position"] for o in second["occurrences"]] == [25, 38]
+    assert len(last["occurrences"]) == 2
+    assert first["has_more"] and second["has_more"] and not last["has_more"]
+    assert first["total_count"] == second["total_count"] == last["total_count"] == 6
+    # One index served every query
+    assert len(builds) == 1
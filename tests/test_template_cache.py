@@ -0,0 +1,96 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+from docx import Document
+
+moto = pytest.importorskip("moto")
+
+from word_document_server.tools import document_tools
+from word_document_server.tools.document_tools import temp_files
+from word_document_server.utils import s3_utils, template_cache
+from word_document_server.utils.template_cache import (
+    DOCX_CONTENT_TYPE, TemplateCache, TemplateError, parse_templates
+)
+
+BUCKET = "word-mcp-templates"
+
+
+def _docx(text: str) -> bytes:
+    doc = Document()
+    doc.add_paragraph(text)
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AMAZON_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AMAZON_SECRET_ACCESS_KEY", "testing")
+    s3_utils.reset_s3_client()
+    with moto.mock_aws():
+        client = s3_utils.get_s3_client()
+        client.create_bucket(Bucket=BUCKET)
+        client.put_object(Bucket=BUCKET, Key="Record_of_advice.docx", Body=_docx("Advice"),
+                          ContentType=DOCX_CONTENT_TYPE)
+        client.put_object(Bucket=BUCKET, Key="templates/letter.docx", Body=_docx("Letter"),
+                          ContentType=DOCX_CONTENT_TYPE)
+        yield client
+    s3_utils.reset_s3_client()
+
+
+def test_template_is_downloaded_once_and_revalidated(s3):
+    now = [0.0]
+    cache = TemplateCache(BUCKET, "Record_of_advice.docx", ttl=60, clock=lambda: now[0])
+
+    data, filename = cache.get()
+    assert filename == "Record_of_advice.docx"
+    assert cache.get()[0] is data
+    assert cache.stats()["downloads"] == 1 and cache.stats()["hits"] == 1
+
+    # After the TTL an unchanged template is revalidated without downloading it
+    now[0] = 61
+    assert cache.get()[0] is data
+    assert cache.stats()["revalidations"] == 1
+
+    # A changed template is downloaded again
+    s3.put_object(Bucket=BUCKET, Key="Record_of_advice.docx", Body=_docx("New advice"),
+                  ContentType=DOCX_CONTENT_TYPE)
+    now[0] = 122
+    assert cache.get()[0] != data
+    assert cache.stats()["downloads"] == 2
+
+
+def test_named_templates(s3):
+    cache = TemplateCache(BUCKET, templates=parse_templates("letter=templates/letter.docx, bad"))
+
+    data, filename = cache.get("letter")
+    assert filename == "letter.docx"
+    assert "Letter" in Document(BytesIO(data)).paragraphs[0].text
+
+    with pytest.raises(TemplateError, match="available: letter"):
+        cache.get("memo")
+    with pytest.raises(TemplateError, match="S3_OBJECT_KEY"):
+        cache.get()
+
+
+def test_load_template_shares_cached_bytes(s3, monkeypatch):
+    monkeypatch.setattr(template_cache, "_cache", TemplateCache(BUCKET, "Record_of_advice.docx"))
+
+    first = asyncio.run(document_tools.load_template())
+    second = asyncio.run(document_tools.load_template())
+    try:
+        assert first["filename"] == "Record_of_advice.docx" and first["version"] == 1
+        assert first["file_id"] != second["file_id"]
+        assert template_cache.template_cache_stats()["downloads"] == 1
+
+        # Editing one session leaves the other, and the cached template, untouched
+        temp_files.open(first["file_id"]).add_paragraph("Edited")
+        temp_files.mark_dirty(first["file_id"])
+        assert temp_files.get_bytes(second["file_id"]) is template_cache._cache.get()[0]
+    finally:
+        temp_files.discard(first["file_id"])
+        temp_files.discard(second["file_id"])
+
+    assert "error" in asyncio.run(document_tools.load_template("missing"))
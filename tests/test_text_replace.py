@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from docx import Document
+
+from word_document_server.tools import content_tools
+from word_document_server.tools.document_tools import temp_files
+from word_document_server.utils.document_utils import find_and_replace_text
+from word_document_server.utils.text_replace import replace_text_many
+
+
+def _split_paragraph(doc, *parts, bold_index=None):
+    para = doc.add_paragraph()
+    for i, part in enumerate(parts):
+        run = para.add_run(part)
+        run.bold = i == bold_index
+    return para
+
+
+def test_placeholder_split_across_runs_keeps_formatting():
+    doc = Document()
+    para = _split_paragraph(doc, "Dear {{cli", "ent_", "name}}, welcome", bold_index=0)
+
+    counts = replace_text_many(doc, {"{{client_name}}": "Ada Lovelace"})
+
+    assert counts == {"{{client_name}}": 1}
+    assert para.text == "Dear Ada Lovelace, welcome"
+    # The replacement lives in the run where the match started, keeping its bold formatting
+    assert para.runs[0].text == "Dear Ada Lovelace" and para.runs[0].bold
+    assert para.runs[2].text == ", welcome" and not para.runs[2].bold
+
+
+def test_many_patterns_in_one_pass_including_tables():
+    doc = Document()
+    doc.add_paragraph("{{a}} and {{ab}} and {{a}}")
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 1).text = "Total: {{total}}"
+    doc.add_paragraph("Contents {{a}}", style=doc.styles.add_style("TOC 1", 1))
+
+    counts = replace_text_many(doc, {"{{a}}": "A", "{{ab}}": "AB", "{{total}}": "42", "{{missing}}": "x"})
+
+    assert counts == {"{{a}}": 2, "{{ab}}": 1, "{{total}}": 1, "{{missing}}": 0}
+    assert doc.paragraphs[0].text == "A and AB and A"
+    assert table.cell(0, 1).text == "Total: 42"
+    # Table of contents paragraphs are left to Word
+    assert doc.paragraphs[1].text == "Contents {{a}}"
+
+
+def test_regex_patterns_with_group_references():
+    doc = Document()
+    para = _split_paragraph(doc, "Due 2024-", "03-15 and 2025-01-02")
+
+    counts = replace_text_many(doc, {r"(\d{4})-(\d{2})-(\d{2})": r"\3/\2/\1", r"\bDue\b": "Payable"}, regex=True)
+
+    assert counts == {r"(\d{4})-(\d{2})-(\d{2})": 2, r"\bDue\b": 1}
+    assert para.text == "Payable 15/03/2024 and 02/01/2025"
+
+
+def test_matches_do_not_cross_tabs_and_keep_spaces():
+    doc = Document()
+    para = doc.add_paragraph()
+    para.add_run("x\ty")
+    _split_paragraph(doc, "a ", "b")
+
+    assert find_and_replace_text(doc, "x\ty", "z") == 0
+    assert find_and_replace_text(doc, " b", "") == 1
+    assert doc.paragraphs[1].text == "a"
+    assert find_and_replace_text(doc, "a", " a ") == 1
+    assert doc.paragraphs[1].text == " a "
+
+
+def test_search_and_replace_many_tool():
+    doc = Document()
+    _split_paragraph(doc, "{{first", "}} {{last}}")
+    file_id = temp_files.add("letter.docx", document=doc)
+    try:
+        version = temp_files.version(file_id)
+        result = asyncio.run(content_tools.search_and_replace_many(
+            file_id, {"{{first}}": "Ada", "{{last}}": "Lovelace", "{{title}}": "Countess"}))
+
+        assert result == "Replaced 2 occurrence(s) of 2 pattern(s). Not found: '{{title}}'."
+        assert temp_files.open(file_id).paragraphs[0].text == "Ada Lovelace"
+        assert temp_files.version(file_id) == version + 1
+    finally:
+        temp_files.discard(file_id)
+
+
+def test_empty_replacements_are_rejected():
+    with pytest.raises(ValueError):
+        replace_text_many(Document(), {})
+
+
+def test_regex_patterns_keep_their_own_groups():
+    doc = Document()
+    para = _split_paragraph(doc, "Hello wo", "rld, the ", "sky is cool, 2024-05-06")
+
+    counts = replace_text_many(doc, {
+        r"(\w)\1": r"<\1\1>",
+        r"(?P<year>\d{4})-(?P<month>\d\d)-\d\d": r"\g<month>/\g<year>",
+        r"(?P<word>sky)": r"[\g<word>]",
+        # The same group name in two patterns
+        r"(?P<word>the)": r"\g<word>e",
+    }, regex=True)
+
+    assert para.text == "He<ll>o world, thee [sky] is c<oo>l, 05/2024"
+    assert list(counts.values()) == [2, 1, 1, 1]
+
+
+def test_regex_earlier_pattern_wins_at_same_position():
+    doc = Document()
+    para = doc.add_paragraph("abcabc")
+
+    counts = replace_text_many(doc, {"ab": "1", "abc": "2", "c": "3"}, regex=True)
+
+    assert para.text == "1313"
+    assert counts == {"ab": 2, "abc": 0, "c": 2}
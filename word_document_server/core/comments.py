@@ -3,88 +3,182 @@ Core comment extraction functionality for Word documents.
 
 This module provides low-level functions to extract and process comments
 from Word documents using the python-docx library.
+
+Comments are read into a CommentIndex in one pass: word/comments.xml gives
+the comment content, and a sweep over the body for commentRangeStart,
+commentRangeEnd and commentReference markers maps every comment to the
+paragraphs it covers. The index also groups comments by author, so
+queries by author or paragraph are dictionary lookups.
 """
 import datetime
-from typing import Dict, List, Optional, Any
+import posixpath
+import zipfile
+from typing import Dict, IO, Iterable, List, Optional, Any, Union
 from docx import Document
 from docx.document import Document as DocumentType
-from docx.text.paragraph import Paragraph
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
 
+_W_P = qn('w:p')
+_W_T = qn('w:t')
+_W_TBL = qn('w:tbl')
+_W_ID = qn('w:id')
+_W_COMMENT = qn('w:comment')
+_W_RANGE_START = qn('w:commentRangeStart')
+_W_RANGE_END = qn('w:commentRangeEnd')
+_W_REFERENCE = qn('w:commentReference')
+_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+# Characters of commented text kept as reference_text
+_REFERENCE_TEXT_LENGTH = 50
 
-def extract_all_comments(doc: DocumentType) -> List[Dict[str, Any]]:
+
+class CommentIndex:
     """
-    Extract all comments from a Word document.
-    
-    Args:
-        doc: The Document object to extract comments from
-        
-    Returns:
-        List of dictionaries containing comment information
+    Comments of one document, indexed by author and by paragraph.
+
+    paragraph_index is the position in doc.paragraphs of the paragraph where
+    a comment's range starts; comments anchored in tables have in_table set
+    and no paragraph_index. Comments spanning several paragraphs are listed
+    for each of them by for_paragraph().
     """
-    comments = []
-    
-    # Access the document's comment part if it exists
-    try:
-        # Get the document part
-        document_part = doc.part
-        
-        # Find comments part through relationships
-        comments_part = None
-        for rel_id, rel in document_part.rels.items():
-            if 'comments' in rel.reltype and 'comments' == rel.reltype.split('/')[-1]:
-                comments_part = rel.target_part
+
+    def __init__(self, comment_elements: Iterable, body):
+        self.comments: List[Dict[str, Any]] = []
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for idx, element in enumerate(comment_elements):
+            data = extract_comment_data(element, idx)
+            if data:
+                self.comments.append(data)
+                by_id[data['comment_id']] = data
+        self.paragraph_texts: List[str] = []
+        self._by_paragraph: Dict[int, List[Dict[str, Any]]] = {}
+        if body is not None:
+            self._sweep(body, by_id)
+        self._by_author: Dict[str, List[Dict[str, Any]]] = {}
+        for comment in self.comments:
+            self._by_author.setdefault(comment['author'].lower(), []).append(comment)
+        # Approximate memory use, for the read cache's byte budget
+        self.nbytes = (sum(map(len, self.paragraph_texts)) * 2 + 60 * len(self.paragraph_texts)
+                       + sum(len(c['text']) * 2 + 400 for c in self.comments))
+
+    @classmethod
+    def from_document(cls, doc: DocumentType) -> "CommentIndex":
+        """Build the index from a python-docx Document."""
+        elements = []
+        for rel in doc.part.rels.values():
+            if rel.reltype == RT.COMMENTS and not rel.is_external:
+                elements = rel.target_part.element.iterchildren(_W_COMMENT)
                 break
-        
-        if comments_part:
-            # Extract comments from the comments part using proper xpath syntax
-            comment_elements = comments_part.element.xpath('.//w:comment')
-            
-            for idx, comment_element in enumerate(comment_elements):
-                comment_data = extract_comment_data(comment_element, idx)
-                if comment_data:
-                    comments.append(comment_data)
-        
-        # If no comments found, try alternative approach
-        if not comments:
-            # Fallback: scan paragraphs for comment references
-            comments = extract_comments_from_paragraphs(doc)
-    
-    except Exception as e:
-        # If direct access fails, try alternative approach
-        comments = extract_comments_from_paragraphs(doc)
-    
-    return comments
+        return cls(elements, doc.element.body)
+
+    @classmethod
+    def from_docx(cls, source: Union[str, IO[bytes]]) -> "CommentIndex":
+        """Build the index straight from the package, without loading a python-docx Document."""
+        with zipfile.ZipFile(source) as zf:
+            elements = []
+            comments_name = _comments_part_name(zf)
+            if comments_name is not None:
+                elements = list(parse_xml(zf.read(comments_name)).iterchildren(_W_COMMENT))
+            body = parse_xml(zf.read('word/document.xml')).find(qn('w:body'))
+        return cls(elements, body)
+
+    def by_author(self, author: str) -> List[Dict[str, Any]]:
+        """Comments by an author (case-insensitive)."""
+        return list(self._by_author.get(author.lower(), ()))
+
+    def for_paragraph(self, paragraph_index: int) -> List[Dict[str, Any]]:
+        """Comments whose range covers a paragraph of doc.paragraphs."""
+        return list(self._by_paragraph.get(paragraph_index, ()))
+
+    def _sweep(self, body, by_id: Dict[str, Dict[str, Any]]) -> None:
+        # Ranges open at this point of the sweep: id -> (first paragraph, text so far)
+        open_ranges: Dict[str, List[Any]] = {}
+        for child in body:
+            if child.tag == _W_P:
+                paragraph = len(self.paragraph_texts)
+                self.paragraph_texts.append(child.text)
+                for range_ in open_ranges.values():
+                    range_[1] = paragraph
+            elif child.tag == _W_TBL:
+                paragraph = None
+            else:
+                continue
+            for element in child.iter(_W_RANGE_START, _W_RANGE_END, _W_REFERENCE, _W_T):
+                tag = element.tag
+                if tag == _W_T:
+                    for range_ in open_ranges.values():
+                        if len(range_[2]) <= _REFERENCE_TEXT_LENGTH:
+                            range_[2] += element.text or ''
+                    continue
+                comment_id = element.get(_W_ID)
+                if tag == _W_RANGE_START:
+                    open_ranges[comment_id] = [paragraph, paragraph, '']
+                elif tag == _W_RANGE_END:
+                    range_ = open_ranges.pop(comment_id, None)
+                    if range_ is not None:
+                        self._anchor(by_id, comment_id, *range_)
+                elif comment_id not in open_ranges:
+                    # Anchors comments that have a reference but no range
+                    self._anchor(by_id, comment_id, paragraph, paragraph, '')
+        for comment_id, range_ in open_ranges.items():
+            self._anchor(by_id, comment_id, *range_)
+
+    def _anchor(self, by_id: Dict[str, Dict[str, Any]], comment_id: str,
+                first: Optional[int], last: Optional[int], text: str) -> None:
+        comment = by_id.get(comment_id)
+        if comment is None:
+            # Marker without an entry in comments.xml
+            comment = {
+                'id': f'comment_{len(self.comments) + 1}',
+                'comment_id': comment_id,
+                'author': 'Unknown',
+                'initials': '',
+                'date': None,
+                'text': 'Comment detected but content not accessible',
+                'paragraph_index': None,
+                'in_table': False,
+                'reference_text': ''
+            }
+            self.comments.append(comment)
+            by_id[comment_id] = comment
+        elif comment['paragraph_index'] is not None or comment['in_table']:
+            return
+        if first is None:
+            comment['in_table'] = True
+        else:
+            comment['paragraph_index'] = first
+            for paragraph in range(first, (last if last is not None else first) + 1):
+                self._by_paragraph.setdefault(paragraph, []).append(comment)
+        if text:
+            comment['reference_text'] = text[:_REFERENCE_TEXT_LENGTH] + \
+                ('...' if len(text) > _REFERENCE_TEXT_LENGTH else '')
 
 
-def extract_comments_from_paragraphs(doc: DocumentType) -> List[Dict[str, Any]]:
+def _comments_part_name(zf: zipfile.ZipFile) -> Optional[str]:
+    """Return the zip name of the main document's comments part, if it has one."""
+    try:
+        rels = parse_xml(zf.read('word/_rels/document.xml.rels'))
+    except KeyError:
+        return None
+    for rel in rels.iterchildren(f'{_REL_NS}Relationship'):
+        if rel.get('Type') == RT.COMMENTS and rel.get('TargetMode') != 'External':
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('word', target))
+    return None
+
+
+def extract_all_comments(doc: DocumentType) -> List[Dict[str, Any]]:
     """
-    Extract comments by scanning paragraphs for comment references.
+    Extract all comments from a Word document.
     
     Args:
-        doc: The Document object
+        doc: The Document object to extract comments from
         
     Returns:
-        List of comment dictionaries
+        List of dictionaries containing comment information
     """
-    comments = []
-    comment_id = 1
-    
-    # Check all paragraphs in the document
-    for para_idx, paragraph in enumerate(doc.paragraphs):
-        para_comments = find_paragraph_comments(paragraph, para_idx, comment_id)
-        comments.extend(para_comments)
-        comment_id += len(para_comments)
-    
-    # Check paragraphs in tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for para_idx, paragraph in enumerate(cell.paragraphs):
-                    para_comments = find_paragraph_comments(paragraph, para_idx, comment_id, in_table=True)
-                    comments.extend(para_comments)
-                    comment_id += len(para_comments)
-    
-    return comments
+    return CommentIndex.from_document(doc).comments
 
 
 def extract_comment_data(comment_element, index: int) -> Optional[Dict[str, Any]]:
@@ -134,53 +228,6 @@ def extract_comment_data(comment_element, index: int) -> Optional[Dict[str, Any]
         return None
 
 
-def find_paragraph_comments(paragraph: Paragraph, para_index: int, 
-                           start_id: int, in_table: bool = False) -> List[Dict[str, Any]]:
-    """
-    Find comments associated with a specific paragraph.
-    
-    Args:
-        paragraph: The paragraph to check
-        para_index: The index of the paragraph
-        start_id: Starting ID for comments
-        in_table: Whether the paragraph is in a table
-        
-    Returns:
-        List of comment dictionaries
-    """
-    comments = []
-    
-    try:
-        # Access the paragraph's XML element
-        para_xml = paragraph._element
-        
-        # Look for comment range markers (simplified approach)
-        # This is a basic implementation - the full version would need more sophisticated XML parsing
-        xml_text = str(para_xml)
-        
-        # Simple check for comment references in the XML
-        if 'commentRangeStart' in xml_text or 'commentReference' in xml_text:
-            # Create a placeholder comment entry
-            comment_info = {
-                'id': f'comment_{start_id}',
-                'comment_id': f'{start_id}',
-                'author': 'Unknown',
-                'initials': '',
-                'date': None,
-                'text': 'Comment detected but content not accessible',
-                'paragraph_index': para_index,
-                'in_table': in_table,
-                'reference_text': paragraph.text[:50] + '...' if len(paragraph.text) > 50 else paragraph.text
-            }
-            comments.append(comment_info)
-    
-    except Exception:
-        # If we can't access the XML, skip this paragraph
-        pass
-    
-    return comments
-
-
 def filter_comments_by_author(comments: List[Dict[str, Any]], author: str) -> List[Dict[str, Any]]:
     """
     Filter comments by author name.
@@ -6,11 +6,13 @@ This module combines all footnote implementations with proper namespace handling
 import os
 import zipfile
 import tempfile
-from typing import Optional, Tuple, Dict, Any, List
+from typing import Optional, Tuple, Dict, Any, Iterator, List
 from lxml import etree
 from docx import Document
 from docx.oxml.ns import qn
 
+from word_document_server.utils.package_writer import rewrite_package
+
 # Namespace definitions
 W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
 R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
@@ -114,8 +116,8 @@ def customize_footnote_formatting(doc, footnote_refs, format_symbols, start_numb
 # ROBUST IMPLEMENTATION (consolidated from footnotes_robust.py)
 # ============================================================================
 
-def _get_safe_footnote_id(footnotes_root) -> int:
-    """Get a safe footnote ID avoiding conflicts and reserved values."""
+def _iter_safe_footnote_ids(footnotes_root) -> Iterator[int]:
+    """Yield free footnote IDs in ascending order from a single scan of footnotes_root."""
     nsmap = {'w': W_NS}
     existing_footnotes = footnotes_root.xpath('//w:footnote', namespaces=nsmap)
     
@@ -130,12 +132,18 @@ def _get_safe_footnote_id(footnotes_root) -> int:
     
     # Start from 2 to avoid reserved IDs
     candidate_id = 2
-    while candidate_id in used_ids or candidate_id in RESERVED_FOOTNOTE_IDS:
-        candidate_id += 1
+    while True:
+        while candidate_id in used_ids or candidate_id in RESERVED_FOOTNOTE_IDS:
+            candidate_id += 1
         if candidate_id > MAX_FOOTNOTE_ID:
             raise ValueError("No available footnote IDs")
-    
-    return candidate_id
+        yield candidate_id
+        candidate_id += 1
+
+
+def _get_safe_footnote_id(footnotes_root) -> int:
+    """Get a safe footnote ID avoiding conflicts and reserved values."""
+    return next(_iter_safe_footnote_ids(footnotes_root))
 
 
 def _ensure_content_types(content_types_xml: bytes) -> bytes:
@@ -280,6 +288,136 @@ def _ensure_footnote_styles(styles_root):
         styles_root.append(style)
 
 
+def _read_footnote_parts(filename: str) -> Dict[str, bytes]:
+    """Read the package parts a footnote insertion touches, creating missing ones."""
+    doc_parts = {}
+    with zipfile.ZipFile(filename, 'r') as zin:
+        doc_parts['document'] = zin.read('word/document.xml')
+        doc_parts['content_types'] = zin.read('[Content_Types].xml')
+        doc_parts['document_rels'] = zin.read('word/_rels/document.xml.rels')
+        
+        # Read or create footnotes.xml
+        if 'word/footnotes.xml' in zin.namelist():
+            doc_parts['footnotes'] = zin.read('word/footnotes.xml')
+        else:
+            doc_parts['footnotes'] = _create_minimal_footnotes_xml()
+        
+        # Read styles
+        if 'word/styles.xml' in zin.namelist():
+            doc_parts['styles'] = zin.read('word/styles.xml')
+        else:
+            # Create minimal styles
+            doc_parts['styles'] = b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"/>'
+    return doc_parts
+
+
+def _write_footnote_parts(filename: str, working_file: str, doc_parts: Dict[str, bytes],
+                          doc_root, footnotes_root, styles_root) -> None:
+    """Write modified document, footnotes and styles parts back in a single package rewrite."""
+    # Ensure styles exist
+    _ensure_footnote_styles(styles_root)
+    
+    # Ensure coherence
+    content_types_xml = _ensure_content_types(doc_parts['content_types'])
+    document_rels_xml = _ensure_document_rels(doc_parts['document_rels'])
+    
+    # Unchanged members are copied without recompression
+    rewrite_package(filename, working_file, {
+        'word/document.xml':
+            etree.tostring(doc_root, encoding='UTF-8', xml_declaration=True, standalone="yes"),
+        'word/footnotes.xml':
+            etree.tostring(footnotes_root, encoding='UTF-8', xml_declaration=True, standalone="yes"),
+        'word/styles.xml':
+            etree.tostring(styles_root, encoding='UTF-8', xml_declaration=True, standalone="yes"),
+        '[Content_Types].xml': content_types_xml,
+        'word/_rels/document.xml.rels': document_rels_xml,
+    })
+
+
+def _in_header_or_footer(para) -> bool:
+    """Check whether a paragraph element sits inside a header or footer."""
+    parent = para.getparent()
+    while parent is not None:
+        if parent.tag in [f'{{{W_NS}}}hdr', f'{{{W_NS}}}ftr']:
+            return True
+        parent = parent.getparent()
+    return False
+
+
+def _insert_footnote(target_para, footnotes_root, footnote_id: int, footnote_text: str,
+                     position: str = "after") -> None:
+    """Insert a footnote reference into target_para and its content into footnotes_root."""
+    nsmap = {'w': W_NS}
+    
+    # Add footnote reference to document
+    if position == "after":
+        # Find last run in paragraph or create one
+        runs = target_para.xpath('.//w:r', namespaces=nsmap)
+        if runs:
+            last_run = runs[-1]
+            # Insert after last run
+            insert_pos = target_para.index(last_run) + 1
+        else:
+            insert_pos = len(target_para)
+    else:  # before
+        # Find first run with text
+        runs = target_para.xpath('.//w:r[w:t]', namespaces=nsmap)
+        if runs:
+            first_run = runs[0]
+            insert_pos = target_para.index(first_run)
+        else:
+            insert_pos = 0
+    
+    # Create footnote reference run
+    ref_run = etree.Element(f'{{{W_NS}}}r')
+    
+    # Add run properties with superscript
+    rPr = etree.SubElement(ref_run, f'{{{W_NS}}}rPr')
+    rStyle = etree.SubElement(rPr, f'{{{W_NS}}}rStyle')
+    rStyle.set(f'{{{W_NS}}}val', 'FootnoteReference')
+    
+    # Add footnote reference
+    fn_ref = etree.SubElement(ref_run, f'{{{W_NS}}}footnoteReference')
+    fn_ref.set(f'{{{W_NS}}}id', str(footnote_id))
+    
+    # Insert the reference run
+    target_para.insert(insert_pos, ref_run)
+    
+    # Add footnote content
+    new_footnote = etree.Element(f'{{{W_NS}}}footnote',
+        attrib={f'{{{W_NS}}}id': str(footnote_id)}
+    )
+    
+    # Add paragraph to footnote
+    fn_para = etree.SubElement(new_footnote, f'{{{W_NS}}}p')
+    
+    # Add paragraph properties
+    pPr = etree.SubElement(fn_para, f'{{{W_NS}}}pPr')
+    pStyle = etree.SubElement(pPr, f'{{{W_NS}}}pStyle')
+    pStyle.set(f'{{{W_NS}}}val', 'FootnoteText')
+    
+    # Add the footnote reference marker
+    marker_run = etree.SubElement(fn_para, f'{{{W_NS}}}r')
+    marker_rPr = etree.SubElement(marker_run, f'{{{W_NS}}}rPr')
+    marker_rStyle = etree.SubElement(marker_rPr, f'{{{W_NS}}}rStyle')
+    marker_rStyle.set(f'{{{W_NS}}}val', 'FootnoteReference')
+    marker_ref = etree.SubElement(marker_run, f'{{{W_NS}}}footnoteRef')
+    
+    # Add space after marker
+    space_run = etree.SubElement(fn_para, f'{{{W_NS}}}r')
+    space_text = etree.SubElement(space_run, f'{{{W_NS}}}t')
+    space_text.set(f'{{{XML_NS}}}space', 'preserve')
+    space_text.text = ' '
+    
+    # Add footnote text
+    text_run = etree.SubElement(fn_para, f'{{{W_NS}}}r')
+    text_elem = etree.SubElement(text_run, f'{{{W_NS}}}t')
+    text_elem.text = footnote_text
+    
+    # Append footnote to footnotes.xml
+    footnotes_root.append(new_footnote)
+
+
 def add_footnote_robust(
     filename: str,
     search_text: Optional[str] = None,
@@ -313,25 +451,7 @@ def add_footnote_robust(
         shutil.copy2(filename, output_filename)
     
     try:
-        # Read document parts
-        doc_parts = {}
-        with zipfile.ZipFile(filename, 'r') as zin:
-            doc_parts['document'] = zin.read('word/document.xml')
-            doc_parts['content_types'] = zin.read('[Content_Types].xml')
-            doc_parts['document_rels'] = zin.read('word/_rels/document.xml.rels')
-            
-            # Read or create footnotes.xml
-            if 'word/footnotes.xml' in zin.namelist():
-                doc_parts['footnotes'] = zin.read('word/footnotes.xml')
-            else:
-                doc_parts['footnotes'] = _create_minimal_footnotes_xml()
-            
-            # Read styles
-            if 'word/styles.xml' in zin.namelist():
-                doc_parts['styles'] = zin.read('word/styles.xml')
-            else:
-                # Create minimal styles
-                doc_parts['styles'] = b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"/>'
+        doc_parts = _read_footnote_parts(filename)
         
         # Parse XML documents
         doc_root = etree.fromstring(doc_parts['document'])
@@ -361,132 +481,117 @@ def add_footnote_robust(
             target_para = paragraphs[paragraph_index]
         
         # Validate location if requested
-        if validate_location:
-            # Check if paragraph is in header/footer
-            parent = target_para.getparent()
-            while parent is not None:
-                if parent.tag in [f'{{{W_NS}}}hdr', f'{{{W_NS}}}ftr']:
-                    return False, "Cannot add footnote in header/footer", None
-                parent = parent.getparent()
+        if validate_location and _in_header_or_footer(target_para):
+            return False, "Cannot add footnote in header/footer", None
         
         # Get safe footnote ID
         footnote_id = _get_safe_footnote_id(footnotes_root)
         
-        # Add footnote reference to document
-        if position == "after":
-            # Find last run in paragraph or create one
-            runs = target_para.xpath('.//w:r', namespaces=nsmap)
-            if runs:
-                last_run = runs[-1]
-                # Insert after last run
-                insert_pos = target_para.index(last_run) + 1
-            else:
-                insert_pos = len(target_para)
-        else:  # before
-            # Find first run with text
-            runs = target_para.xpath('.//w:r[w:t]', namespaces=nsmap)
-            if runs:
-                first_run = runs[0]
-                insert_pos = target_para.index(first_run)
-            else:
-                insert_pos = 0
+        _insert_footnote(target_para, footnotes_root, footnote_id, footnote_text, position)
         
-        # Create footnote reference run
-        ref_run = etree.Element(f'{{{W_NS}}}r')
+        _write_footnote_parts(filename, working_file, doc_parts, doc_root, footnotes_root, styles_root)
         
-        # Add run properties with superscript
-        rPr = etree.SubElement(ref_run, f'{{{W_NS}}}rPr')
-        rStyle = etree.SubElement(rPr, f'{{{W_NS}}}rStyle')
-        rStyle.set(f'{{{W_NS}}}val', 'FootnoteReference')
-        
-        # Add footnote reference
-        fn_ref = etree.SubElement(ref_run, f'{{{W_NS}}}footnoteReference')
-        fn_ref.set(f'{{{W_NS}}}id', str(footnote_id))
+        details = {
+            'footnote_id': footnote_id,
+            'location': 'search_text' if search_text else 'paragraph_index',
+            'styles_created': ['FootnoteReference', 'FootnoteText'],
+            'coherence_verified': True
+        }
         
-        # Insert the reference run
-        target_para.insert(insert_pos, ref_run)
+        return True, f"Successfully added footnote (ID: {footnote_id}) to {working_file}", details
         
-        # Add footnote content
-        new_footnote = etree.Element(f'{{{W_NS}}}footnote',
-            attrib={f'{{{W_NS}}}id': str(footnote_id)}
-        )
+    except Exception as e:
+        return False, f"Error adding footnote: {str(e)}", None
+
+
+def add_footnotes_batch(
+    filename: str,
+    footnotes: List[Dict[str, Any]],
+    output_filename: Optional[str] = None,
+    validate_location: bool = True
+) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
+    """
+    Add many footnotes with a single parse and a single package rewrite.
+    
+    Each entry in footnotes is a dict with footnote_text, either search_text
+    or paragraph_index, and an optional position ("after" or "before").
+    Targets are located in one pass over the paragraphs of the original
+    document and IDs are allocated in order. Nothing is written unless every
+    entry can be placed.
+    """
+    if not footnotes:
+        return False, "No footnotes provided", None
+    
+    for i, entry in enumerate(footnotes):
+        has_text = bool(entry.get('search_text'))
+        has_index = entry.get('paragraph_index') is not None
+        if has_text == has_index:
+            return False, f"Footnote {i}: provide exactly one of search_text or paragraph_index", None
+        if entry.get('position', 'after') not in ('after', 'before'):
+            return False, f"Footnote {i}: position must be 'after' or 'before'", None
+    
+    if not os.path.exists(filename):
+        return False, f"File not found: {filename}", None
+    
+    # Set working file
+    working_file = output_filename if output_filename else filename
+    
+    try:
+        doc_parts = _read_footnote_parts(filename)
+        doc_root = etree.fromstring(doc_parts['document'])
+        footnotes_root = etree.fromstring(doc_parts['footnotes'])
+        styles_root = etree.fromstring(doc_parts['styles'])
+        nsmap = {'w': W_NS}
         
-        # Add paragraph to footnote
-        fn_para = etree.SubElement(new_footnote, f'{{{W_NS}}}p')
-        
-        # Add paragraph properties
-        pPr = etree.SubElement(fn_para, f'{{{W_NS}}}pPr')
-        pStyle = etree.SubElement(pPr, f'{{{W_NS}}}pStyle')
-        pStyle.set(f'{{{W_NS}}}val', 'FootnoteText')
-        
-        # Add the footnote reference marker
-        marker_run = etree.SubElement(fn_para, f'{{{W_NS}}}r')
-        marker_rPr = etree.SubElement(marker_run, f'{{{W_NS}}}rPr')
-        marker_rStyle = etree.SubElement(marker_rPr, f'{{{W_NS}}}rStyle')
-        marker_rStyle.set(f'{{{W_NS}}}val', 'FootnoteReference')
-        marker_ref = etree.SubElement(marker_run, f'{{{W_NS}}}footnoteRef')
-        
-        # Add space after marker
-        space_run = etree.SubElement(fn_para, f'{{{W_NS}}}r')
-        space_text = etree.SubElement(space_run, f'{{{W_NS}}}t')
-        space_text.set(f'{{{XML_NS}}}space', 'preserve')
-        space_text.text = ' '
-        
-        # Add footnote text
-        text_run = etree.SubElement(fn_para, f'{{{W_NS}}}r')
-        text_elem = etree.SubElement(text_run, f'{{{W_NS}}}t')
-        text_elem.text = footnote_text
-        
-        # Append footnote to footnotes.xml
-        footnotes_root.append(new_footnote)
-        
-        # Ensure styles exist
-        _ensure_footnote_styles(styles_root)
-        
-        # Ensure coherence
-        content_types_xml = _ensure_content_types(doc_parts['content_types'])
-        document_rels_xml = _ensure_document_rels(doc_parts['document_rels'])
-        
-        # Write modified document
-        temp_file = working_file + '.tmp'
-        with zipfile.ZipFile(temp_file, 'w', zipfile.ZIP_DEFLATED) as zout:
-            with zipfile.ZipFile(filename, 'r') as zin:
-                # Copy unchanged files
-                for item in zin.infolist():
-                    if item.filename not in [
-                        'word/document.xml', 'word/footnotes.xml', 'word/styles.xml',
-                        '[Content_Types].xml', 'word/_rels/document.xml.rels'
-                    ]:
-                        zout.writestr(item, zin.read(item.filename))
+        paragraphs = doc_root.xpath('//w:p', namespaces=nsmap)
+        
+        # Resolve every search_text in one pass; the first matching paragraph wins
+        pending = {entry['search_text'] for entry in footnotes if entry.get('search_text')}
+        text_targets = {}
+        for para in paragraphs:
+            if not pending:
+                break
+            para_text = ''.join(para.xpath('.//w:t/text()', namespaces=nsmap))
+            for search_text in [text for text in pending if text in para_text]:
+                text_targets[search_text] = para
+                pending.discard(search_text)
+        
+        targets = []
+        for i, entry in enumerate(footnotes):
+            if entry.get('search_text'):
+                target_para = text_targets.get(entry['search_text'])
+                if target_para is None:
+                    return False, f"Footnote {i}: text '{entry['search_text']}' not found in document", None
+            else:
+                paragraph_index = int(entry['paragraph_index'])
+                if paragraph_index < 0 or paragraph_index >= len(paragraphs):
+                    return False, f"Footnote {i}: paragraph index {paragraph_index} out of range", None
+                target_para = paragraphs[paragraph_index]
             
-            # Write modified files
-            zout.writestr('word/document.xml',
-                etree.tostring(doc_root, encoding='UTF-8', xml_declaration=True, standalone="yes"))
-            zout.writestr('word/footnotes.xml',
-                etree.tostring(footnotes_root, encoding='UTF-8', xml_declaration=True, standalone="yes"))
-            zout.writestr('word/styles.xml',
-                etree.tostring(styles_root, encoding='UTF-8', xml_declaration=True, standalone="yes"))
-            zout.writestr('[Content_Types].xml', content_types_xml)
-            zout.writestr('word/_rels/document.xml.rels', document_rels_xml)
-        
-        # Replace original with temp file
-        os.replace(temp_file, working_file)
+            if validate_location and _in_header_or_footer(target_para):
+                return False, f"Footnote {i}: cannot add footnote in header/footer", None
+            targets.append(target_para)
+        
+        footnote_ids = _iter_safe_footnote_ids(footnotes_root)
+        added = []
+        for i, (entry, target_para) in enumerate(zip(footnotes, targets)):
+            footnote_id = next(footnote_ids)
+            _insert_footnote(target_para, footnotes_root, footnote_id,
+                             entry.get('footnote_text', ''), entry.get('position', 'after'))
+            added.append({'index': i, 'footnote_id': footnote_id})
+        
+        _write_footnote_parts(filename, working_file, doc_parts, doc_root, footnotes_root, styles_root)
         
         details = {
-            'footnote_id': footnote_id,
-            'location': 'search_text' if search_text else 'paragraph_index',
+            'footnotes': added,
             'styles_created': ['FootnoteReference', 'FootnoteText'],
             'coherence_verified': True
         }
         
-        return True, f"Successfully added footnote (ID: {footnote_id}) to {working_file}", details
+        return True, f"Successfully added {len(added)} footnotes to {working_file}", details
         
     except Exception as e:
-        # Clean up temp file if exists
-        temp_file = working_file + '.tmp'
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-        return False, f"Error adding footnote: {str(e)}", None
+        return False, f"Error adding footnotes: {str(e)}", None
 
 
 def delete_footnote_robust(
@@ -577,21 +682,13 @@ def delete_footnote_robust(
                     footnotes_root.remove(fn)
                     orphans_removed.append(fn_id)
         
-        # Write modified document
-        temp_file = working_file + '.tmp'
-        with zipfile.ZipFile(temp_file, 'w', zipfile.ZIP_DEFLATED) as zout:
-            with zipfile.ZipFile(filename, 'r') as zin:
-                for item in zin.infolist():
-                    if item.filename == 'word/document.xml':
-                        zout.writestr(item,
-                            etree.tostring(doc_root, encoding='UTF-8', xml_declaration=True, standalone="yes"))
-                    elif item.filename == 'word/footnotes.xml':
-                        zout.writestr(item,
-                            etree.tostring(footnotes_root, encoding='UTF-8', xml_declaration=True, standalone="yes"))
-                    else:
-                        zout.writestr(item, zin.read(item.filename))
-        
-        os.replace(temp_file, working_file)
+        # Write modified document; unchanged members are copied without recompression
+        rewrite_package(filename, working_file, {
+            'word/document.xml':
+                etree.tostring(doc_root, encoding='UTF-8', xml_declaration=True, standalone="yes"),
+            'word/footnotes.xml':
+                etree.tostring(footnotes_root, encoding='UTF-8', xml_declaration=True, standalone="yes"),
+        })
         
         details = {
             'footnote_id': footnote_id,
@@ -0,0 +1,296 @@
+"""
+Document merging for Word Document Server.
+
+merge_documents used to rebuild every paragraph of every source from its
+text and a few run properties, and to append all tables at the end, so
+merged documents lost their formatting, lists, images, links and the order
+of tables within the text. Merging here works on the XML instead: the
+first source is the base document, and the body elements of every further
+source are deep-copied in order before the base's final section
+properties. Everything the copied elements point at is brought along:
+
+- styles missing from the target (and the styles they are based on) are
+  copied from the source; styles the target already has are kept as they
+  are, as Word does when pasting with destination styles;
+- lists get new numbering definitions, and numIds are rewritten to them;
+- relationship ids (r:embed, r:id, r:link, ...) are remapped: hyperlinks
+  become new external relationships, images are added once per distinct
+  image, and other related parts (charts, embedded objects, headers of
+  inner sections) are carried over under unique part names;
+- drawing and bookmark ids are renumbered so they stay unique.
+
+Comment, footnote and endnote markers of appended sources are dropped, as
+their content lives in parts that are not merged.
+
+Sources are parsed in a small thread pool ahead of the one being appended,
+and each source is released once appended, so at most PARSE_AHEAD + 1
+sources are in memory besides the merged document.
+"""
+import copy
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, Iterable, Optional, Set
+
+from lxml import etree
+from docx import Document
+from docx.document import Document as DocumentType
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, nsmap, qn
+from docx.parts.numbering import NumberingPart
+
+# Sources parsed ahead of the one being appended
+PARSE_AHEAD = 2
+
+_NS = dict(nsmap)
+_W_VAL = qn('w:val')
+_W_ID = qn('w:id')
+_W_NUM_ID = qn('w:numId')
+_W_ABSTRACT_NUM_ID = qn('w:abstractNumId')
+_W_STYLE_ID = qn('w:styleId')
+_W_SECT_PR = qn('w:sectPr')
+_W_NUM = qn('w:num')
+_W_ABSTRACT_NUM = qn('w:abstractNum')
+
+_STYLE_REFS = etree.XPath(
+    './/w:pStyle/@w:val | .//w:rStyle/@w:val | .//w:tblStyle/@w:val | .//w:basedOn/@w:val'
+    ' | .//w:next/@w:val | .//w:link/@w:val | .//w:numStyleLink/@w:val | .//w:styleLink/@w:val',
+    namespaces=_NS)
+_NUM_REFS = etree.XPath('.//w:numPr/w:numId', namespaces=_NS)
+_REL_REFS = etree.XPath('.//@*[namespace-uri()="%s"]' % nsmap['r'])
+_DRAWING_IDS = etree.XPath('.//wp:docPr', namespaces=_NS)
+_BOOKMARKS = etree.XPath('.//w:bookmarkStart | .//w:bookmarkEnd', namespaces=_NS)
+_UNMERGED_MARKERS = etree.XPath(
+    './/w:commentRangeStart | .//w:commentRangeEnd | .//w:commentReference'
+    ' | .//w:footnoteReference | .//w:endnoteReference', namespaces=_NS)
+_PART_NUMBER = re.compile(r'\d*(\.\w+)$')
+
+
+def _max_int(values: Iterable[str]) -> int:
+    return max((int(v) for v in values if v.lstrip('-').isdigit()), default=0)
+
+
+def _numbering(part, create: bool = False):
+    """
+    Return the numbering element of a document part, or None if it has none.
+
+    With create, a numbering part is added when missing; python-docx's
+    NumberingPart.new() is not implemented, so numbering_part cannot do it.
+    """
+    try:
+        return part.part_related_by(RT.NUMBERING).element
+    except KeyError:
+        if not create:
+            return None
+    numbering_part = NumberingPart(PackURI('/word/numbering.xml'), CT.WML_NUMBERING,
+                                   parse_xml('<w:numbering %s/>' % nsdecls('w')), part.package)
+    part.relate_to(numbering_part, RT.NUMBERING)
+    return numbering_part.element
+
+
+class DocumentMerger:
+    """Appends the bodies of source documents to a target document."""
+
+    def __init__(self, target: DocumentType):
+        self.target = target
+        self._body = target.element.body
+        self._sect_pr = self._body.find(_W_SECT_PR)
+        self._target_styles = target.styles.element
+        self._style_ids: Set[str] = {s.get(_W_STYLE_ID) for s in self._target_styles.iterchildren(qn('w:style'))}
+        self._next_drawing_id = _max_int(d.get('id') for d in _DRAWING_IDS(self._body)) + 1
+        self._next_bookmark_id = _max_int(b.get(_W_ID) for b in _BOOKMARKS(self._body)) + 1
+
+    def append(self, source: DocumentType, page_break: bool = False) -> None:
+        """Append the body of source, optionally after a page break."""
+        if page_break:
+            self._insert(parse_xml('<w:p %s><w:r><w:br w:type="page"/></w:r></w:p>' % nsdecls('w')))
+        importer = _SourceImporter(self, source)
+        for child in source.element.body.iterchildren():
+            if child.tag == _W_SECT_PR or not isinstance(child.tag, str):
+                continue
+            element = copy.deepcopy(child)
+            importer.import_element(element)
+            self._insert(element)
+
+    def _insert(self, element) -> None:
+        if self._sect_pr is not None:
+            self._sect_pr.addprevious(element)
+        else:
+            self._body.append(element)
+
+
+class _SourceImporter:
+    """Remaps the references of elements copied from one source into the target."""
+
+    def __init__(self, merger: DocumentMerger, source: DocumentType):
+        self.merger = merger
+        self.source = source
+        self._styles_done: Set[str] = set()
+        self._num_map: Dict[str, str] = {}
+        self._abstract_map: Dict[str, str] = {}
+        self._rel_map: Dict[str, Optional[str]] = {}
+        self._bookmark_map: Dict[str, str] = {}
+        self._source_styles = None
+
+    def import_element(self, element, body: bool = True) -> None:
+        """Rewrite the references of a copied element for the target, in place."""
+        for style_id in _STYLE_REFS(element):
+            self._import_style(str(style_id))
+        for num_id in _NUM_REFS(element):
+            num_id.set(_W_VAL, self._import_num(num_id.get(_W_VAL)))
+        for attr in _REL_REFS(element):
+            new_rid = self._import_rel(str(attr))
+            if new_rid is not None:
+                attr.getparent().set(attr.attrname, new_rid)
+        if not body:
+            return
+        for marker in _UNMERGED_MARKERS(element):
+            marker.getparent().remove(marker)
+        for doc_pr in _DRAWING_IDS(element):
+            doc_pr.set('id', str(self.merger._next_drawing_id))
+            self.merger._next_drawing_id += 1
+        for bookmark in _BOOKMARKS(element):
+            old_id = bookmark.get(_W_ID)
+            if old_id not in self._bookmark_map:
+                self._bookmark_map[old_id] = str(self.merger._next_bookmark_id)
+                self.merger._next_bookmark_id += 1
+            bookmark.set(_W_ID, self._bookmark_map[old_id])
+
+    def _import_style(self, style_id: str) -> None:
+        if style_id in self._styles_done or style_id in self.merger._style_ids:
+            return
+        self._styles_done.add(style_id)
+        if self._source_styles is None:
+            self._source_styles = {s.get(_W_STYLE_ID): s for s in
+                                   self.source.styles.element.iterchildren(qn('w:style'))}
+        style = self._source_styles.get(style_id)
+        if style is None:
+            return
+        style = copy.deepcopy(style)
+        # Styles it is based on or links to are copied first
+        self.import_element(style, body=False)
+        self.merger._target_styles.append(style)
+        self.merger._style_ids.add(style_id)
+
+    def _import_num(self, num_id: str) -> str:
+        if num_id == '0':
+            return num_id
+        if num_id in self._num_map:
+            return self._num_map[num_id]
+        source_numbering = _numbering(self.source.part)
+        nums = source_numbering.xpath('w:num[@w:numId="%s"]' % num_id) if source_numbering is not None else []
+        if not nums:
+            # Dangling references are kept as they are
+            return num_id
+        target_numbering = _numbering(self.merger.target.part, create=True)
+        num = copy.deepcopy(nums[0])
+        abstract_ref = num.find(_W_ABSTRACT_NUM_ID)
+        if abstract_ref is not None:
+            abstract_ref.set(_W_VAL, self._import_abstract_num(abstract_ref.get(_W_VAL), source_numbering,
+                                                                target_numbering))
+        new_id = str(_max_int(n.get(_W_NUM_ID) for n in target_numbering.iterchildren(_W_NUM)) + 1)
+        num.set(_W_NUM_ID, new_id)
+        target_numbering.append(num)
+        self._num_map[num_id] = new_id
+        return new_id
+
+    def _import_abstract_num(self, abstract_id: str, source_numbering, target_numbering) -> str:
+        if abstract_id in self._abstract_map:
+            return self._abstract_map[abstract_id]
+        abstracts = source_numbering.xpath(
+            'w:abstractNum[@w:abstractNumId="%s"]' % abstract_id)
+        if not abstracts:
+            return abstract_id
+        abstract = copy.deepcopy(abstracts[0])
+        new_id = str(_max_int(a.get(_W_ABSTRACT_NUM_ID)
+                              for a in target_numbering.iterchildren(_W_ABSTRACT_NUM)) + 1)
+        abstract.set(_W_ABSTRACT_NUM_ID, new_id)
+        self.import_element(abstract, body=False)
+        # abstractNum definitions come before all num elements
+        first_num = target_numbering.find(_W_NUM)
+        if first_num is not None:
+            first_num.addprevious(abstract)
+        else:
+            target_numbering.append(abstract)
+        self._abstract_map[abstract_id] = new_id
+        return new_id
+
+    def _import_rel(self, rid: str) -> Optional[str]:
+        if rid in self._rel_map:
+            return self._rel_map[rid]
+        rel = self.source.part.rels.get(rid)
+        new_rid = None
+        if rel is not None:
+            target_part = self.merger.target.part
+            if rel.is_external:
+                new_rid = target_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+            elif rel.reltype == RT.IMAGE:
+                try:
+                    new_rid, _ = target_part.get_or_add_image(BytesIO(rel.target_part.blob))
+                except Exception:
+                    # Image formats python-docx cannot read are carried over as parts
+                    new_rid = self._relate_part(rel)
+            else:
+                new_rid = self._relate_part(rel)
+        self._rel_map[rid] = new_rid
+        return new_rid
+
+    def _relate_part(self, rel) -> str:
+        """Relate a source part (and the parts it relates to) to the target under unused part names."""
+        target_part = self.merger.target.part
+        used = {str(p.partname) for p in target_part.package.iter_parts()}
+        seen = set()
+        pending = [rel.target_part]
+        while pending:
+            part = pending.pop()
+            if id(part) in seen:
+                continue
+            seen.add(id(part))
+            name = str(part.partname)
+            if name in used:
+                template = _PART_NUMBER.sub(r'%d\1', name)
+                number = 1
+                while template % number in used:
+                    number += 1
+                name = template % number
+                part.partname = PackURI(name)
+            used.add(name)
+            pending.extend(r.target_part for r in part.rels.values() if not r.is_external)
+        return target_part.relate_to(rel.target_part, rel.reltype)
+
+
+def merge_docx_files(target_path: str, source_paths: Iterable[str], add_page_breaks: bool = True,
+                     parse_ahead: int = PARSE_AHEAD) -> None:
+    """
+    Merge documents into target_path.
+
+    The first source is the base document; the bodies of the others are
+    appended in order. Sources are parsed in parallel, at most parse_ahead
+    ahead of the one being appended.
+    """
+    paths = iter(source_paths)
+    with ThreadPoolExecutor(max_workers=max(1, parse_ahead)) as pool:
+        pending = deque()
+
+        def submit() -> None:
+            path = next(paths, None)
+            if path is not None:
+                pending.append(pool.submit(Document, path))
+
+        submit()
+        if not pending:
+            Document().save(target_path)
+            return
+        target = pending.popleft().result()
+        for _ in range(max(1, parse_ahead)):
+            submit()
+        merger = DocumentMerger(target)
+        while pending:
+            source = pending.popleft().result()
+            submit()
+            merger.append(source, page_break=add_page_breaks)
+            del source
+    target.save(target_path)
@@ -11,13 +11,22 @@ from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from dotenv import load_dotenv
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 
-from word_document_server.tools.document_tools import temp_files as document_tools_temp_files
-# Load environment variables from .env file
+# Load environment variables from .env file. This comes before the package
+# imports below: the document store is configured from MCP_STORE_* when
+# document_tools is imported.
 print("Loading configuration from .env file...")
 load_dotenv()
 
+from word_document_server.tools.document_tools import temp_files as document_tools_temp_files
+from word_document_server.utils.read_cache import get_read_cache
+from word_document_server.utils.download import download_response
+from word_document_server.utils.executor import document_key, get_worker_pool
+from word_document_server.utils.office_pool import office_pool_stats
+from word_document_server.utils.pdf_cache import pdf_cache_stats
+from word_document_server.utils.template_cache import template_cache_stats
+
 # Set required environment variable for FastMCP 2.8.1+
 os.environ.setdefault('FASTMCP_LOG_LEVEL', 'INFO')
 
@@ -88,6 +97,7 @@ def register_tools():
     """Register all tools with the MCP server using FastMCP decorators."""
     # Import tools here to avoid circular imports
     from word_document_server.tools import (
+        batch_tools,
         comment_tools,
         content_tools,
         document_tools,
@@ -138,9 +148,10 @@ def register_tools():
         return document_tools.copy_document(source_filename, destination_filename)
     
     @mcp.tool()
-    def get_document_info(filename: str):
-        """Get information about a Word document."""
-        return document_tools.get_document_info(filename)
+    def get_document_info(filename: str, exact: bool = False):
+        """Get information about a Word document. Counts come from the statistics stored
+        in the file (fast); set exact=True to count them from the document body."""
+        return document_tools.get_document_info(filename, exact)
     
     @mcp.tool()
     def get_document_text(filename: str):
@@ -148,9 +159,11 @@ def register_tools():
         return document_tools.get_document_text(filename)
     
     @mcp.tool()
-    def get_document_outline(filename: str):
-        """Get the structure of a Word document."""
-        return document_tools.get_document_outline(filename)
+    def get_document_outline(filename: str, headings_only: bool = False, start: int = 0,
+                             limit: int = None, styles: list = None, compact: bool = False):
+        """Get the structure of a Word document. For large documents use headings_only,
+        a styles filter, start/limit paging (continue from next_start) and compact JSON."""
+        return document_tools.get_document_outline(filename, headings_only, start, limit, styles, compact)
     
     @mcp.tool()
     def list_available_documents(directory: str = "."):
@@ -182,7 +195,8 @@ def register_tools():
     @mcp.tool()
     def add_paragraph(filename: str, text: str, style: str = None,
                       font_name: str = None, font_size: int = None,
-                      bold: bool = None, italic: bool = None, color: str = None):
+                      bold: bool = None, italic: bool = None, color: str = None,
+                      expected_version: int = None):
         """Add a paragraph to a Word document with optional formatting.
 
         Args:
@@ -194,13 +208,16 @@ def register_tools():
             bold: Make text bold
             italic: Make text italic
             color: Text color as hex RGB (e.g., '000000')
+            expected_version: Only edit if the document is still at this version
         """
-        return content_tools.add_paragraph(filename, text, style, font_name, font_size, bold, italic, color)
+        return content_tools.add_paragraph(filename, text, style, font_name, font_size, bold, italic, color,
+                                           expected_version)
     
     @mcp.tool()
     def add_heading(filename: str, text: str, level: int = 1,
                     font_name: str = None, font_size: int = None,
-                    bold: bool = None, italic: bool = None, border_bottom: bool = False):
+                    bold: bool = None, italic: bool = None, border_bottom: bool = False,
+                    expected_version: int = None):
         """Add a heading to a Word document with optional formatting.
 
         Args:
@@ -212,8 +229,10 @@ def register_tools():
             bold: Make heading bold
             italic: Make heading italic
             border_bottom: Add bottom border (for section headers)
+            expected_version: Only edit if the document is still at this version
         """
-        return content_tools.add_heading(filename, text, level, font_name, font_size, bold, italic, border_bottom)
+        return content_tools.add_heading(filename, text, level, font_name, font_size, bold, italic, border_bottom,
+                                         expected_version)
     
     @mcp.tool()
     def add_picture(filename: str, image_path: str, width: float = None):
@@ -221,33 +240,74 @@ def register_tools():
         return content_tools.add_picture(filename, image_path, width)
     
     @mcp.tool()
-    def add_table(filename: str, rows: int, cols: int, data: list = None):
+    def add_table(filename: str, rows: int, cols: int, data: list = None, expected_version: int = None):
         """Add a table to a Word document."""
-        return content_tools.add_table(filename, rows, cols, data)
+        return content_tools.add_table(filename, rows, cols, data, expected_version)
     
     @mcp.tool()
-    def add_page_break(filename: str):
+    def add_page_break(filename: str, expected_version: int = None):
         """Add a page break to the document."""
-        return content_tools.add_page_break(filename)
+        return content_tools.add_page_break(filename, expected_version)
     
     @mcp.tool()
-    def delete_paragraph(filename: str, paragraph_index: int):
+    def delete_paragraph(filename: str, paragraph_index: int, expected_version: int = None):
         """Delete a paragraph from a document."""
-        return content_tools.delete_paragraph(filename, paragraph_index)
+        return content_tools.delete_paragraph(filename, paragraph_index, expected_version)
     
     @mcp.tool()
-    def search_and_replace(file_id: str, find_text: str, replace_text: str):
+    def apply_operations(file_id: str, operations: list, expected_version: int = None):
+        """Apply many edit operations to an in-memory document in one load/save cycle.
+
+        Operations run in order and are all-or-nothing: if one fails, the document
+        is rolled back and no change is kept.
+
+        Args:
+            file_id: The ID of the in-memory document to modify
+            operations: List of dicts, each with an "op" key and that operation's
+                parameters, e.g. [{"op": "add_heading", "text": "Summary", "level": 2},
+                {"op": "add_paragraph", "text": "..."}]. Supported ops: add_heading,
+                add_paragraph, add_table, add_page_break, delete_paragraph,
+                search_and_replace, search_and_replace_many, format_text, set_table_cell_shading,
+                insert_header_near_text, insert_line_or_paragraph_near_text,
+                insert_numbered_list_near_text, replace_block_between_manual_anchors.
+            expected_version: Only apply if the document is still at this version
+
+        Returns:
+            dict: Overall success flag, a result per operation and the new version
+        """
+        return batch_tools.apply_operations(file_id, operations, expected_version)
+    
+    @mcp.tool()
+    def search_and_replace(file_id: str, find_text: str, replace_text: str, expected_version: int = None):
         """Search for text and replace all occurrences in an in-memory document.
         
         Args:
             file_id: The ID of the in-memory document to modify
             find_text: Text to search for
             replace_text: Text to replace with
+            expected_version: Only edit if the document is still at this version
             
         Returns:
             str: Status message indicating success or failure
         """
-        return content_tools.search_and_replace(file_id, find_text, replace_text)
+        return content_tools.search_and_replace(file_id, find_text, replace_text, expected_version)
+
+    @mcp.tool()
+    def search_and_replace_many(file_id: str, replacements: dict, regex: bool = False, expected_version: int = None):
+        """Replace many patterns in an in-memory document in one pass, e.g. filling all
+        template placeholders at once. Text that Word split across runs is matched too,
+        and the formatting of the run where a match starts is kept.
+
+        Args:
+            file_id: The ID of the in-memory document to modify
+            replacements: Mapping of text to find to its replacement, e.g. {"{{name}}": "Ada"}
+            regex: Treat the keys as regular expressions (replacements may use \\1 or \\g<name>)
+            expected_version: Only edit if the document is still at this version
+
+        Returns:
+            str: Status message with the number of replacements
+        """
+        return content_tools.search_and_replace_many(file_id, replacements, regex, expected_version)
     
     # Format tools (styling, text formatting, etc.)
     @mcp.tool()
@@ -400,6 +460,12 @@ def register_tools():
             validate_location, auto_repair
         )
     
+    @mcp.tool()
+    def add_footnotes_batch(filename: str, footnotes: list, validate_location: bool = True):
+        """Add many footnotes with a single parse and a single document rewrite.
+        Each item: {"footnote_text": ..., "search_text": ... or "paragraph_index": ..., "position": "after"|"before"}."""
+        return footnote_tools.add_footnotes_batch_tool(filename, footnotes, validate_location)
+    
     @mcp.tool()
     def validate_document_footnotes(filename: str):
         """Validate all footnotes in document for coherence and compliance.
@@ -423,26 +489,48 @@ def register_tools():
     
     @mcp.tool()
     def find_text_in_document(filename: str, text_to_find: str, match_case: bool = True,
-                             whole_word: bool = False):
-        """Find occurrences of specific text in a Word document."""
+                             whole_word: bool = False, limit: int = 100, offset: int = 0):
+        """Find occurrences of specific text in a Word document. Returns at most limit
+        occurrences starting at offset, with total_count and has_more for paging."""
         return extended_document_tools.find_text_in_document(
-            filename, text_to_find, match_case, whole_word
+            filename, text_to_find, match_case, whole_word, limit, offset
         )
     
     @mcp.tool()
     def convert_to_pdf(filename: str, output_filename: str = None):
-        """Convert a Word document to PDF format."""
+        """Convert a Word document (path or in-memory file_id) to PDF format. Converting an
+        unchanged document again is served from a cache."""
         return extended_document_tools.convert_to_pdf(filename, output_filename)
 
+    @mcp.tool()
+    async def convert_many_to_pdf(filenames: list, output_dir: str = None, ctx: Context = None):
+        """Convert many Word documents (paths or in-memory file_ids) to PDF in parallel.
+
+        Args:
+            filenames: List of document paths and/or file_ids
+            output_dir: Directory for the PDFs; by default each PDF is written next to its document
+
+        Returns:
+            dict: Counts and a result per document (output path or error). Progress is
+            reported per document while the conversion runs.
+        """
+        async def report(done, total, result):
+            if ctx is not None:
+                status = "converted" if result["success"] else result["error"]
+                await ctx.report_progress(done, total, f"{result['filename']}: {status}")
+
+        return await extended_document_tools.convert_many_to_pdf(filenames, output_dir, report)
+
     @mcp.tool()
     def replace_paragraph_block_below_header(filename: str, header_text: str, new_paragraphs: list, detect_block_end_fn=None):
         """Reemplaza el bloque de párrafos debajo de un encabezado, evitando modificar TOC."""
         return replace_paragraph_block_below_header_tool(filename, header_text, new_paragraphs, detect_block_end_fn)
 
     @mcp.tool()
-    def replace_block_between_manual_anchors(filename: str, start_anchor_text: str, new_paragraphs: list, end_anchor_text: str = None, match_fn=None, new_paragraph_style: str = None):
-        """Replace all content between start_anchor_text and end_anchor_text (or next logical header if not provided)."""
-        return replace_block_between_manual_anchors_tool(filename, start_anchor_text, new_paragraphs, end_anchor_text, match_fn, new_paragraph_style)
+    def replace_block_between_manual_anchors(filename: str, start_anchor_text: str, new_paragraphs: list, end_anchor_text: str = None, match_fn=None, new_paragraph_style: str = None, expected_version: int = None):
+        """Replace all content between start_anchor_text and end_anchor_text (or next logical header if not provided).
+        filename may be an in-memory document ID (from create_temp/load_template) or a path."""
+        return replace_block_between_manual_anchors_tool(filename, start_anchor_text, new_paragraphs, end_anchor_text, match_fn, new_paragraph_style, expected_version)
 
     # Comment tools
     @mcp.tool()
@@ -502,9 +590,16 @@ def register_tools():
                                                    top, bottom, left, right, unit)
         
     @mcp.tool()
-    async def load_template() -> dict:
-        """Load an example document from a pre-signed URL."""
-        return await document_tools.load_template()
+    async def load_template(template_name: str = None) -> dict:
+        """Create an in-memory document from a template stored in S3.
+        template_name selects a template configured in MCP_TEMPLATES; the default template is used if omitted."""
+        return await document_tools.load_template(template_name)
+
+    @mcp.tool()
+    def get_document_version(file_id: str):
+        """Get the current version of an in-memory document. Pass it as expected_version
+        to an edit tool to have the edit rejected if the document changed in the meantime."""
+        return document_tools.get_document_version(file_id)
 
     @mcp.tool()
     async def upload_get_url(file_id: str, filename: str = None, expires: int = 600) -> str:
@@ -563,6 +658,18 @@ def run_server():
             @download_app.get("/healthz")
             async def health_check():
                 return {"status": "healthy"}
+
+            # Expose document store, cache and worker pool usage for capacity planning
+            @download_app.get("/mcp/stats")
+            async def store_stats():
+                return {
+                    **document_tools_temp_files.stats(),
+                    "read_cache": get_read_cache().stats(),
+                    "workers": get_worker_pool().stats(),
+                    "office": office_pool_stats(),
+                    "pdf_cache": pdf_cache_stats(),
+                    "templates": template_cache_stats(),
+                }
                 
             # Handle 404s to prevent warnings
             @download_app.middleware("http")
@@ -574,19 +681,19 @@ def run_server():
             
             # Add the download endpoint
             @download_app.get("/mcp/download/{file_id}")
-            async def download(file_id: str):
-                file_entry = document_tools_temp_files.get(file_id)
-                if not file_entry:
+            async def download(file_id: str, request: Request):
+                if file_id not in document_tools_temp_files:
                     return Response("File not found or expired", status_code=404)
 
-                filename = file_entry["filename"]
-                file_bytes = file_entry["bytes"]
+                try:
+                    # Serializing or hashing a large document blocks, keep it off this loop;
+                    # the document lock keeps it from serializing an edit in progress
+                    source = await get_worker_pool().run(document_tools_temp_files.download_source, file_id,
+                                                         key=document_key(file_id))
+                except KeyError:
+                    return Response("File not found or expired", status_code=404)
 
-                return Response(
-                    content=file_bytes,
-                    media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    headers={"Content-Disposition": f'attachment; filename="{filename}"'}
-                )
+                return download_response(source, request.headers)
             
             # Use a different port for the download server
             download_port = config['port'] + 1
@@ -18,6 +18,7 @@ __all__ = [
     'merge_documents',
     'load_template',
     'upload_get_url',
+    'get_document_version',
     # Content tools
     'add_heading',
     'add_paragraph',
@@ -27,8 +28,12 @@ __all__ = [
     'add_table_of_contents',
     'delete_paragraph',
     'search_and_replace',
+    'search_and_replace_many',
     'add_paragraph_temp',
     
+    # Batch tools
+    'apply_operations',
+    
     # Format tools
     'format_text',
     'create_custom_style',
@@ -56,16 +61,20 @@ __all__ = [
 from word_document_server.tools.document_tools import (
     create_document, create_temp, get_document_info, get_document_text, 
     get_document_outline, list_available_documents, 
-    copy_document, merge_documents, load_template, upload_get_url
+    copy_document, merge_documents, load_template, upload_get_url,
+    get_document_version
 )
 
 # Content tools
 from word_document_server.tools.content_tools import (
     add_heading, add_paragraph, add_table, add_picture,
     add_page_break, add_table_of_contents, delete_paragraph,
-    search_and_replace
+    search_and_replace, search_and_replace_many
 )
 
+# Batch tools
+from word_document_server.tools.batch_tools import apply_operations
+
 # Format tools
 from word_document_server.tools.format_tools import (
     format_text, create_custom_style, format_table
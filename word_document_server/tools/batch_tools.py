@@ -0,0 +1,178 @@
+"""
+Batch editing tools for Word Document Server.
+
+These tools apply a list of edit operations to an in-memory document in a
+single load/save cycle and a single MCP round trip.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from word_document_server.tools.document_tools import temp_files, version_conflict
+from word_document_server.utils.document_store import missing_document
+from word_document_server.utils.executor import offload
+from word_document_server.core.content import (
+    add_heading_to_document, add_paragraph_to_document, add_table_to_document,
+    delete_paragraph_from_document, format_text_range, get_table_cell
+)
+from word_document_server.core.tables import set_cell_shading
+from word_document_server.utils.document_utils import (
+    find_and_replace_text, insert_header_in_document,
+    insert_line_or_paragraph_in_document, insert_numbered_list_in_document,
+    replace_block_between_manual_anchors_in_document
+)
+from word_document_server.utils.text_replace import replace_text_many
+
+
+def _add_heading(doc, text: str, level: int = 1, font_name: str = None, font_size: int = None,
+                 bold: bool = None, italic: bool = None, border_bottom: bool = False) -> str:
+    add_heading_to_document(doc, text, level, font_name, font_size, bold, italic, border_bottom)
+    return f"Heading '{text}' (level {level}) added"
+
+
+def _add_paragraph(doc, text: str, style: str = None, font_name: str = None, font_size: int = None,
+                   bold: bool = None, italic: bool = None, color: str = None) -> str:
+    _, style_found = add_paragraph_to_document(doc, text, style, font_name, font_size, bold, italic, color)
+    if not style_found:
+        return f"Style '{style}' not found, paragraph added with default style"
+    return "Paragraph added"
+
+
+def _add_table(doc, rows: int, cols: int, data: List[List[str]] = None) -> str:
+    rows, cols = int(rows), int(cols)
+    add_table_to_document(doc, rows, cols, data)
+    return f"Table ({rows}x{cols}) added"
+
+
+def _add_page_break(doc) -> str:
+    doc.add_page_break()
+    return "Page break added"
+
+
+def _delete_paragraph(doc, paragraph_index: int) -> str:
+    delete_paragraph_from_document(doc, int(paragraph_index))
+    return f"Paragraph at index {paragraph_index} deleted"
+
+
+def _search_and_replace(doc, find_text: str, replace_text: str) -> str:
+    count = find_and_replace_text(doc, find_text, replace_text)
+    if count > 0:
+        return f"Replaced {count} occurrence(s) of '{find_text}' with '{replace_text}'"
+    return f"No occurrences of '{find_text}' found"
+
+
+def _search_and_replace_many(doc, replacements: Dict[str, str], regex: bool = False) -> str:
+    counts = replace_text_many(doc, replacements, bool(regex))
+    total = sum(counts.values())
+    if total > 0:
+        return f"Replaced {total} occurrence(s) of {sum(1 for c in counts.values() if c)} pattern(s)"
+    return "No occurrences of any pattern found"
+
+
+def _format_text(doc, paragraph_index: int, start_pos: int, end_pos: int,
+                 bold: bool = None, italic: bool = None, underline: bool = None,
+                 color: str = None, font_size: int = None, font_name: str = None) -> str:
+    target_text = format_text_range(doc, int(paragraph_index), int(start_pos), int(end_pos),
+                                    bold, italic, underline, color,
+                                    int(font_size) if font_size is not None else None, font_name)
+    return f"Text '{target_text}' formatted in paragraph {paragraph_index}"
+
+
+def _set_table_cell_shading(doc, table_index: int, row_index: int, col_index: int,
+                            fill_color: str, pattern: str = "clear") -> str:
+    cell = get_table_cell(doc, int(table_index), int(row_index), int(col_index))
+    if not set_cell_shading(cell, fill_color=fill_color, pattern=pattern):
+        raise ValueError("Failed to apply cell shading.")
+    return f"Cell shading applied to table {table_index}, row {row_index}, column {col_index}"
+
+
+# Supported operation names mapped to handlers taking (doc, **params)
+OPERATIONS: Dict[str, Callable[..., str]] = {
+    "add_heading": _add_heading,
+    "add_paragraph": _add_paragraph,
+    "add_table": _add_table,
+    "add_page_break": _add_page_break,
+    "delete_paragraph": _delete_paragraph,
+    "search_and_replace": _search_and_replace,
+    "search_and_replace_many": _search_and_replace_many,
+    "format_text": _format_text,
+    "set_table_cell_shading": _set_table_cell_shading,
+    "insert_header_near_text": insert_header_in_document,
+    "insert_line_or_paragraph_near_text": insert_line_or_paragraph_in_document,
+    "insert_numbered_list_near_text": insert_numbered_list_in_document,
+    "replace_block_between_manual_anchors": replace_block_between_manual_anchors_in_document,
+}
+
+
+@offload(key="file_id")
+async def apply_operations(file_id: str, operations: List[Dict[str, Any]],
+                           expected_version: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Apply an ordered list of edit operations to an in-memory document.
+
+    The document is loaded once, every operation is applied to it in order and
+    the result is kept as a single edit. If any operation fails, the document is
+    rolled back to its state before the call and no change is kept.
+
+    Args:
+        file_id: ID of the in-memory document
+        operations: List of operations, each a dict with an "op" key naming the
+            operation and the remaining keys as its parameters, e.g.
+            {"op": "add_heading", "text": "Summary", "level": 2}.
+            Supported ops: add_heading, add_paragraph, add_table, add_page_break,
+            delete_paragraph, search_and_replace, search_and_replace_many,
+            format_text, set_table_cell_shading, insert_header_near_text,
+            insert_line_or_paragraph_near_text, insert_numbered_list_near_text,
+            replace_block_between_manual_anchors.
+        expected_version: Only apply the operations if the document is still at
+            this version (see get_document_version)
+
+    Returns:
+        Dict with success status, a result entry per executed operation and
+        the document's version afterwards
+    """
+    if file_id not in temp_files:
+        return {"success": False, "error": missing_document(file_id), "results": []}
+
+    if not isinstance(operations, list) or not operations:
+        return {"success": False, "error": "operations must be a non-empty list", "results": []}
+
+    conflict = version_conflict(file_id, expected_version)
+    if conflict:
+        return {"success": False, "error": conflict, "results": [], "version": temp_files.version(file_id)}
+
+    try:
+        # Snapshot for rollback; free unless there are edits not yet serialized
+        snapshot = temp_files.get_bytes(file_id)
+        snapshot_version = temp_files.version(file_id)
+        doc = temp_files.open(file_id)
+    except Exception as e:
+        return {"success": False, "error": f"Failed to load document: {str(e)}", "results": []}
+
+    results = []
+    for index, operation in enumerate(operations):
+        params = dict(operation) if isinstance(operation, dict) else {}
+        op_name = params.pop("op", None)
+        try:
+            handler = OPERATIONS.get(op_name)
+            if handler is None:
+                raise ValueError(f"Unknown operation '{op_name}'. Supported operations: {', '.join(OPERATIONS)}")
+            try:
+                message = handler(doc, **params)
+            except TypeError as e:
+                raise ValueError(f"Invalid parameters for '{op_name}': {str(e)}")
+        except Exception as e:
+            temp_files.revert(file_id, snapshot, version=snapshot_version)
+            results.append({"index": index, "op": op_name, "success": False, "message": str(e)})
+            return {
+                "success": False,
+                "error": f"Operation {index} ({op_name}) failed; all {len(operations)} operations were rolled back",
+                "results": results
+            }
+        results.append({"index": index, "op": op_name, "success": True, "message": message})
+
+    version = temp_files.mark_dirty(file_id)
+    return {
+        "success": True,
+        "message": f"Applied {len(results)} operation(s) to {temp_files.filename(file_id)}",
+        "results": results,
+        "version": version
+    }
@@ -7,16 +7,19 @@ comments from Word documents through the MCP protocol.
 import os
 import json
 from typing import Dict, List, Optional, Any
-from docx import Document
 
 from word_document_server.utils.file_utils import ensure_docx_extension
-from word_document_server.core.comments import (
-    extract_all_comments,
-    filter_comments_by_author,
-    get_comments_for_paragraph
-)
+from word_document_server.utils.executor import offload
+from word_document_server.utils.read_cache import get_read_cache
+from word_document_server.core.comments import CommentIndex
 
 
+def _comment_index(filename: str) -> CommentIndex:
+    """Return the comment index of a file, built once per file state and kept in the read cache."""
+    return get_read_cache().get_or_compute(filename, "comment_index", (), lambda: CommentIndex.from_docx(filename))
+
+
+@offload(key="filename")
 async def get_all_comments(filename: str) -> str:
     """
     Extract all comments from a Word document.
@@ -36,18 +39,15 @@ async def get_all_comments(filename: str) -> str:
         }, indent=2)
     
     try:
-        # Load the document
-        doc = Document(filename)
-        
-        # Extract all comments
-        comments = extract_all_comments(doc)
+        def load():
+            comments = _comment_index(filename).comments
+            return json.dumps({
+                'success': True,
+                'comments': comments,
+                'total_comments': len(comments)
+            }, indent=2)
         
-        # Return results
-        return json.dumps({
-            'success': True,
-            'comments': comments,
-            'total_comments': len(comments)
-        }, indent=2)
+        return get_read_cache().get_or_compute(filename, "get_all_comments", (), load)
         
     except Exception as e:
         return json.dumps({
@@ -56,6 +56,7 @@ async def get_all_comments(filename: str) -> str:
         }, indent=2)
 
 
+@offload(key="filename")
 async def get_comments_by_author(filename: str, author: str) -> str:
     """
     Extract comments from a specific author in a Word document.
@@ -82,14 +83,7 @@ async def get_comments_by_author(filename: str, author: str) -> str:
         }, indent=2)
     
     try:
-        # Load the document
-        doc = Document(filename)
-        
-        # Extract all comments
-        all_comments = extract_all_comments(doc)
-        
-        # Filter by author
-        author_comments = filter_comments_by_author(all_comments, author)
+        author_comments = _comment_index(filename).by_author(author)
         
         # Return results
         return json.dumps({
@@ -106,6 +100,7 @@ async def get_comments_by_author(filename: str, author: str) -> str:
         }, indent=2)
 
 
+@offload(key="filename")
 async def get_comments_for_paragraph(filename: str, paragraph_index: int) -> str:
     """
     Extract comments for a specific paragraph in a Word document.
@@ -132,25 +127,20 @@ async def get_comments_for_paragraph(filename: str, paragraph_index: int) -> str
         }, indent=2)
     
     try:
-        # Load the document
-        doc = Document(filename)
+        index = _comment_index(filename)
         
         # Check if paragraph index is valid
-        if paragraph_index >= len(doc.paragraphs):
+        paragraph_count = len(index.paragraph_texts)
+        if paragraph_index >= paragraph_count:
             return json.dumps({
                 'success': False,
-                'error': f'Paragraph index {paragraph_index} is out of range. Document has {len(doc.paragraphs)} paragraphs.'
+                'error': f'Paragraph index {paragraph_index} is out of range. Document has {paragraph_count} paragraphs.'
             }, indent=2)
         
-        # Extract all comments
-        all_comments = extract_all_comments(doc)
-        
-        # Filter for the specific paragraph
-        from word_document_server.core.comments import get_comments_for_paragraph as core_get_comments_for_paragraph
-        para_comments = core_get_comments_for_paragraph(all_comments, paragraph_index)
+        para_comments = index.for_paragraph(paragraph_index)
         
         # Get the paragraph text for context
-        paragraph_text = doc.paragraphs[paragraph_index].text
+        paragraph_text = index.paragraph_texts[paragraph_index]
         
         # Return results
         return json.dumps({
@@ -8,19 +8,23 @@ import os
 from typing import List, Optional, Dict, Any
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
-from io import BytesIO
-from word_document_server.tools.document_tools import temp_files
+from word_document_server.tools.document_tools import temp_files, version_conflict
+from word_document_server.utils.document_store import missing_document
 
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
-from word_document_server.utils.document_utils import find_and_replace_text, insert_header_near_text, insert_numbered_list_near_text, insert_line_or_paragraph_near_text, replace_paragraph_block_below_header, replace_block_between_manual_anchors
+from word_document_server.utils.executor import offload
+from word_document_server.utils.text_replace import replace_text_many
+from word_document_server.utils.document_utils import find_and_replace_text, insert_header_near_text, insert_numbered_list_near_text, insert_line_or_paragraph_near_text, replace_paragraph_block_below_header, replace_block_between_manual_anchors, replace_block_between_manual_anchors_in_document
 from word_document_server.core.styles import ensure_heading_style, ensure_table_style
+from word_document_server.core.content import add_heading_to_document, add_paragraph_to_document, add_table_to_document, delete_paragraph_from_document
 
 
+@offload(key="file_id")
 async def add_heading(file_id: str, text: str, level: int = 1,
                       font_name: Optional[str] = None, font_size: Optional[int] = None,
                       bold: Optional[bool] = None, italic: Optional[bool] = None,
-                      border_bottom: bool = False) -> str:
+                      border_bottom: bool = False, expected_version: Optional[int] = None) -> str:
     """Add a heading to a Word document with optional formatting.
 
     Args:
@@ -32,9 +36,14 @@ async def add_heading(file_id: str, text: str, level: int = 1,
         bold: True/False for bold text
         italic: True/False for italic text
         border_bottom: True to add bottom border (for section headers)
+        expected_version: Only edit if the document is still at this version (see get_document_version)
     """
     if file_id not in temp_files:
-        return f"No document found for ID {file_id}"
+        return missing_document(file_id)
+
+    conflict = version_conflict(file_id, expected_version)
+    if conflict:
+        return conflict
 
     # Ensure level is converted to integer
     try:
@@ -47,74 +56,23 @@ async def add_heading(file_id: str, text: str, level: int = 1,
         return f"Invalid heading level: {level}. Level must be between 1 and 9."
 
     try:
-        # Load document from memory
-        buffer = BytesIO(temp_files[file_id]["bytes"])
-        buffer.seek(0)
-        doc = Document(buffer)
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
 
-        # Ensure heading styles exist
-        ensure_heading_style(doc)
+        add_heading_to_document(doc, text, level, font_name, font_size, bold, italic, border_bottom)
 
-        # Try to add heading with style
-        try:
-            heading = doc.add_heading(text, level=level)
-        except Exception as style_error:
-            # If style-based approach fails, use direct formatting
-            heading = doc.add_paragraph(text)
-            heading.style = doc.styles['Normal']
-            if heading.runs:
-                run = heading.runs[0]
-                run.bold = True
-                # Adjust size based on heading level
-                if level == 1:
-                    run.font.size = Pt(16)
-                elif level == 2:
-                    run.font.size = Pt(14)
-                else:
-                    run.font.size = Pt(12)
-
-        # Apply formatting to all runs in the heading
-        if any([font_name, font_size, bold is not None, italic is not None]):
-            for run in heading.runs:
-                if font_name:
-                    run.font.name = font_name
-                if font_size:
-                    run.font.size = Pt(font_size)
-                if bold is not None:
-                    run.font.bold = bold
-                if italic is not None:
-                    run.font.italic = italic
-
-        # Add bottom border if requested
-        if border_bottom:
-            from docx.oxml import OxmlElement
-            from docx.oxml.ns import qn
-
-            pPr = heading._element.get_or_add_pPr()
-            pBdr = OxmlElement('w:pBdr')
-
-            bottom = OxmlElement('w:bottom')
-            bottom.set(qn('w:val'), 'single')
-            bottom.set(qn('w:sz'), '4')  # 0.5pt border
-            bottom.set(qn('w:space'), '0')
-            bottom.set(qn('w:color'), '000000')
-
-            pBdr.append(bottom)
-            pPr.append(pBdr)
-
-        new_buffer = BytesIO()
-        doc.save(new_buffer)
-        temp_files[file_id]["bytes"] = new_buffer.getvalue()
+        temp_files.mark_dirty(file_id)
         
-        return f"Heading '{text}' (level {level}) added to {temp_files[file_id]['filename']}"
+        return f"Heading '{text}' (level {level}) added to {temp_files.filename(file_id)}"
     except Exception as e:
         return f"Failed to add heading: {str(e)}"
 
 
+@offload(key="file_id")
 async def add_paragraph(file_id: str, text: str, style: Optional[str] = None,
                         font_name: Optional[str] = None, font_size: Optional[int] = None,
                         bold: Optional[bool] = None, italic: Optional[bool] = None,
-                        color: Optional[str] = None) -> str:
+                        color: Optional[str] = None, expected_version: Optional[int] = None) -> str:
     """Add a paragraph to a Word document with optional formatting.
 
     Args:
@@ -126,57 +84,34 @@ async def add_paragraph(file_id: str, text: str, style: Optional[str] = None,
         bold: True/False for bold text
         italic: True/False for italic text
         color: RGB color as hex string (e.g., '000000' for black)
+        expected_version: Only edit if the document is still at this version (see get_document_version)
     """
     if file_id not in temp_files:
-        return f"No document found for ID {file_id}"
+        return missing_document(file_id)
+
+    conflict = version_conflict(file_id, expected_version)
+    if conflict:
+        return conflict
 
     try:
-        # Load document from memory
-        buffer = BytesIO(temp_files[file_id]["bytes"])
-        buffer.seek(0)
-        doc = Document(buffer)
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
         
         # Add paragraph
-        paragraph = doc.add_paragraph(text)
+        paragraph, style_found = add_paragraph_to_document(doc, text, style, font_name, font_size, bold, italic, color)
+        temp_files.mark_dirty(file_id)
 
-        if style:
-            try:
-                paragraph.style = style
-            except KeyError:
-                # Style doesn't exist, use normal and report it
-                paragraph.style = doc.styles['Normal']
-                new_buffer = BytesIO()
-                doc.save(new_buffer)
-                temp_files[file_id]["bytes"] = new_buffer.getvalue()
-                
-                return f"Style '{style}' not found, paragraph added with default style to {temp_files[file_id]['filename']}"
-
-        # Apply formatting to all runs in the paragraph
-        if any([font_name, font_size, bold is not None, italic is not None, color]):
-            for run in paragraph.runs:
-                if font_name:
-                    run.font.name = font_name
-                if font_size:
-                    run.font.size = Pt(font_size)
-                if bold is not None:
-                    run.font.bold = bold
-                if italic is not None:
-                    run.font.italic = italic
-                if color:
-                    # Remove any '#' prefix if present
-                    color_hex = color.lstrip('#')
-                    run.font.color.rgb = RGBColor.from_string(color_hex)
-
-        new_buffer = BytesIO()
-        doc.save(new_buffer)
-        temp_files[file_id]["bytes"] = new_buffer.getvalue()
-
-        return f"Paragraph added to {temp_files[file_id]['filename']}"
+        if not style_found:
+            return f"Style '{style}' not found, paragraph added with default style to {temp_files.filename(file_id)}"
+
+        return f"Paragraph added to {temp_files.filename(file_id)}"
     except Exception as e:
         return f"Failed to add paragraph: {str(e)}"
 
 
-async def add_table(file_id: str, rows: int, cols: int, data: Optional[List[List[str]]] = None) -> str:
+@offload(key="file_id")
+async def add_table(file_id: str, rows: int, cols: int, data: Optional[List[List[str]]] = None,
+                    expected_version: Optional[int] = None) -> str:
     """Add a table to a Word document.
     
     Args:
@@ -184,44 +119,29 @@ async def add_table(file_id: str, rows: int, cols: int, data: Optional[List[List
         rows: Number of rows in the table
         cols: Number of columns in the table
         data: Optional 2D array of data to fill the table
+        expected_version: Only edit if the document is still at this version (see get_document_version)
     """
     if file_id not in temp_files:
-        return f"No document found for ID {file_id}"
+        return missing_document(file_id)
+
+    conflict = version_conflict(file_id, expected_version)
+    if conflict:
+        return conflict
     
     try:
-        # Load document from memory
-        buffer = BytesIO(temp_files[file_id]["bytes"])
-        buffer.seek(0)
-        doc = Document(buffer)
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
 
-        table = doc.add_table(rows=rows, cols=cols)
-        
-        # Try to set the table style
-        try:
-            table.style = 'Table Grid'
-        except KeyError:
-            # If style doesn't exist, add basic borders
-            pass
+        add_table_to_document(doc, rows, cols, data)
         
-        # Fill table with data if provided
-        if data:
-            for i, row_data in enumerate(data):
-                if i >= rows:
-                    break
-                for j, cell_text in enumerate(row_data):
-                    if j >= cols:
-                        break
-                    table.cell(i, j).text = str(cell_text)
-        
-        new_buffer = BytesIO()
-        doc.save(new_buffer)
-        temp_files[file_id]["bytes"] = new_buffer.getvalue()
+        temp_files.mark_dirty(file_id)
 
-        return f"Table ({rows}x{cols}) added to {temp_files[file_id]['filename']}"
+        return f"Table ({rows}x{cols}) added to {temp_files.filename(file_id)}"
     except Exception as e:
         return f"Failed to add table: {str(e)}"
 
 
+@offload(key="file_id")
 async def add_picture(file_id: str, image_path: str, width: Optional[float] = None) -> str:
     """Add an image to a Word document.
     
@@ -231,7 +151,7 @@ async def add_picture(file_id: str, image_path: str, width: Optional[float] = No
         width: Optional width in inches (proportional scaling)
     """
     if file_id not in temp_files:
-        return f"No document found for ID {file_id}"
+        return missing_document(file_id)
     
     try:
         image_size = os.path.getsize(abs_image_path) / 1024  # Size in KB
@@ -246,10 +166,8 @@ async def add_picture(file_id: str, image_path: str, width: Optional[float] = No
         return f"Cannot modify document: {error_message}. Consider creating a copy first or creating a new document."
     
     try:
-        # Load document from memory
-        buffer = BytesIO(temp_files[file_id]["bytes"])
-        buffer.seek(0)
-        doc = Document(buffer)
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
         # Additional diagnostic info
         diagnostic = f"Attempting to add image ({abs_image_path}, {image_size:.2f} KB) to document ({abs_filename})"
         
@@ -259,11 +177,9 @@ async def add_picture(file_id: str, image_path: str, width: Optional[float] = No
             else:
                 doc.add_picture(abs_image_path)
 
-            new_buffer = BytesIO()
-            doc.save(new_buffer)
-            temp_files[file_id]["bytes"] = new_buffer.getvalue()
+            temp_files.mark_dirty(file_id)
 
-            return f"Picture {image_path} added to {temp_files[file_id]['filename']}"
+            return f"Picture {image_path} added to {temp_files.filename(file_id)}"
         except Exception as inner_error:
             # More detailed error for the specific operation
             error_type = type(inner_error).__name__
@@ -276,32 +192,35 @@ async def add_picture(file_id: str, image_path: str, width: Optional[float] = No
         return f"Document processing error: {error_type} - {error_msg or 'No error details available'}"
 
 
-async def add_page_break(file_id: str) -> str:
+@offload(key="file_id")
+async def add_page_break(file_id: str, expected_version: Optional[int] = None) -> str:
     """Add a page break to the document.
     
     Args:
         file_id: Path to the Word document
+        expected_version: Only edit if the document is still at this version (see get_document_version)
     """
     if file_id not in temp_files:
-        return f"No document found for ID {file_id}"
+        return missing_document(file_id)
+
+    conflict = version_conflict(file_id, expected_version)
+    if conflict:
+        return conflict
     
     try:
-        # Load document from memory
-        buffer = BytesIO(temp_files[file_id]["bytes"])
-        buffer.seek(0)
-        doc = Document(buffer)
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
 
         doc.add_page_break()
 
-        new_buffer = BytesIO()
-        doc.save(new_buffer)
-        temp_files[file_id]["bytes"] = new_buffer.getvalue()
+        temp_files.mark_dirty(file_id)
 
-        return f"Page break added to {temp_files[file_id]['filename']}."
+        return f"Page break added to {temp_files.filename(file_id)}."
     except Exception as e:
         return f"Failed to add page break: {str(e)}"
 
 
+@offload(key="file_id")
 async def add_table_of_contents(file_id: str, title: str = "Table of Contents", max_level: int = 3) -> str:
     """Add a table of contents to a Word document based on heading styles.
     
@@ -311,16 +230,14 @@ async def add_table_of_contents(file_id: str, title: str = "Table of Contents",
         max_level: Maximum heading level to include (1-9)
     """
     if file_id not in temp_files:
-        return f"No document found for ID {file_id}"    
+        return missing_document(file_id)
     
     try:
         # Ensure max_level is within valid range
         max_level = max(1, min(max_level, 9))
         
-        # Load document from memory
-        buffer = BytesIO(temp_files[file_id]["bytes"])
-        buffer.seek(0)
-        doc = Document(buffer)
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
         
         # Collect headings and their positions
         headings = []
@@ -341,7 +258,7 @@ async def add_table_of_contents(file_id: str, title: str = "Table of Contents",
                     pass
         
         if not headings:
-            return f"No headings found in document {temp_files[file_id]['filename']}. Table of contents not created."
+            return f"No headings found in document {temp_files.filename(file_id)}. Table of contents not created."
         
         # Create a new document with the TOC
         toc_doc = Document()
@@ -382,70 +299,71 @@ async def add_table_of_contents(file_id: str, title: str = "Table of Contents",
         # Save the new document with TOC
         toc_doc.save(filename)
         
-        return f"Table of contents with {len(headings)} entries added to {temp_files[file_id]['filename']}"
+        return f"Table of contents with {len(headings)} entries added to {temp_files.filename(file_id)}"
     except Exception as e:
         return f"Failed to add table of contents: {str(e)}"
 
 
-async def delete_paragraph(file_id: str, paragraph_index: int) -> str:
+@offload(key="file_id")
+async def delete_paragraph(file_id: str, paragraph_index: int, expected_version: Optional[int] = None) -> str:
     """Delete a paragraph from a document.
     
     Args:
         file_id: Path to the Word document
         paragraph_index: Index of the paragraph to delete (0-based)
+        expected_version: Only edit if the document is still at this version (see get_document_version)
     """
     if file_id not in temp_files:
-        return f"No document found for ID {file_id}"    
+        return missing_document(file_id)
+
+    conflict = version_conflict(file_id, expected_version)
+    if conflict:
+        return conflict
     
     try:
-        # Load document from memory
-        buffer = BytesIO(temp_files[file_id]["bytes"])
-        buffer.seek(0)
-        doc = Document(buffer)
-        
-        # Validate paragraph index
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return f"Invalid paragraph index. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})."
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
         
-        # Delete the paragraph (by removing its content and setting it empty)
-        # Note: python-docx doesn't support true paragraph deletion, this is a workaround
-        paragraph = doc.paragraphs[paragraph_index]
-        p = paragraph._p
-        p.getparent().remove(p)
+        # Validate the index and remove the paragraph element
+        try:
+            delete_paragraph_from_document(doc, paragraph_index)
+        except ValueError as e:
+            return str(e)
         
-        new_buffer = BytesIO()
-        doc.save(new_buffer)
-        temp_files[file_id]["bytes"] = new_buffer.getvalue()
+        temp_files.mark_dirty(file_id)
 
         return f"Paragraph at index {paragraph_index} deleted successfully."
     except Exception as e:
         return f"Failed to delete paragraph: {str(e)}"
 
 
-async def search_and_replace(file_id: str, find_text: str, replace_text: str) -> str:
+@offload(key="file_id")
+async def search_and_replace(file_id: str, find_text: str, replace_text: str,
+                             expected_version: Optional[int] = None) -> str:
     """Search for text and replace all occurrences.
     
     Args:
         file_id: Path to the Word document
         find_text: Text to search for
         replace_text: Text to replace with
+        expected_version: Only edit if the document is still at this version (see get_document_version)
     """
     if file_id not in temp_files:
-        return f"No document found for ID {file_id}"    
+        return missing_document(file_id)
+
+    conflict = version_conflict(file_id, expected_version)
+    if conflict:
+        return conflict
     
     try:
-        # Load document from memory
-        buffer = BytesIO(temp_files[file_id]["bytes"])
-        buffer.seek(0)
-        doc = Document(buffer)
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
         
         # Perform find and replace
         count = find_and_replace_text(doc, find_text, replace_text)
         
         if count > 0:
-            new_buffer = BytesIO()
-            doc.save(new_buffer)
-            temp_files[file_id]["bytes"] = new_buffer.getvalue()
+            temp_files.mark_dirty(file_id)
 
             return f"Replaced {count} occurrence(s) of '{find_text}' with '{replace_text}'."
         else:
@@ -453,22 +371,83 @@ async def search_and_replace(file_id: str, find_text: str, replace_text: str) ->
     except Exception as e:
         return f"Failed to search and replace: {str(e)}"
 
+@offload(key="file_id")
+async def search_and_replace_many(file_id: str, replacements: Dict[str, str], regex: bool = False,
+                                  expected_version: Optional[int] = None) -> str:
+    """Replace many patterns in one pass, including text split across runs.
+
+    Args:
+        file_id: ID of the in-memory document
+        replacements: Mapping of text (or regular expression) to its replacement
+        regex: Treat the keys of replacements as regular expressions
+        expected_version: Only edit if the document is still at this version (see get_document_version)
+    """
+    if file_id not in temp_files:
+        return missing_document(file_id)
+
+    conflict = version_conflict(file_id, expected_version)
+    if conflict:
+        return conflict
+
+    try:
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
+        counts = replace_text_many(doc, replacements, regex)
+        total = sum(counts.values())
+        if not total:
+            return "No occurrences of any pattern found."
+        temp_files.mark_dirty(file_id)
+
+        missing = [pattern for pattern, count in counts.items() if not count]
+        message = f"Replaced {total} occurrence(s) of {len(counts) - len(missing)} pattern(s)."
+        if missing:
+            message += f" Not found: {', '.join(repr(p) for p in missing)}."
+        return message
+    except Exception as e:
+        return f"Failed to search and replace: {str(e)}"
+
+@offload(key="file_id")
 async def insert_header_near_text_tool(file_id: str, target_text: str = None, header_title: str = "", position: str = 'after', header_style: str = 'Heading 1', target_paragraph_index: int = None) -> str:
     """Insert a header (with specified style) before or after the target paragraph. Specify by text or paragraph index."""
     return insert_header_near_text(filename, target_text, header_title, position, header_style, target_paragraph_index)
 
+@offload(key="file_id")
 async def insert_numbered_list_near_text_tool(file_id: str, target_text: str = None, list_items: list = None, position: str = 'after', target_paragraph_index: int = None, bullet_type: str = 'bullet') -> str:
     """Insert a bulleted or numbered list before or after the target paragraph. Specify by text or paragraph index."""
     return insert_numbered_list_near_text(filename, target_text, list_items, position, target_paragraph_index, bullet_type)
 
+@offload(key="file_id")
 async def insert_line_or_paragraph_near_text_tool(file_id: str, target_text: str = None, line_text: str = "", position: str = 'after', line_style: str = None, target_paragraph_index: int = None) -> str:
     """Insert a new line or paragraph (with specified or matched style) before or after the target paragraph. Specify by text or paragraph index."""
     return insert_line_or_paragraph_near_text(filename, target_text, line_text, position, line_style, target_paragraph_index)
 
+@offload(key="file_id")
 async def replace_paragraph_block_below_header_tool(file_id: str, header_text: str, new_paragraphs: list, detect_block_end_fn=None) -> str:
     """Reemplaza el bloque de párrafos debajo de un encabezado, evitando modificar TOC."""
     return replace_paragraph_block_below_header(filename, header_text, new_paragraphs, detect_block_end_fn)
 
-async def replace_block_between_manual_anchors_tool(file_id: str, start_anchor_text: str, new_paragraphs: list, end_anchor_text: str = None, match_fn=None, new_paragraph_style: str = None) -> str:
-    """Replace all content between start_anchor_text and end_anchor_text (or next logical header if not provided)."""
-    return replace_block_between_manual_anchors(filename, start_anchor_text, new_paragraphs, end_anchor_text, match_fn, new_paragraph_style)
\ No newline at end of file
+@offload(key="file_id")
+async def replace_block_between_manual_anchors_tool(file_id: str, start_anchor_text: str, new_paragraphs: list, end_anchor_text: str = None, match_fn=None, new_paragraph_style: str = None, expected_version: Optional[int] = None) -> str:
+    """Replace all content between start_anchor_text and end_anchor_text (or next logical header if not provided).
+
+    file_id may be the ID of an in-memory document or a path to a .docx file;
+    expected_version only applies to in-memory documents.
+    """
+    if file_id not in temp_files:
+        return replace_block_between_manual_anchors(file_id, start_anchor_text, new_paragraphs, end_anchor_text, match_fn, new_paragraph_style)
+
+    conflict = version_conflict(file_id, expected_version)
+    if conflict:
+        return conflict
+
+    try:
+        # Reuse the live document for this session
+        doc = temp_files.open(file_id)
+        try:
+            message = replace_block_between_manual_anchors_in_document(doc, start_anchor_text, new_paragraphs, end_anchor_text, match_fn, new_paragraph_style)
+        except ValueError as e:
+            return str(e)
+        temp_files.mark_dirty(file_id)
+        return message
+    except Exception as e:
+        return f"Failed to replace block: {str(e)}"
\ No newline at end of file
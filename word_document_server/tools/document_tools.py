@@ -4,14 +4,15 @@ Document creation and manipulation tools for Word Document Server.
 import os
 import json
 import uuid
-import httpx
 from fastmcp import FastMCP
 from fastapi import Request
 from io import BytesIO
 from typing import Dict, List, Optional, Any, Union
 from docx import Document
 from starlette.requests import Request as StarletteRequest
-from word_document_server.utils.s3_utils import generate_presigned_url, get_s3_client
+from word_document_server.utils.s3_utils import get_s3_client, object_exists, upload_bytes
+from word_document_server.utils.document_store import DocumentStore, missing_document
+from word_document_server.utils.template_cache import TemplateError, get_template_cache
 
 def get_base_url(request: Optional[Union[Request, StarletteRequest]] = None) -> str:
     """
@@ -44,9 +45,12 @@ def get_base_url(request: Optional[Union[Request, StarletteRequest]] = None) ->
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension, create_document_copy
 from word_document_server.utils.document_utils import get_document_properties, extract_document_text, get_document_structure, get_document_xml, insert_header_near_text, insert_line_or_paragraph_near_text
+from word_document_server.utils.read_cache import get_read_cache
+from word_document_server.utils.executor import offload
 from word_document_server.core.styles import ensure_heading_style, ensure_table_style
 
 
+@offload(key="filename", process_safe=True)
 async def create_document(filename: str, title: Optional[str] = None, author: Optional[str] = None) -> str:
     """Create a new Word document with optional metadata.
     
@@ -83,11 +87,16 @@ async def create_document(filename: str, title: Optional[str] = None, author: Op
         return f"Failed to create document: {str(e)}"
 
 
-async def get_document_info(filename: str) -> str:
+@offload(key="filename")
+async def get_document_info(filename: str, exact: bool = False) -> str:
     """Get information about a Word document.
     
     Args:
         filename: Path to the Word document
+        exact: Count words, characters and paragraphs from the document body
+            instead of using the statistics stored in docProps/app.xml
+            (files saved without word counts, such as those this server
+            writes, are always counted)
     """
     filename = ensure_docx_extension(filename)
     
@@ -95,12 +104,15 @@ async def get_document_info(filename: str) -> str:
         return f"Document {filename} does not exist"
     
     try:
-        properties = get_document_properties(filename)
-        return json.dumps(properties, indent=2)
+        return get_read_cache().get_or_compute(
+            filename, "get_document_info", (exact,),
+            lambda: json.dumps(get_document_properties(filename, exact=exact), indent=2)
+        )
     except Exception as e:
         return f"Failed to get document info: {str(e)}"
 
 
+@offload(key="filename")
 async def get_document_text(filename: str) -> str:
     """Extract all text from a Word document.
     
@@ -109,21 +121,40 @@ async def get_document_text(filename: str) -> str:
     """
     filename = ensure_docx_extension(filename)
     
-    return extract_document_text(filename)
+    return get_read_cache().get_or_compute(filename, "get_document_text", (), lambda: extract_document_text(filename))
 
 
-async def get_document_outline(filename: str) -> str:
+@offload(key="filename")
+async def get_document_outline(filename: str, headings_only: bool = False, start: int = 0,
+                               limit: Optional[int] = None, styles: Optional[List[str]] = None,
+                               compact: bool = False) -> str:
     """Get the structure of a Word document.
     
     Args:
         filename: Path to the Word document
+        headings_only: Only list Title and Heading paragraphs, with their level
+        start: Position of the first paragraph to return (pass next_start for the next page)
+        limit: Maximum number of paragraphs to return
+        styles: Only list paragraphs with one of these style names
+        compact: Return JSON without indentation
     """
     filename = ensure_docx_extension(filename)
+
+    if start < 0 or (limit is not None and limit < 1):
+        return "Invalid parameter: start must be non-negative and limit positive"
+    styles_key = tuple(styles) if styles else None
     
-    structure = get_document_structure(filename)
-    return json.dumps(structure, indent=2)
+    return get_read_cache().get_or_compute(
+        filename, "get_document_outline", (headings_only, start, limit, styles_key, compact),
+        lambda: json.dumps(
+            # Tables are listed once, with the first page
+            get_document_structure(filename, headings_only, start, limit, styles, include_tables=start == 0),
+            **({"separators": (",", ":")} if compact else {"indent": 2})
+        )
+    )
 
 
+@offload()
 async def list_available_documents(directory: str = ".") -> str:
     """List all .docx files in the specified directory.
     
@@ -150,6 +181,7 @@ async def list_available_documents(directory: str = ".") -> str:
         return f"Failed to list documents: {str(e)}"
 
 
+@offload(key="source_filename", process_safe=True)
 async def copy_document(source_filename: str, destination_filename: Optional[str] = None) -> str:
     """Create a copy of a Word document.
     
@@ -169,6 +201,7 @@ async def copy_document(source_filename: str, destination_filename: Optional[str
         return f"Failed to copy document: {message}"
 
 
+@offload(key="target_filename", process_safe=True)
 async def merge_documents(target_filename: str, source_filenames: List[str], add_page_breaks: bool = True) -> str:
     """Merge multiple Word documents into a single document.
     
@@ -177,7 +210,7 @@ async def merge_documents(target_filename: str, source_filenames: List[str], add
         source_filenames: List of paths to source documents to merge
         add_page_breaks: If True, add page breaks between documents
     """
-    from word_document_server.core.tables import copy_table
+    from word_document_server.core.merge import merge_docx_files
     
     target_filename = ensure_docx_extension(target_filename)
     
@@ -197,57 +230,17 @@ async def merge_documents(target_filename: str, source_filenames: List[str], add
         return f"Cannot merge documents. The following source files do not exist: {', '.join(missing_files)}"
     
     try:
-        # Create a new document for the merged result
-        target_doc = Document()
-        
-        # Process each source document
-        for i, filename in enumerate(source_filenames):
-            doc_filename = ensure_docx_extension(filename)
-            source_doc = Document(doc_filename)
-            
-            # Add page break between documents (except before the first one)
-            if add_page_breaks and i > 0:
-                target_doc.add_page_break()
-            
-            # Copy all paragraphs
-            for paragraph in source_doc.paragraphs:
-                # Create a new paragraph with the same text and style
-                new_paragraph = target_doc.add_paragraph(paragraph.text)
-                new_paragraph.style = target_doc.styles['Normal']  # Default style
-                
-                # Try to match the style if possible
-                try:
-                    if paragraph.style and paragraph.style.name in target_doc.styles:
-                        new_paragraph.style = target_doc.styles[paragraph.style.name]
-                except:
-                    pass
-                
-                # Copy run formatting
-                for i, run in enumerate(paragraph.runs):
-                    if i < len(new_paragraph.runs):
-                        new_run = new_paragraph.runs[i]
-                        # Copy basic formatting
-                        new_run.bold = run.bold
-                        new_run.italic = run.italic
-                        new_run.underline = run.underline
-                        # Font size if specified
-                        if run.font.size:
-                            new_run.font.size = run.font.size
-            
-            # Copy all tables
-            for table in source_doc.tables:
-                copy_table(table, target_doc)
-        
-        # Save the merged document
-        target_doc.save(target_filename)
+        # Body elements are copied in order, with styles, lists, images and links remapped
+        merge_docx_files(target_filename, [ensure_docx_extension(f) for f in source_filenames], add_page_breaks)
         return f"Successfully merged {len(source_filenames)} documents into {target_filename}"
     except Exception as e:
         return f"Failed to merge documents: {str(e)}"
 
 
+@offload(key="filename")
 async def get_document_xml_tool(filename: str) -> str:
     """Get the raw XML structure of a Word document."""
-    return get_document_xml(filename)
+    return get_read_cache().get_or_compute(filename, "get_document_xml", (), lambda: get_document_xml(filename))
 
 # -------------------------------
 # 1️⃣ FastAPI app and MCP server
@@ -257,15 +250,31 @@ async def get_document_xml_tool(filename: str) -> str:
 # -------------------------------
 # 2️⃣ In-memory storage for docs
 # -------------------------------
-# key: file_id (UUID), value: {"filename": str, "bytes": bytes}
-temp_files = {}
+# key: file_id (UUID), value: live document plus its serialized bytes.
+# Bounded by MCP_STORE_MAX_BYTES / MCP_STORE_TTL, see DocumentStore.from_env
+temp_files = DocumentStore.from_env()
+
+
+def version_conflict(file_id: str, expected_version: Optional[int]) -> Optional[str]:
+    """
+    Check an optional expected_version against the current version of an in-memory document.
+
+    Edit tools call this first (while holding the document's lock) and return
+    the message instead of editing when it is not None.
+    """
+    if expected_version is None:
+        return None
+    current = temp_files.version(file_id)
+    if int(expected_version) != current:
+        return (f"Version conflict for {file_id}: expected version {expected_version}, "
+                f"but the document is at version {current}. Re-read the document and retry.")
+    return None
+
 
 # -------------------------------
 # 3️⃣ MCP tool: create_document
 # -------------------------------
-# Create S3 client (ensure AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION in env)
-s3_client = get_s3_client()
-
+@offload()
 async def create_temp(
     filename: str,
     title: Optional[str] = None,
@@ -274,9 +283,14 @@ async def create_temp(
     """
     Create a Word document in memory, upload to S3, and return a presigned download URL.
     """
+    file_id = None
     try:
         if not filename.lower().endswith(".docx"):
             filename += ".docx"
+        bucket_name = os.getenv("S3_BUCKET_NAME")
+        if not bucket_name:
+            return {"error": "S3_BUCKET_NAME not set"}
+
         # Create document
         doc = Document()
         if title:
@@ -291,94 +305,98 @@ async def create_temp(
 
         # Unique file ID
         file_id = str(uuid.uuid4())
+        temp_files.add(filename, data=buffer.getvalue(), document=doc, file_id=file_id)
         s3_key = f"temp/{file_id}_{filename}"
 
         # Upload to S3
-        bucket_name = os.getenv("S3_BUCKET_NAME")
-        if not bucket_name:
-            return {"error": "S3_BUCKET_NAME not set"}
-        
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=s3_key,
-            Body=buffer.getvalue(),
-            ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
+        upload_bytes(bucket_name, s3_key, buffer.getvalue())
+        temp_files.record_upload(file_id, temp_files.digest(file_id), s3_key)
 
         # Generate presigned URL (valid 10 minutes)
-        presigned_url = s3_client.generate_presigned_url(
+        presigned_url = get_s3_client().generate_presigned_url(
             ClientMethod="get_object",
             Params={"Bucket": bucket_name, "Key": s3_key},
             ExpiresIn=600  # seconds
         )
 
-        return {"download_url": presigned_url, "file_id": file_id, "filename": filename}
+        return {"download_url": presigned_url, "file_id": file_id, "filename": filename,
+                "version": temp_files.version(file_id)}
 
     except Exception as e:
+        # Don't keep a document the caller never got a file_id for
+        if file_id is not None:
+            temp_files.discard(file_id)
         return {"error": f"Failed to create document: {str(e)}"}
 
 # -------------------------------
 # 4️⃣ FastAPI endpoint: download
 # -------------------------------
 
-async def load_template() -> dict:
+@offload()
+async def load_template(template_name: Optional[str] = None) -> dict:
     """
-    Load a template Word document from S3 using a presigned URL.
+    Create an in-memory document from a template stored in S3.
+
+    Templates are cached after the first download and revalidated against
+    S3 once MCP_TEMPLATE_TTL has passed, so most calls do not touch S3.
     
+    Args:
+        template_name: Name of a template configured in MCP_TEMPLATES; the
+            default template (S3_OBJECT_KEY) if omitted
+
     Returns:
-        {"download_url": str, "file_id": str, "filename": str} on success
+        {"file_id": str, "filename": str, "version": int} on success
         {"error": str} on failure
     """
-    # S3 configuration
-    bucket_name = os.getenv('S3_BUCKET_NAME')
-    object_key = os.getenv('S3_OBJECT_KEY')  # The key of your example document in S3
-    
-    if not bucket_name:
-        return {"error": "S3_BUCKET_NAME environment variable not set"}
-    
     try:
-        # Generate a presigned URL for the S3 object
-        presigned_url = generate_presigned_url(
-            bucket_name=bucket_name,
-            object_key=object_key,
-            expiration=86400  # 24 hours expiration
-        )
-        
-        if not presigned_url:
-            return {"error": "Failed to generate presigned URL"}
-            
-        # Download the file using the presigned URL
-        async with httpx.AsyncClient() as client:
-            response = await client.get(presigned_url)
-            response.raise_for_status()
-            
-            # Check if it's actually a Word document
-            content_type = response.headers.get('content-type', '')
-            if 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' not in content_type:
-                return {"error": "The URL does not point to a valid Word document"}
-                
-            docx_bytes = response.content
-        
-        filename = "Record_of_advice.docx"
-            
-        # Store in memory
-        file_id = str(uuid.uuid4())
-        temp_files[file_id] = {
-            "filename": filename,
-            "bytes": docx_bytes
-        }
-        
-        return {
-            "file_id": file_id,
-            "filename": filename
-        }
-
+        docx_bytes, filename = get_template_cache().get(template_name)
+    except TemplateError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"Failed to load template: {str(e)}"}
 
+    # The store shares the cached bytes and parses them on first access
+    file_id = temp_files.add(filename, data=docx_bytes)
+    
+    return {
+        "file_id": file_id,
+        "filename": filename,
+        "version": temp_files.version(file_id)
+    }
+
+@offload(key="file_id")
+async def get_document_version(file_id: str) -> dict:
+    """
+    Get the current version of an in-memory document.
+
+    The version increases with every edit. Pass it as expected_version to an
+    edit tool to have the edit rejected if someone else changed the document
+    in the meantime. The etag is the one /mcp/download/{file_id} sends, for
+    If-None-Match revalidation.
+
+    Args:
+        file_id: ID of the in-memory document
+    """
+    if file_id not in temp_files:
+        return {"error": missing_document(file_id)}
+    return {
+        "file_id": file_id,
+        "filename": temp_files.filename(file_id),
+        "version": temp_files.version(file_id),
+        "etag": temp_files.etag(file_id)
+    }
+
+def _content_keys_enabled() -> bool:
+    """Whether MCP_S3_CONTENT_KEYS asks for uploads keyed by content hash."""
+    return os.getenv("MCP_S3_CONTENT_KEYS", "").lower() in ("1", "true", "yes")
+
+@offload(key="file_id")
 async def upload_get_url(file_id: str, filename: str = None, expires: int = 1800) -> str:
     """
     Upload an in-memory document to S3 and return a presigned URL.
+
+    If the document has not changed since its last upload under the same
+    name, the upload is skipped and only a new URL is signed.
     
     Args:
         file_id: ID of the in-memory document
@@ -389,34 +407,38 @@ async def upload_get_url(file_id: str, filename: str = None, expires: int = 1800
         str: Presigned URL for the uploaded file or error message
     """
     if file_id not in temp_files:
-        return {"error": f"No document found with ID {file_id}"}
+        return {"error": missing_document(file_id)}
     
     bucket_name = os.getenv("S3_BUCKET_NAME")
     if not bucket_name:
         return {"error": "S3_BUCKET_NAME environment variable not set"}
     
     try:
-        # Get the file entry
-        file_entry = temp_files[file_id]
-        file_bytes = file_entry["bytes"]
-        original_filename = file_entry.get("filename", "document.docx")
+        original_filename = temp_files.filename(file_id) or "document.docx"
         filename = filename or original_filename
-        
-        # Generate a unique key
-        key = f"temp/{file_id}_{filename}"
-        
-        # Upload to S3
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=key,
-            Body=file_bytes,
-            ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
-        
+        # Saves the live document if it has unsaved edits
+        digest = temp_files.digest(file_id)
+        params = {"Bucket": bucket_name}
+
+        if _content_keys_enabled():
+            # Identical documents share one object, named after their content
+            key = f"content/{digest}.docx"
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        else:
+            key = f"temp/{file_id}_{filename}"
+        params["Key"] = key
+
+        # Unchanged since the last upload: only sign a new URL
+        if temp_files.last_upload(file_id) != (digest, key):
+            if not (key.startswith("content/") and object_exists(bucket_name, key)):
+                # Upload to S3 (multipart for large documents)
+                upload_bytes(bucket_name, key, temp_files.get_bytes(file_id))
+            temp_files.record_upload(file_id, digest, key)
+
         # Generate and return presigned URL
-        return s3_client.generate_presigned_url(
+        return get_s3_client().generate_presigned_url(
             ClientMethod="get_object",
-            Params={"Bucket": bucket_name, "Key": key},
+            Params=params,
             ExpiresIn=expires
         )
     except Exception as e:
@@ -4,17 +4,29 @@ Extended document tools for Word Document Server.
 These tools provide enhanced document content extraction and search capabilities.
 """
 import os
+import asyncio
 import json
-import subprocess
+import math
 import platform
-import shutil
-from typing import Dict, List, Optional, Any, Union, Tuple
+import tempfile
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Any, Union, Tuple
 from docx import Document
 
+from word_document_server.tools.document_tools import temp_files
+from word_document_server.utils.document_store import missing_document
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
+from word_document_server.utils.executor import document_key, get_worker_pool, offload
 from word_document_server.utils.extended_document_utils import get_paragraph_text, find_text
+from word_document_server.utils.read_cache import get_read_cache
+from word_document_server.utils.office_pool import OfficeConversionError, get_office_pool
+from word_document_server.utils.pdf_cache import get_pdf_cache
 
+# Largest number of documents convert_many_to_pdf passes to one LibreOffice run
+MAX_PDF_BATCH_SIZE = 16
 
+
+@offload(key="filename")
 async def get_paragraph_text_from_document(filename: str, paragraph_index: int) -> str:
     """Get text from a specific paragraph in a Word document.
     
@@ -38,7 +50,9 @@ async def get_paragraph_text_from_document(filename: str, paragraph_index: int)
         return f"Failed to get paragraph text: {str(e)}"
 
 
-async def find_text_in_document(filename: str, text_to_find: str, match_case: bool = True, whole_word: bool = False) -> str:
+@offload(key="filename")
+async def find_text_in_document(filename: str, text_to_find: str, match_case: bool = True, whole_word: bool = False,
+                                limit: int = 100, offset: int = 0) -> str:
     """Find occurrences of specific text in a Word document.
     
     Args:
@@ -46,6 +60,8 @@ async def find_text_in_document(filename: str, text_to_find: str, match_case: bo
         text_to_find: Text to search for in the document
         match_case: Whether to match case (True) or ignore case (False)
         whole_word: Whether to match whole words only (True) or substrings (False)
+        limit: Maximum number of occurrences to return
+        offset: Number of occurrences to skip, for fetching further pages
     """
     filename = ensure_docx_extension(filename)
     
@@ -54,31 +70,55 @@ async def find_text_in_document(filename: str, text_to_find: str, match_case: bo
     
     if not text_to_find:
         return "Search text cannot be empty"
+
+    if limit < 1 or offset < 0:
+        return "Invalid parameter: limit must be positive and offset non-negative"
     
     try:
         
-        result = find_text(filename, text_to_find, match_case, whole_word)
-        return json.dumps(result, indent=2)
+        return get_read_cache().get_or_compute(
+            filename, "find_text_in_document", (text_to_find, match_case, whole_word, limit, offset),
+            lambda: json.dumps(find_text(filename, text_to_find, match_case, whole_word, offset, limit), indent=2)
+        )
     except Exception as e:
         return f"Failed to search for text: {str(e)}"
 
 
+@contextmanager
+def _docx_on_disk(filename: str, file_id: Optional[str]) -> Iterator[str]:
+    """Yield a path to the document, writing in-memory documents to a temporary file."""
+    if file_id is None:
+        yield filename
+        return
+    with tempfile.TemporaryDirectory(prefix="word-mcp-convert-") as temp_dir:
+        path = os.path.join(temp_dir, ensure_docx_extension(os.path.basename(temp_files.filename(file_id))))
+        with open(path, 'wb') as f:
+            f.write(temp_files.get_bytes(file_id))
+        yield path
+
+
+@offload(key="filename")
 async def convert_to_pdf(filename: str, output_filename: Optional[str] = None) -> str:
     """Convert a Word document to PDF format.
+
+    Conversions are cached by document content, so converting an unchanged
+    document again only copies the earlier result.
     
     Args:
-        filename: Path to the Word document
+        filename: Path to the Word document, or the ID of an in-memory document
         output_filename: Optional path for the output PDF. If not provided, 
                          will use the same name with .pdf extension
     """
-    filename = ensure_docx_extension(filename)
-    
-    if not os.path.exists(filename):
-        return f"Document {filename} does not exist"
+    file_id = filename if filename in temp_files else None
+    if file_id is None:
+        filename = ensure_docx_extension(filename)
+        
+        if not os.path.exists(filename):
+            return f"Document {filename} does not exist"
     
     # Generate output filename if not provided
     if not output_filename:
-        base_name, _ = os.path.splitext(filename)
+        base_name, _ = os.path.splitext(temp_files.filename(file_id) if file_id else filename)
         output_filename = f"{base_name}.pdf"
     elif not output_filename.lower().endswith('.pdf'):
         output_filename = f"{output_filename}.pdf"
@@ -108,7 +148,8 @@ async def convert_to_pdf(filename: str, output_filename: Optional[str] = None) -
             # On Windows, try docx2pdf which uses Microsoft Word
             try:
                 from docx2pdf import convert
-                convert(filename, output_filename)
+                with _docx_on_disk(filename, file_id) as source:
+                    convert(source, output_filename)
                 return f"Document successfully converted to PDF: {output_filename}"
             except (ImportError, Exception) as e:
                 return f"Failed to convert document to PDF: {str(e)}\nNote: docx2pdf requires Microsoft Word to be installed."
@@ -116,51 +157,29 @@ async def convert_to_pdf(filename: str, output_filename: Optional[str] = None) -
         elif system in ["Linux", "Darwin"]:  # Linux or macOS
             errors = []
             
-            # --- Attempt 1: LibreOffice ---
-            lo_commands = []
-            if system == "Darwin":  # macOS
-                lo_commands = ["soffice", "/Applications/LibreOffice.app/Contents/MacOS/soffice"]
-            else:  # Linux
-                lo_commands = ["libreoffice", "soffice"]
-
-            for cmd_name in lo_commands:
+            # --- Attempt 1: LibreOffice worker pool ---
+            office_pool = get_office_pool()
+            if office_pool.available:
                 try:
-                    output_dir_for_lo = os.path.dirname(output_filename) or '.'
-                    os.makedirs(output_dir_for_lo, exist_ok=True)
-                    
-                    cmd = [cmd_name, '--headless', '--convert-to', 'pdf', '--outdir', output_dir_for_lo, filename]
-                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60, check=False)
-
-                    if result.returncode == 0:
-                        # LibreOffice typically creates a PDF with the same base name as the source file.
-                        # e.g., 'mydoc.docx' -> 'mydoc.pdf'
-                        base_name = os.path.splitext(os.path.basename(filename))[0]
-                        created_pdf_name = f"{base_name}.pdf"
-                        created_pdf_path = os.path.join(output_dir_for_lo, created_pdf_name)
-
-                        # If the created file exists, move it to the desired output_filename if necessary.
-                        if os.path.exists(created_pdf_path):
-                            if created_pdf_path != output_filename:
-                                shutil.move(created_pdf_path, output_filename)
-                            
-                            # Final check: does the target file now exist?
-                            if os.path.exists(output_filename):
-                                return f"Document successfully converted to PDF via {cmd_name}: {output_filename}"
-                        
-                        # If we get here, soffice returned 0 but the expected file wasn't created.
-                        errors.append(f"{cmd_name} returned success code, but output file '{created_pdf_path}' was not found.")
-                        # Continue to the next command or fallback.
-                    else:
-                        errors.append(f"{cmd_name} failed. Stderr: {result.stderr.strip()}")
-                except FileNotFoundError:
-                    errors.append(f"Command '{cmd_name}' not found.")
-                except (subprocess.SubprocessError, Exception) as e:
-                    errors.append(f"An error occurred with {cmd_name}: {str(e)}")
+                    source = temp_files.get_bytes(file_id) if file_id else filename
+                    pdf_cache = get_pdf_cache()
+                    cache_key = pdf_cache.key(source, office_pool.converter_id())
+                    if pdf_cache.fetch(cache_key, output_filename):
+                        return f"Document successfully converted to PDF via {office_pool.binary_name} (cached): {output_filename}"
+                    with _docx_on_disk(filename, file_id) as source_path:
+                        office_pool.convert(source_path, output_filename)
+                    pdf_cache.store(cache_key, output_filename)
+                    return f"Document successfully converted to PDF via {office_pool.binary_name}: {output_filename}"
+                except OfficeConversionError as e:
+                    errors.append(f"{office_pool.binary_name} failed: {str(e)}")
+            else:
+                errors.append("LibreOffice (soffice/libreoffice) not found.")
             
             # --- Attempt 2: docx2pdf (Fallback) ---
             try:
                 from docx2pdf import convert
-                convert(filename, output_filename)
+                with _docx_on_disk(filename, file_id) as source_path:
+                    convert(source_path, output_filename)
                 if os.path.exists(output_filename) and os.path.getsize(output_filename) > 0:
                     return f"Document successfully converted to PDF via docx2pdf: {output_filename}"
                 else:
@@ -182,3 +201,156 @@ async def convert_to_pdf(filename: str, output_filename: Optional[str] = None) -
             
     except Exception as e:
         return f"Failed to convert document to PDF: {str(e)}"
+
+
+def _output_paths(sources: List[str], output_dir: Optional[str]) -> List[str]:
+    """PDF path for each document; names repeated in one directory get a numeric suffix."""
+    used = set()
+    paths = []
+    for source in sources:
+        base_name = os.path.splitext(os.path.abspath(source))[0]
+        directory = os.path.abspath(output_dir) if output_dir else os.path.dirname(base_name)
+        stem = os.path.basename(base_name)
+        path = os.path.join(directory, f"{stem}.pdf")
+        suffix = 1
+        while path in used:
+            suffix += 1
+            path = os.path.join(directory, f"{stem}_{suffix}.pdf")
+        used.add(path)
+        paths.append(path)
+    return paths
+
+
+def _prepare_pdf_job(index: int, name: str, target: str, converter: str, temp_dir: str) -> Dict[str, Any]:
+    """
+    Check one document of a batch conversion and look it up in the PDF cache.
+
+    Returns a result dict for documents that are done (failed or served
+    from the cache), or the source path and cache key for LibreOffice.
+    Errors are reported in the result, so one bad document (an expired
+    file_id, an unreadable file) does not abort the batch.
+    """
+    try:
+        return _prepare_pdf_job_unchecked(index, name, target, converter, temp_dir)
+    except KeyError:
+        return {"success": False, "error": missing_document(name)}
+    except Exception as e:
+        return {"success": False, "error": f"Failed to prepare document: {str(e)}"}
+
+
+def _prepare_pdf_job_unchecked(index: int, name: str, target: str, converter: str, temp_dir: str) -> Dict[str, Any]:
+    file_id = name if name in temp_files else None
+    if file_id is None:
+        source_path = ensure_docx_extension(name)
+        if not os.path.exists(source_path):
+            return {"success": False, "error": f"Document {source_path} does not exist"}
+    is_writeable, error_message = check_file_writeable(target)
+    if not is_writeable:
+        return {"success": False, "error": f"Cannot create PDF: {error_message}"}
+    data = temp_files.get_bytes(file_id) if file_id else None
+    pdf_cache = get_pdf_cache()
+    cache_key = pdf_cache.key(data if file_id else source_path, converter)
+    if pdf_cache.fetch(cache_key, target):
+        return {"success": True, "output": target, "cached": True}
+    if file_id:
+        # Distinct names let one soffice run take all in-memory documents
+        source_path = os.path.join(temp_dir, f"{index}.docx")
+        with open(source_path, 'wb') as f:
+            f.write(data)
+    return {"source": source_path, "target": target, "key": cache_key}
+
+
+async def convert_many_to_pdf(filenames: List[str], output_dir: Optional[str] = None,
+                              progress: Optional[Callable[[int, int, Dict[str, Any]], Awaitable[None]]] = None
+                              ) -> Dict[str, Any]:
+    """Convert many Word documents to PDF in parallel.
+
+    Documents converted before and unchanged since come from the PDF cache.
+    The rest are spread over the LibreOffice workers, several documents per
+    LibreOffice run.
+
+    Args:
+        filenames: Paths of Word documents and/or IDs of in-memory documents
+        output_dir: Directory for the PDFs. If not provided, each PDF is written
+                    next to its document (in-memory documents: current directory)
+        progress: Optional async callback progress(done, total, result), called
+                  as each document finishes
+
+    Returns:
+        Dict with overall success, counts and a result per document, in input order
+    """
+    if not isinstance(filenames, list) or not filenames:
+        return {"success": False, "error": "filenames must be a non-empty list", "results": []}
+
+    total = len(filenames)
+    results: List[Optional[Dict[str, Any]]] = [None] * total
+    done = 0
+
+    async def finish(index: int, result: Dict[str, Any]) -> None:
+        nonlocal done
+        results[index] = {"filename": filenames[index], **result}
+        done += 1
+        if progress is not None:
+            await progress(done, total, results[index])
+
+    if output_dir:
+        os.makedirs(os.path.abspath(output_dir), exist_ok=True)
+    targets = _output_paths([temp_files.filename(name) if name in temp_files else ensure_docx_extension(name)
+                             for name in filenames], output_dir)
+
+    office_pool = get_office_pool()
+    if platform.system() not in ("Linux", "Darwin") or not office_pool.available:
+        # No LibreOffice: fall back to the single-document tool, one at a time
+        for index, name in enumerate(filenames):
+            message = await convert_to_pdf(name, targets[index])
+            if "successfully converted" in message:
+                await finish(index, {"success": True, "output": targets[index], "cached": False})
+            else:
+                await finish(index, {"success": False, "error": message})
+    else:
+        worker_pool = get_worker_pool()
+        converter = await worker_pool.run(office_pool.converter_id)
+        with tempfile.TemporaryDirectory(prefix="word-mcp-convert-") as temp_dir:
+            prepared = await asyncio.gather(*(
+                worker_pool.run(_prepare_pdf_job, index, name, targets[index], converter, temp_dir,
+                                key=document_key(name))
+                for index, name in enumerate(filenames)
+            ))
+            pending = []
+            for index, job in enumerate(prepared):
+                if "source" in job:
+                    pending.append((index, job))
+                else:
+                    await finish(index, job)
+
+            # About one batch per worker, small enough to report progress as it goes
+            batch_size = max(1, min(MAX_PDF_BATCH_SIZE, math.ceil(len(pending) / office_pool.workers)))
+            batches = {}
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                pairs = [(job["source"], job["target"]) for _, job in batch]
+                batches[asyncio.ensure_future(worker_pool.run(office_pool.convert_many, pairs))] = batch
+
+            running = set(batches)
+            while running:
+                finished, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    batch = batches[task]
+                    try:
+                        errors = task.result()
+                    except Exception as e:
+                        errors = [e] * len(batch)
+                    for (index, job), error in zip(batch, errors):
+                        if error is None:
+                            get_pdf_cache().store(job["key"], job["target"])
+                            await finish(index, {"success": True, "output": job["target"], "cached": False})
+                        else:
+                            await finish(index, {"success": False, "error": str(error)})
+
+    converted = sum(1 for result in results if result["success"])
+    return {
+        "success": converted == total,
+        "converted": converted,
+        "failed": total - converted,
+        "results": results
+    }
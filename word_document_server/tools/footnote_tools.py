@@ -9,23 +9,26 @@ This module combines both standard and robust implementations:
 - Dict-return robust functions for structured responses
 """
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from docx import Document
 from docx.shared import Pt
 from docx.enum.style import WD_STYLE_TYPE
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
+from word_document_server.utils.executor import offload
 from word_document_server.core.footnotes import (
     find_footnote_references,
     get_format_symbols,
     customize_footnote_formatting,
     add_footnote_robust,
+    add_footnotes_batch,
     delete_footnote_robust,
     validate_document_footnotes,
     add_footnote_at_paragraph_end  # Compatibility function
 )
 
 
+@offload(key="filename", process_safe=True)
 async def add_footnote_to_document(filename: str, paragraph_index: int, footnote_text: str) -> str:
     """Add a footnote to a specific paragraph in a Word document.
     
@@ -96,6 +99,7 @@ async def add_footnote_to_document(filename: str, paragraph_index: int, footnote
         return f"Failed to add footnote: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def add_endnote_to_document(filename: str, paragraph_index: int, endnote_text: str) -> str:
     """Add an endnote to a specific paragraph in a Word document.
     
@@ -156,6 +160,7 @@ async def add_endnote_to_document(filename: str, paragraph_index: int, endnote_t
         return f"Failed to add endnote: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def convert_footnotes_to_endnotes_in_document(filename: str) -> str:
     """Convert all footnotes to endnotes in a Word document.
     
@@ -240,6 +245,7 @@ async def convert_footnotes_to_endnotes_in_document(filename: str) -> str:
         return f"Failed to convert footnotes to endnotes: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def add_footnote_after_text(filename: str, search_text: str, footnote_text: str, 
                                  output_filename: Optional[str] = None) -> str:
     """Add a footnote after specific text in a Word document with proper formatting.
@@ -277,6 +283,7 @@ async def add_footnote_after_text(filename: str, search_text: str, footnote_text
         return f"Failed to add footnote: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def add_footnote_before_text(filename: str, search_text: str, footnote_text: str, 
                                   output_filename: Optional[str] = None) -> str:
     """Add a footnote before specific text in a Word document with proper formatting.
@@ -314,6 +321,7 @@ async def add_footnote_before_text(filename: str, search_text: str, footnote_tex
         return f"Failed to add footnote: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def add_footnote_enhanced(filename: str, paragraph_index: int, footnote_text: str,
                                output_filename: Optional[str] = None) -> str:
     """Enhanced version of add_footnote_to_document with proper superscript formatting.
@@ -356,6 +364,7 @@ async def add_footnote_enhanced(filename: str, paragraph_index: int, footnote_te
         return f"Failed to add footnote: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def customize_footnote_style(filename: str, numbering_format: str = "1, 2, 3", 
                                   start_number: int = 1, font_name: Optional[str] = None,
                                   font_size: Optional[int] = None) -> str:
@@ -415,6 +424,7 @@ async def customize_footnote_style(filename: str, numbering_format: str = "1, 2,
         return f"Failed to customize footnote style: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def delete_footnote_from_document(filename: str, footnote_id: Optional[int] = None,
                                        search_text: Optional[str] = None, 
                                        output_filename: Optional[str] = None) -> str:
@@ -459,6 +469,7 @@ async def delete_footnote_from_document(filename: str, footnote_id: Optional[int
 # ============================================================================
 
 
+@offload(key="filename", process_safe=True)
 async def add_footnote_robust_tool(
     filename: str,
     search_text: Optional[str] = None,
@@ -522,6 +533,56 @@ async def add_footnote_robust_tool(
     }
 
 
+@offload(key="filename", process_safe=True)
+async def add_footnotes_batch_tool(
+    filename: str,
+    footnotes: List[Dict[str, Any]],
+    validate_location: bool = True
+) -> Dict[str, Any]:
+    """
+    Add many footnotes in one pass, rewriting the document only once.
+    
+    Args:
+        filename: Path to the Word document
+        footnotes: List of dicts with footnote_text, either search_text or
+            paragraph_index, and an optional position ("after" or "before")
+        validate_location: Whether to validate placement restrictions
+    
+    Returns:
+        Dict with success status, message, and the ID assigned to each footnote
+    """
+    filename = ensure_docx_extension(filename)
+    
+    # Check if file is writeable
+    is_writeable, error_message = check_file_writeable(filename)
+    if not is_writeable:
+        return {
+            "success": False,
+            "message": f"Cannot modify document: {error_message}",
+            "details": None
+        }
+    
+    if not isinstance(footnotes, list) or not all(isinstance(entry, dict) for entry in footnotes):
+        return {
+            "success": False,
+            "message": "Invalid parameter: footnotes must be a list of objects",
+            "details": None
+        }
+    
+    success, message, details = add_footnotes_batch(
+        filename=filename,
+        footnotes=footnotes,
+        validate_location=validate_location
+    )
+    
+    return {
+        "success": success,
+        "message": message,
+        "details": details
+    }
+
+
+@offload(key="filename", process_safe=True)
 async def delete_footnote_robust_tool(
     filename: str,
     footnote_id: Optional[int] = None,
@@ -577,6 +638,7 @@ async def delete_footnote_robust_tool(
     }
 
 
+@offload(key="filename", process_safe=True)
 async def validate_footnotes_tool(filename: str) -> Dict[str, Any]:
     """
     Validate all footnotes in a document.
@@ -617,6 +679,7 @@ async def validate_footnotes_tool(filename: str) -> Dict[str, Any]:
 # Compatibility wrappers for robust tools (maintain backward compatibility)
 # ============================================================================
 
+@offload(key="filename", process_safe=True)
 async def add_footnote_to_document_robust(
     filename: str, 
     paragraph_index: int, 
@@ -634,6 +697,7 @@ async def add_footnote_to_document_robust(
     return result["message"]
 
 
+@offload(key="filename", process_safe=True)
 async def add_footnote_after_text_robust(
     filename: str,
     search_text: str,
@@ -659,6 +723,7 @@ async def add_footnote_after_text_robust(
     return result["message"]
 
 
+@offload(key="filename", process_safe=True)
 async def add_footnote_before_text_robust(
     filename: str,
     search_text: str,
@@ -684,6 +749,7 @@ async def add_footnote_before_text_robust(
     return result["message"]
 
 
+@offload(key="filename", process_safe=True)
 async def delete_footnote_from_document_robust(
     filename: str,
     footnote_id: Optional[int] = None,
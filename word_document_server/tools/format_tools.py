@@ -12,16 +12,19 @@ from docx.enum.text import WD_COLOR_INDEX
 from docx.enum.style import WD_STYLE_TYPE
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
+from word_document_server.utils.executor import offload
 from word_document_server.core.styles import create_style
 from word_document_server.core.tables import (
     apply_table_style, set_cell_shading_by_position, apply_alternating_row_shading,
     highlight_header_row, merge_cells, merge_cells_horizontal, merge_cells_vertical,
     set_cell_alignment_by_position, set_table_alignment, set_column_width_by_position,
     set_column_widths, set_table_width as set_table_width_func, auto_fit_table,
-    format_cell_text_by_position, set_cell_padding_by_position
+    format_cell_text_by_position, set_cell_padding_by_position, set_cell_shading
 )
+from word_document_server.core.content import format_text_range, get_table_cell
 
 
+@offload(key="filename", process_safe=True)
 async def format_text(filename: str, paragraph_index: int, start_pos: int, end_pos: int, 
                      bold: Optional[bool] = None, italic: Optional[bool] = None, 
                      underline: Optional[bool] = None, color: Optional[str] = None,
@@ -63,68 +66,11 @@ async def format_text(filename: str, paragraph_index: int, start_pos: int, end_p
     try:
         doc = Document(filename)
         
-        # Validate paragraph index
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return f"Invalid paragraph index. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})."
-        
-        paragraph = doc.paragraphs[paragraph_index]
-        text = paragraph.text
-        
-        # Validate text positions
-        if start_pos < 0 or end_pos > len(text) or start_pos >= end_pos:
-            return f"Invalid text positions. Paragraph has {len(text)} characters."
-        
-        # Get the text to format
-        target_text = text[start_pos:end_pos]
-        
-        # Clear existing runs and create three runs: before, target, after
-        for run in paragraph.runs:
-            run.clear()
-        
-        # Add text before target
-        if start_pos > 0:
-            run_before = paragraph.add_run(text[:start_pos])
-        
-        # Add target text with formatting
-        run_target = paragraph.add_run(target_text)
-        if bold is not None:
-            run_target.bold = bold
-        if italic is not None:
-            run_target.italic = italic
-        if underline is not None:
-            run_target.underline = underline
-        if color:
-            # Define common RGB colors
-            color_map = {
-                'red': RGBColor(255, 0, 0),
-                'blue': RGBColor(0, 0, 255),
-                'green': RGBColor(0, 128, 0),
-                'yellow': RGBColor(255, 255, 0),
-                'black': RGBColor(0, 0, 0),
-                'gray': RGBColor(128, 128, 128),
-                'white': RGBColor(255, 255, 255),
-                'purple': RGBColor(128, 0, 128),
-                'orange': RGBColor(255, 165, 0)
-            }
-            
-            try:
-                if color.lower() in color_map:
-                    # Use predefined RGB color
-                    run_target.font.color.rgb = color_map[color.lower()]
-                else:
-                    # Try to set color by name
-                    run_target.font.color.rgb = RGBColor.from_string(color)
-            except Exception as e:
-                # If all else fails, default to black
-                run_target.font.color.rgb = RGBColor(0, 0, 0)
-        if font_size:
-            run_target.font.size = Pt(font_size)
-        if font_name:
-            run_target.font.name = font_name
-        
-        # Add text after target
-        if end_pos < len(text):
-            run_after = paragraph.add_run(text[end_pos:])
+        try:
+            target_text = format_text_range(doc, paragraph_index, start_pos, end_pos, bold, italic,
+                                            underline, color, font_size, font_name)
+        except ValueError as e:
+            return str(e)
         
         doc.save(filename)
         return f"Text '{target_text}' formatted successfully in paragraph {paragraph_index}."
@@ -132,6 +78,7 @@ async def format_text(filename: str, paragraph_index: int, start_pos: int, end_p
         return f"Failed to format text: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def create_custom_style(filename: str, style_name: str, 
                              bold: Optional[bool] = None, italic: Optional[bool] = None,
                              font_size: Optional[int] = None, font_name: Optional[str] = None,
@@ -189,6 +136,7 @@ async def create_custom_style(filename: str, style_name: str,
         return f"Failed to create style: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def format_table(filename: str, table_index: int, 
                       has_header_row: Optional[bool] = None,
                       border_style: Optional[str] = None,
@@ -233,6 +181,7 @@ async def format_table(filename: str, table_index: int,
         return f"Failed to format table: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def set_table_cell_shading(filename: str, table_index: int, row_index: int, 
                                 col_index: int, fill_color: str, pattern: str = "clear") -> str:
     """Apply shading/filling to a specific table cell.
@@ -266,21 +215,14 @@ async def set_table_cell_shading(filename: str, table_index: int, row_index: int
     try:
         doc = Document(filename)
         
-        # Validate table index
-        if table_index < 0 or table_index >= len(doc.tables):
-            return f"Invalid table index. Document has {len(doc.tables)} tables (0-{len(doc.tables)-1})."
-        
-        table = doc.tables[table_index]
-        
-        # Validate row and column indices
-        if row_index < 0 or row_index >= len(table.rows):
-            return f"Invalid row index. Table has {len(table.rows)} rows (0-{len(table.rows)-1})."
-        
-        if col_index < 0 or col_index >= len(table.rows[row_index].cells):
-            return f"Invalid column index. Row has {len(table.rows[row_index].cells)} cells (0-{len(table.rows[row_index].cells)-1})."
+        # Validate table, row and column indices
+        try:
+            cell = get_table_cell(doc, table_index, row_index, col_index)
+        except ValueError as e:
+            return str(e)
         
         # Apply cell shading
-        success = set_cell_shading_by_position(table, row_index, col_index, fill_color, pattern)
+        success = set_cell_shading(cell, fill_color=fill_color, pattern=pattern)
         
         if success:
             doc.save(filename)
@@ -291,6 +233,7 @@ async def set_table_cell_shading(filename: str, table_index: int, row_index: int
         return f"Failed to apply cell shading: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def apply_table_alternating_rows(filename: str, table_index: int, 
                                      color1: str = "FFFFFF", color2: str = "F2F2F2") -> str:
     """Apply alternating row colors to a table for better readability.
@@ -338,6 +281,7 @@ async def apply_table_alternating_rows(filename: str, table_index: int,
         return f"Failed to apply alternating row shading: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def highlight_table_header(filename: str, table_index: int, 
                                header_color: str = "4472C4", text_color: str = "FFFFFF") -> str:
     """Apply special highlighting to table header row.
@@ -385,6 +329,7 @@ async def highlight_table_header(filename: str, table_index: int,
         return f"Failed to apply header highlighting: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def merge_table_cells(filename: str, table_index: int, start_row: int, start_col: int, 
                           end_row: int, end_col: int) -> str:
     """Merge cells in a rectangular area of a table.
@@ -445,6 +390,7 @@ async def merge_table_cells(filename: str, table_index: int, start_row: int, sta
         return f"Failed to merge cells: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def merge_table_cells_horizontal(filename: str, table_index: int, row_index: int, 
                                      start_col: int, end_col: int) -> str:
     """Merge cells horizontally in a single row.
@@ -496,6 +442,7 @@ async def merge_table_cells_horizontal(filename: str, table_index: int, row_inde
         return f"Failed to merge cells horizontally: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def merge_table_cells_vertical(filename: str, table_index: int, col_index: int, 
                                    start_row: int, end_row: int) -> str:
     """Merge cells vertically in a single column.
@@ -547,6 +494,7 @@ async def merge_table_cells_vertical(filename: str, table_index: int, col_index:
         return f"Failed to merge cells vertically: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def set_table_cell_alignment(filename: str, table_index: int, row_index: int, col_index: int,
                                  horizontal: str = "left", vertical: str = "top") -> str:
     """Set text alignment for a specific table cell.
@@ -608,6 +556,7 @@ async def set_table_cell_alignment(filename: str, table_index: int, row_index: i
         return f"Failed to set cell alignment: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def set_table_alignment_all(filename: str, table_index: int, 
                                 horizontal: str = "left", vertical: str = "top") -> str:
     """Set text alignment for all cells in a table.
@@ -665,6 +614,7 @@ async def set_table_alignment_all(filename: str, table_index: int,
         return f"Failed to set table alignment: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def set_table_column_width(filename: str, table_index: int, col_index: int, 
                                 width: float, width_type: str = "points") -> str:
     """Set the width of a specific table column.
@@ -746,6 +696,7 @@ async def set_table_column_width(filename: str, table_index: int, col_index: int
         return f"Failed to set column width: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def set_table_column_widths(filename: str, table_index: int, widths: list, 
                                  width_type: str = "points") -> str:
     """Set the widths of multiple table columns.
@@ -822,6 +773,7 @@ async def set_table_column_widths(filename: str, table_index: int, widths: list,
         return f"Failed to set column widths: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def set_table_width(filename: str, table_index: int, width: float, 
                          width_type: str = "points") -> str:
     """Set the overall width of a table.
@@ -893,6 +845,7 @@ async def set_table_width(filename: str, table_index: int, width: float,
         return f"Failed to set table width: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def auto_fit_table_columns(filename: str, table_index: int) -> str:
     """Set table columns to auto-fit based on content.
     
@@ -937,6 +890,7 @@ async def auto_fit_table_columns(filename: str, table_index: int) -> str:
         return f"Failed to set table auto-fit: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def format_table_cell_text(filename: str, table_index: int, row_index: int, col_index: int,
                                  text_content: Optional[str] = None, bold: Optional[bool] = None, italic: Optional[bool] = None,
                                  underline: Optional[bool] = None, color: Optional[str] = None, font_size: Optional[int] = None,
@@ -1022,6 +976,7 @@ async def format_table_cell_text(filename: str, table_index: int, row_index: int
         return f"Failed to format cell text: {str(e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def set_table_cell_padding(filename: str, table_index: int, row_index: int, col_index: int,
                                  top: Optional[float] = None, bottom: Optional[float] = None, left: Optional[float] = None, 
                                  right: Optional[float] = None, unit: str = "points") -> str:
@@ -13,6 +13,7 @@ from docx import Document
 import msoffcrypto 
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
+from word_document_server.utils.executor import offload
 
 
 
@@ -23,6 +24,7 @@ from word_document_server.core.protection import (
 )
 
 
+@offload(key="filename", process_safe=True)
 async def protect_document(filename: str, password: str) -> str:
     """Add password protection to a Word document.
 
@@ -79,6 +81,7 @@ async def protect_document(filename: str, password: str) -> str:
              return f"Failed to encrypt document {filename}: {str(e)}. Also failed to restore original file: {str(restore_e)}"
 
 
+@offload(key="filename", process_safe=True)
 async def add_restricted_editing(filename: str, password: str, editable_sections: List[str]) -> str:
     """Add restricted editing to a Word document, allowing editing only in specified sections.
 
@@ -119,6 +122,7 @@ async def add_restricted_editing(filename: str, password: str, editable_sections
     except Exception as e:
         return f"Failed to add restricted editing: {str(e)}"
 
+@offload(key="filename", process_safe=True)
 async def add_digital_signature(filename: str, signer_name: str, reason: Optional[str] = None) -> str:
     """Add a digital signature to a Word document.
 
@@ -170,6 +174,7 @@ async def add_digital_signature(filename: str, signer_name: str, reason: Optiona
     except Exception as e:
         return f"Failed to add digital signature: {str(e)}"
 
+@offload(key="filename", process_safe=True)
 async def verify_document(filename: str, password: Optional[str] = None) -> str:
     """Verify document protection and/or digital signature.
 
@@ -222,6 +227,7 @@ async def verify_document(filename: str, password: Optional[str] = None) -> str:
     except Exception as e:
         return f"Failed to verify document: {str(e)}"
 
+@offload(key="filename", process_safe=True)
 async def unprotect_document(filename: str, password: str) -> str:
     """Remove password protection from a Word document.
 
@@ -0,0 +1,464 @@
+"""
+In-memory document store for Word Document Server.
+
+Documents created with create_temp or load_template live here, keyed by file_id.
+Each entry keeps the parsed python-docx Document alive between tool calls, so an
+editing session parses the package once and only serializes it again when the
+bytes are actually needed (download, upload or eviction).
+
+The store is bounded: entries are evicted least-recently-used first once the
+byte budget is exceeded, and dropped once they have not been touched for the
+configured TTL. Evicted entries can optionally be spilled to disk, from where
+they are transparently restored on their next access. Without a spill
+directory, documents with unserialized edits are never evicted to meet the
+byte budget; the TTL still drops them, with a warning in the log.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, BinaryIO, Callable, Dict, NamedTuple, Optional, Tuple
+from docx import Document
+
+from word_document_server.utils.package_writer import save_document
+from word_document_server.utils.paragraph_index import invalidate_paragraph_index
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when the corresponding environment variables are not set
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB of serialized documents
+DEFAULT_TTL = 24 * 60 * 60  # 24 hours since last access
+
+
+def missing_document(file_id: str) -> str:
+    """Message for a file_id that is not, or no longer, in the store."""
+    return (f"No document found with ID {file_id}. Documents are dropped after MCP_STORE_TTL seconds "
+            "without access, and evicted when the store is full unless MCP_STORE_SPILL_DIR is set "
+            "(documents with unsaved edits are kept until they expire).")
+
+
+class _StoreEntry:
+    """A single document held in memory by the store."""
+
+    __slots__ = ("filename", "data", "document", "dirty", "size", "accessed", "version", "digest", "upload")
+
+    def __init__(self, filename: str, data: Optional[bytes] = None, document=None, version: int = 1,
+                 digest: Optional[str] = None, upload: Optional[Tuple[str, str]] = None):
+        self.filename = filename
+        self.data = data
+        self.document = document
+        # A document passed in without bytes has never been serialized
+        self.dirty = data is None
+        self.size = len(data) if data is not None else 0
+        self.accessed = 0.0
+        self.version = version
+        # SHA-256 of data, computed on first download
+        self.digest = digest
+        # (digest, object key) of the last upload, see record_upload()
+        self.upload = upload
+
+
+class _SpilledEntry:
+    """A document that was evicted from memory and written to the spill directory."""
+
+    __slots__ = ("filename", "path", "size", "accessed", "version", "digest", "upload")
+
+    def __init__(self, filename: str, path: str, size: int, accessed: float, version: int,
+                 digest: Optional[str] = None, upload: Optional[Tuple[str, str]] = None):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.accessed = accessed
+        self.version = version
+        self.digest = digest
+        self.upload = upload
+
+
+class DownloadSource(NamedTuple):
+    """The serialized document to send for a download (see DocumentStore.download_source)."""
+
+    filename: str
+    size: int
+    # SHA-256 of the bytes, usable as a strong ETag
+    digest: str
+    # Exactly one of data and file is set; the caller closes file
+    data: Optional[bytes]
+    file: Optional[BinaryIO]
+
+
+class DocumentStore:
+    """
+    Store of in-memory Word documents keyed by file_id.
+
+    Tools call open() to get the live Document for a file_id and mark_dirty()
+    after changing it. get_bytes() serializes a dirty document on demand and
+    caches the result until the next edit.
+
+    Every entry carries a version number, starting at 1 and incremented by
+    each mark_dirty(), so callers can detect that a document changed since
+    they last looked at it (optimistic concurrency, see version()).
+
+    Memory is accounted by the size of each entry's serialized package (the
+    parsed tree of an open document is a multiple of that, so size max_bytes
+    with some headroom). A max_bytes or ttl of 0 disables that limit.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL,
+                 spill_dir: Optional[str] = None, spill_max_bytes: int = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_bytes: Byte budget for documents held in memory
+            ttl: Seconds since last access after which an entry is dropped
+            spill_dir: Directory for evicted documents; eviction drops them if None
+            spill_max_bytes: Byte budget for the spill directory
+            clock: Time source, in seconds
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[str, _StoreEntry]" = OrderedDict()
+        self._spilled: "OrderedDict[str, _SpilledEntry]" = OrderedDict()
+        self._bytes = 0
+        self._spilled_bytes = 0
+        self._counters = {"evictions": 0, "expirations": 0, "spills": 0, "restores": 0, "dropped_unsaved": 0}
+        self._lock = threading.RLock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "DocumentStore":
+        """
+        Create a store configured from environment variables.
+
+        MCP_STORE_MAX_BYTES, MCP_STORE_TTL, MCP_STORE_SPILL_DIR and
+        MCP_STORE_SPILL_MAX_BYTES map to the constructor arguments.
+        """
+        return cls(
+            max_bytes=int(os.getenv('MCP_STORE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            ttl=float(os.getenv('MCP_STORE_TTL', DEFAULT_TTL)),
+            spill_dir=os.getenv('MCP_STORE_SPILL_DIR') or None,
+            spill_max_bytes=int(os.getenv('MCP_STORE_SPILL_MAX_BYTES', 0)),
+        )
+
+    def __contains__(self, file_id: str) -> bool:
+        with self._lock:
+            self._expire()
+            return file_id in self._entries or file_id in self._spilled
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._entries) + len(self._spilled)
+
+    def add(self, filename: str, data: Optional[bytes] = None, document=None,
+            file_id: Optional[str] = None) -> str:
+        """
+        Add a document to the store.
+
+        Args:
+            filename: Name used when the document is downloaded or uploaded
+            data: Serialized .docx bytes
+            document: Already parsed Document (used when no bytes are given)
+            file_id: Optional ID to store the document under
+
+        Returns:
+            The file_id of the new entry
+        """
+        if data is None and document is None:
+            raise ValueError("Either data or document must be provided")
+        file_id = file_id or str(uuid.uuid4())
+        with self._lock:
+            self._remove(file_id)
+            entry = _StoreEntry(filename, data, document)
+            entry.accessed = self._clock()
+            self._entries[file_id] = entry
+            self._bytes += entry.size
+            self._expire()
+            self._enforce_budget(keep=file_id)
+        return file_id
+
+    def filename(self, file_id: str) -> str:
+        """Return the filename of a stored document."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(file_id) or self._spilled.get(file_id)
+            if entry is None:
+                raise KeyError(missing_document(file_id))
+            return entry.filename
+
+    def open(self, file_id: str):
+        """
+        Return the live Document for file_id, parsing it on first access.
+
+        Changes made to the returned Document must be followed by mark_dirty().
+        """
+        with self._lock:
+            entry = self._touch(file_id)
+            if entry.document is None:
+                entry.document = Document(BytesIO(entry.data))
+            return entry.document
+
+    def mark_dirty(self, file_id: str) -> int:
+        """
+        Record that the live Document for file_id has unsaved changes; return its new version.
+
+        The Document's paragraph index is dropped, since the edit may have
+        changed paragraph text or styles in place.
+        """
+        with self._lock:
+            entry = self._touch(file_id)
+            entry.dirty = True
+            entry.version += 1
+            if entry.document is not None:
+                invalidate_paragraph_index(entry.document)
+            return entry.version
+
+    def version(self, file_id: str) -> int:
+        """Return the version of file_id, which changes with every edit."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(file_id) or self._spilled.get(file_id)
+            if entry is None:
+                raise KeyError(missing_document(file_id))
+            return entry.version
+
+    def etag(self, file_id: str) -> str:
+        """Return the HTTP entity tag the download endpoint sends for file_id."""
+        return f'"{self.digest(file_id)}"'
+
+    def get_bytes(self, file_id: str) -> bytes:
+        """Return the serialized document, saving the live Document if it is dirty."""
+        with self._lock:
+            entry = self._touch(file_id)
+            self._serialize(entry)
+            self._enforce_budget(keep=file_id)
+            return entry.data
+
+    def download_source(self, file_id: str) -> DownloadSource:
+        """
+        Return the serialized document for a download, saving it first if dirty.
+
+        Spilled documents are served from their spill file (opened here, so a
+        concurrent restore cannot remove it first) instead of being restored
+        into memory.
+        """
+        with self._lock:
+            self._expire()
+            spilled = self._spilled.get(file_id)
+            if spilled is not None:
+                return DownloadSource(spilled.filename, spilled.size, spilled.digest,
+                                      None, open(spilled.path, 'rb'))
+            entry = self._touch(file_id)
+            self._serialize(entry)
+            self._enforce_budget(keep=file_id)
+            data, digest = entry.data, entry.digest
+        digest = digest or self._hash(entry, data)
+        return DownloadSource(entry.filename, len(data), digest, data, None)
+
+    def digest(self, file_id: str) -> str:
+        """Return the SHA-256 of the serialized document, saving it first if dirty."""
+        with self._lock:
+            self._expire()
+            spilled = self._spilled.get(file_id)
+            if spilled is not None:
+                return spilled.digest
+            entry = self._touch(file_id)
+            self._serialize(entry)
+            self._enforce_budget(keep=file_id)
+            data, digest = entry.data, entry.digest
+        return digest or self._hash(entry, data)
+
+    def last_upload(self, file_id: str) -> Optional[Tuple[str, str]]:
+        """Return (digest, object key) recorded by the last record_upload(), or None."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(file_id) or self._spilled.get(file_id)
+            if entry is None:
+                raise KeyError(missing_document(file_id))
+            return entry.upload
+
+    def record_upload(self, file_id: str, digest: str, key: str) -> None:
+        """Remember that the content with the given digest was uploaded under key."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(file_id) or self._spilled.get(file_id)
+            if entry is None:
+                raise KeyError(missing_document(file_id))
+            entry.upload = (digest, key)
+
+    def revert(self, file_id: str, data: bytes, version: Optional[int] = None) -> None:
+        """
+        Reset file_id to a previously captured get_bytes() snapshot.
+
+        The live Document is dropped and will be parsed from data on next open().
+        Pass the version() captured with the snapshot to restore it as well;
+        otherwise the version is incremented like any other change.
+        """
+        with self._lock:
+            entry = self._touch(file_id)
+            entry.version = version if version is not None else entry.version + 1
+            self._bytes += len(data) - entry.size
+            entry.data = data
+            entry.digest = None
+            entry.document = None
+            entry.dirty = False
+            entry.size = len(data)
+
+    def discard(self, file_id: str) -> None:
+        """Remove a document from the store if present."""
+        with self._lock:
+            self._remove(file_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current size, entry counts and eviction counters."""
+        with self._lock:
+            self._expire()
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "spilled_entries": len(self._spilled),
+                "spilled_bytes": self._spilled_bytes,
+                "spill_max_bytes": self.spill_max_bytes,
+                **self._counters,
+            }
+
+    # ------------------------------------------------------------------
+    # Internal helpers (callers must hold self._lock)
+    # ------------------------------------------------------------------
+
+    def _touch(self, file_id: str) -> _StoreEntry:
+        """Return the in-memory entry for file_id, restoring it from disk if spilled."""
+        self._expire()
+        entry = self._entries.get(file_id)
+        if entry is None:
+            spilled = self._spilled.pop(file_id, None)
+            if spilled is None:
+                raise KeyError(missing_document(file_id))
+            entry = self._restore(file_id, spilled)
+        else:
+            self._entries.move_to_end(file_id)
+        entry.accessed = self._clock()
+        return entry
+
+    def _restore(self, file_id: str, spilled: _SpilledEntry) -> _StoreEntry:
+        self._spilled_bytes -= spilled.size
+        with open(spilled.path, 'rb') as f:
+            data = f.read()
+        os.remove(spilled.path)
+        entry = _StoreEntry(spilled.filename, data, version=spilled.version, digest=spilled.digest,
+                            upload=spilled.upload)
+        self._entries[file_id] = entry
+        self._bytes += entry.size
+        self._counters["restores"] += 1
+        self._enforce_budget(keep=file_id)
+        return entry
+
+    def _hash(self, entry: _StoreEntry, data: bytes) -> str:
+        """Hash data outside the lock; cache it on entry unless the entry changed meanwhile."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if entry.data is data:
+                entry.digest = digest
+        return digest
+
+    def _serialize(self, entry: _StoreEntry) -> None:
+        if not entry.dirty:
+            return
+        buffer = BytesIO()
+        # Parts the edit did not touch are copied from the previous bytes as-is
+        save_document(entry.document, buffer, source=entry.data)
+        entry.data = buffer.getvalue()
+        entry.digest = None
+        entry.dirty = False
+        self._bytes += len(entry.data) - entry.size
+        entry.size = len(entry.data)
+
+    def _enforce_budget(self, keep: Optional[str] = None) -> None:
+        """
+        Evict least recently used entries until the byte budget is met.
+
+        Without a spill directory, entries with unserialized edits are skipped,
+        so the budget may be exceeded rather than losing them.
+        """
+        if not self.max_bytes:
+            return
+        while self._bytes > self.max_bytes:
+            victim = next((key for key, entry in self._entries.items()
+                           if key != keep and (self.spill_dir or not entry.dirty)), None)
+            if victim is None:
+                logger.warning("Document store over budget (%d of %d bytes); remaining documents have unsaved edits",
+                               self._bytes, self.max_bytes)
+                break
+            self._evict(victim)
+
+    def _evict(self, file_id: str) -> None:
+        entry = self._entries.pop(file_id)
+        self._bytes -= entry.size
+        self._counters["evictions"] += 1
+        if not self.spill_dir:
+            logger.info("Evicted document %s (%s, %d bytes) from the store", file_id, entry.filename, entry.size)
+            return
+        self._serialize(entry)
+        path = os.path.join(self.spill_dir, f"{file_id}.docx")
+        with open(path, 'wb') as f:
+            f.write(entry.data)
+        # Downloads of spilled documents need the hash without reading the file
+        digest = entry.digest or hashlib.sha256(entry.data).hexdigest()
+        self._spilled[file_id] = _SpilledEntry(entry.filename, path, len(entry.data), entry.accessed,
+                                               entry.version, digest, entry.upload)
+        self._spilled_bytes += len(entry.data)
+        self._counters["spills"] += 1
+        if self.spill_max_bytes:
+            while self._spilled_bytes > self.spill_max_bytes and self._spilled:
+                self._drop_spilled(next(iter(self._spilled)))
+
+    def _expire(self) -> None:
+        """Drop entries whose last access is older than the TTL."""
+        if not self.ttl:
+            return
+        deadline = self._clock() - self.ttl
+        # Both tiers are kept in access order, so expired entries are at the front
+        while self._entries:
+            file_id, entry = next(iter(self._entries.items()))
+            if entry.accessed > deadline:
+                break
+            del self._entries[file_id]
+            self._bytes -= entry.size
+            self._counters["expirations"] += 1
+            if entry.dirty:
+                self._counters["dropped_unsaved"] += 1
+                logger.warning("Expired document %s (%s) with unsaved edits after %s seconds idle",
+                               file_id, entry.filename, self.ttl)
+            else:
+                logger.info("Expired document %s (%s) after %s seconds idle", file_id, entry.filename, self.ttl)
+        while self._spilled:
+            file_id, spilled = next(iter(self._spilled.items()))
+            if spilled.accessed > deadline:
+                break
+            self._drop_spilled(file_id)
+            self._counters["expirations"] += 1
+            logger.info("Expired spilled document %s (%s) after %s seconds idle", file_id, spilled.filename, self.ttl)
+
+    def _drop_spilled(self, file_id: str) -> None:
+        spilled = self._spilled.pop(file_id)
+        self._spilled_bytes -= spilled.size
+        try:
+            os.remove(spilled.path)
+        except OSError:
+            pass
+
+    def _remove(self, file_id: str) -> None:
+        entry = self._entries.pop(file_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        if file_id in self._spilled:
+            self._drop_spilled(file_id)
@@ -2,112 +2,118 @@
 Document utility functions for Word Document Server.
 """
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from docx import Document
-from docx.oxml.table import CT_Tbl
-from docx.oxml.text.paragraph import CT_P
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
+from docx.text.paragraph import Paragraph
 
+from word_document_server.utils.docx_stream import count_tables, iter_document_text, read_document_metadata, scan_document
+from word_document_server.utils.outline import DocumentOutline
+from word_document_server.utils.paragraph_index import get_paragraph_index
+from word_document_server.utils.read_cache import get_read_cache
+from word_document_server.utils.text_replace import replace_text_many
 
-def get_document_properties(doc_path: str) -> Dict[str, Any]:
-    """Get properties of a Word document."""
+_W_P = qn('w:p')
+_W_SECTPR = qn('w:sectPr')
+
+
+def get_document_properties(doc_path: str, exact: bool = False) -> Dict[str, Any]:
+    """
+    Get properties of a Word document.
+    
+    By default the counts are the statistics stored in docProps/app.xml by
+    the application that last saved the file, and table_count comes from a
+    quick scan for table tags. python-docx never updates app.xml, so files it
+    saved (including everything this server writes) carry the template's
+    zeros. With exact=True, or when app.xml has no statistics, only zeros or
+    was written by python-docx, words, characters, paragraphs and tables are
+    counted from the document body in a single streaming pass. page_count
+    always comes from app.xml, since pages depend on layout; it is None if
+    the file does not record it.
+    """
     import os
     if not os.path.exists(doc_path):
         return {"error": f"Document {doc_path} does not exist"}
     
     try:
-        doc = Document(doc_path)
-        core_props = doc.core_properties
+        metadata = read_document_metadata(doc_path)
+        properties = {key: metadata[key] for key in (
+            "title", "author", "subject", "keywords", "created", "modified",
+            "last_modified_by", "revision"
+        )}
+        properties["page_count"] = metadata["pages"]
+        
+        if not exact and _app_statistics_usable(metadata):
+            properties.update({
+                "word_count": metadata["words"],
+                "character_count": metadata["characters"],
+                "paragraph_count": metadata["paragraphs"],
+                "table_count": count_tables(doc_path),
+                "counts_source": "app.xml"
+            })
+            return properties
         
-        return {
-            "title": core_props.title or "",
-            "author": core_props.author or "",
-            "subject": core_props.subject or "",
-            "keywords": core_props.keywords or "",
-            "created": str(core_props.created) if core_props.created else "",
-            "modified": str(core_props.modified) if core_props.modified else "",
-            "last_modified_by": core_props.last_modified_by or "",
-            "revision": core_props.revision or 0,
-            "page_count": len(doc.sections),
-            "word_count": sum(len(paragraph.text.split()) for paragraph in doc.paragraphs),
-            "paragraph_count": len(doc.paragraphs),
-            "table_count": len(doc.tables)
-        }
+        # Streamed from the package; no python-docx Document is built
+        counts = scan_document(doc_path)
+        properties.update({
+            "word_count": counts["word_count"],
+            "character_count": counts["character_count"],
+            "paragraph_count": counts["paragraph_count"],
+            "table_count": counts["table_count"],
+            "section_count": counts["section_count"],
+            "counts_source": "document.xml"
+        })
+        return properties
     except Exception as e:
         return {"error": f"Failed to get document properties: {str(e)}"}
 
 
+def _app_statistics_usable(metadata: Dict[str, Any]) -> bool:
+    """Whether the app.xml statistics were plausibly written by a word processor that counted."""
+    if metadata["words"] is None or "python-docx" in (metadata["application"] or ""):
+        return False
+    # Zeros are what the python-docx template carries; an empty body scans quickly anyway
+    return bool(metadata["words"] or metadata["paragraphs"])
+
+
 def extract_document_text(doc_path: str) -> str:
-    """Extract all text from a Word document."""
+    """Extract all text from a Word document, paragraphs and table cells in document order."""
     import os
     if not os.path.exists(doc_path):
         return f"Document {doc_path} does not exist"
     
     try:
-        doc = Document(doc_path)
-        text = []
-        
-        for paragraph in doc.paragraphs:
-            text.append(paragraph.text)
-            
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        text.append(paragraph.text)
-        
-        return "\n".join(text)
+        return "\n".join(iter_document_text(doc_path))
     except Exception as e:
         return f"Failed to extract text: {str(e)}"
 
 
-def get_document_structure(doc_path: str) -> Dict[str, Any]:
-    """Get the structure of a Word document."""
+def get_document_structure(doc_path: str, headings_only: bool = False, start: int = 0,
+                           limit: Optional[int] = None, styles: Optional[List[str]] = None,
+                           include_tables: bool = True) -> Dict[str, Any]:
+    """
+    Get the structure of a Word document.
+
+    The outline is read in one streaming pass and cached until the file
+    changes, so later pages and views are served without parsing it again.
+
+    Args:
+        doc_path: Path to the Word document
+        headings_only: Only list Title and Heading paragraphs, with their level
+        start: Position of the first paragraph to return within the view
+        limit: Maximum number of paragraphs to return (None for all)
+        styles: Only list paragraphs with one of these style names
+        include_tables: Include the table summaries
+    """
     import os
     if not os.path.exists(doc_path):
         return {"error": f"Document {doc_path} does not exist"}
     
     try:
-        doc = Document(doc_path)
-        structure = {
-            "paragraphs": [],
-            "tables": []
-        }
-        
-        # Get paragraphs
-        for i, para in enumerate(doc.paragraphs):
-            structure["paragraphs"].append({
-                "index": i,
-                "text": para.text[:100] + ("..." if len(para.text) > 100 else ""),
-                "style": para.style.name if para.style else "Normal"
-            })
-        
-        # Get tables
-        for i, table in enumerate(doc.tables):
-            table_data = {
-                "index": i,
-                "rows": len(table.rows),
-                "columns": len(table.columns),
-                "preview": []
-            }
-            
-            # Get sample of table data
-            max_rows = min(3, len(table.rows))
-            for row_idx in range(max_rows):
-                row_data = []
-                max_cols = min(3, len(table.columns))
-                for col_idx in range(max_cols):
-                    try:
-                        cell_text = table.cell(row_idx, col_idx).text
-                        row_data.append(cell_text[:20] + ("..." if len(cell_text) > 20 else ""))
-                    except IndexError:
-                        row_data.append("N/A")
-                table_data["preview"].append(row_data)
-            
-            structure["tables"].append(table_data)
-        
-        return structure
+        outline = get_read_cache().get_or_compute(doc_path, "document_outline", (),
+                                                  lambda: DocumentOutline.from_docx(doc_path))
+        return outline.page(headings_only, start, limit, styles, include_tables)
     except Exception as e:
         return {"error": f"Failed to get document structure: {str(e)}"}
 
@@ -124,20 +130,17 @@ def find_paragraph_by_text(doc, text, partial_match=False):
     Returns:
         List of paragraph indices that match the criteria
     """
-    matching_paragraphs = []
-    
-    for i, para in enumerate(doc.paragraphs):
-        if partial_match and text in para.text:
-            matching_paragraphs.append(i)
-        elif not partial_match and para.text == text:
-            matching_paragraphs.append(i)
-            
-    return matching_paragraphs
+    index = get_paragraph_index(doc)
+    if partial_match:
+        return index.find_containing(text)
+    return index.find_exact(text)
 
 
 def find_and_replace_text(doc, old_text, new_text):
     """
     Find and replace text throughout the document, skipping Table of Contents (TOC) paragraphs.
+
+    Occurrences split across runs are replaced too (see replace_text_many).
     
     Args:
         doc: Document object
@@ -147,34 +150,7 @@ def find_and_replace_text(doc, old_text, new_text):
     Returns:
         Number of replacements made
     """
-    count = 0
-    
-    # Search in paragraphs
-    for para in doc.paragraphs:
-        # Skip TOC paragraphs
-        if para.style and para.style.name.startswith("TOC"):
-            continue
-        if old_text in para.text:
-            for run in para.runs:
-                if old_text in run.text:
-                    run.text = run.text.replace(old_text, new_text)
-                    count += 1
-    
-    # Search in tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for para in cell.paragraphs:
-                    # Skip TOC paragraphs in tables
-                    if para.style and para.style.name.startswith("TOC"):
-                        continue
-                    if old_text in para.text:
-                        for run in para.runs:
-                            if old_text in run.text:
-                                run.text = run.text.replace(old_text, new_text)
-                                count += 1
-    
-    return count
+    return replace_text_many(doc, {old_text: new_text})[old_text]
 
 
 def get_document_xml(doc_path: str) -> str:
@@ -191,6 +167,64 @@ def get_document_xml(doc_path: str) -> str:
         return f"Failed to extract XML: {str(e)}"
 
 
+def find_target_paragraph(doc, target_text: str = None, target_paragraph_index: int = None):
+    """
+    Locate the anchor paragraph for the insert_*_near_text functions.
+
+    Args:
+        doc: Document object
+        target_text: Text contained in the paragraph (first match, TOC paragraphs skipped)
+        target_paragraph_index: Paragraph index, used instead of target_text when given
+
+    Returns:
+        Tuple of (paragraph, paragraph_index)
+
+    Raises:
+        ValueError: If no matching paragraph exists
+    """
+    index = get_paragraph_index(doc)
+    if target_paragraph_index is not None:
+        if target_paragraph_index < 0 or target_paragraph_index >= len(index):
+            raise ValueError(f"Invalid target_paragraph_index: {target_paragraph_index}. Document has {len(index)} paragraphs.")
+        return Paragraph(index.element(target_paragraph_index), doc._body), target_paragraph_index
+    if target_text:
+        # Skip TOC paragraphs
+        matches = index.find_containing(target_text, skip_toc=True)
+        if matches:
+            return Paragraph(index.element(matches[0]), doc._body), matches[0]
+    raise ValueError("Target paragraph not found (by index or text). (TOC paragraphs are skipped in text search)")
+
+
+def _move_new_paragraphs(doc, anchor, anchor_index: int, new_paras: list, position: str = 'after') -> None:
+    """
+    Move paragraphs just appended with doc.add_paragraph next to anchor,
+    keeping the paragraph index in step.
+    """
+    # Detach them first so the index sees the body it was built for
+    for p in new_paras:
+        p._element.getparent().remove(p._element)
+    index = get_paragraph_index(doc)
+    for p in reversed(new_paras):
+        if position == 'before':
+            anchor._element.addprevious(p._element)
+        else:
+            anchor._element.addnext(p._element)
+    if position == 'before':
+        start, placed = anchor_index, list(reversed(new_paras))
+    else:
+        start, placed = anchor_index + 1, new_paras
+    for offset, p in enumerate(placed):
+        index.insert(start + offset, p._element)
+
+
+def insert_header_in_document(doc, target_text: str = None, header_title: str = "", position: str = 'after', header_style: str = 'Heading 1', target_paragraph_index: int = None) -> str:
+    """Insert a header into a loaded document. See insert_header_near_text; raises ValueError if the target is not found."""
+    para, anchor_index = find_target_paragraph(doc, target_text, target_paragraph_index)
+    new_para = doc.add_paragraph(header_title, style=header_style)
+    _move_new_paragraphs(doc, para, anchor_index, [new_para], position)
+    return f"Header '{header_title}' (style: {header_style}) inserted {position} paragraph (index {anchor_index})."
+
+
 def insert_header_near_text(doc_path: str, target_text: str = None, header_title: str = "", position: str = 'after', header_style: str = 'Heading 1', target_paragraph_index: int = None) -> str:
     """Insert a header (with specified style) before or after the target paragraph. Specify by text or paragraph index. Skips TOC paragraphs in text search."""
     import os
@@ -199,47 +233,26 @@ def insert_header_near_text(doc_path: str, target_text: str = None, header_title
         return f"Document {doc_path} does not exist"
     try:
         doc = Document(doc_path)
-        found = False
-        para = None
-        if target_paragraph_index is not None:
-            if target_paragraph_index < 0 or target_paragraph_index >= len(doc.paragraphs):
-                return f"Invalid target_paragraph_index: {target_paragraph_index}. Document has {len(doc.paragraphs)} paragraphs."
-            para = doc.paragraphs[target_paragraph_index]
-            found = True
-        else:
-            for i, p in enumerate(doc.paragraphs):
-                # Skip TOC paragraphs
-                if p.style and p.style.name.lower().startswith("toc"):
-                    continue
-                if target_text and target_text in p.text:
-                    para = p
-                    found = True
-                    break
-        if not found or para is None:
-            return f"Target paragraph not found (by index or text). (TOC paragraphs are skipped in text search)"
-        # Save anchor index before insertion
-        if target_paragraph_index is not None:
-            anchor_index = target_paragraph_index
-        else:
-            anchor_index = None
-            for i, p in enumerate(doc.paragraphs):
-                if p is para:
-                    anchor_index = i
-                    break
-        new_para = doc.add_paragraph(header_title, style=header_style)
-        if position == 'before':
-            para._element.addprevious(new_para._element)
-        else:
-            para._element.addnext(new_para._element)
+        try:
+            message = insert_header_in_document(doc, target_text, header_title, position, header_style, target_paragraph_index)
+        except ValueError as e:
+            return str(e)
         doc.save(doc_path)
-        if anchor_index is not None:
-            return f"Header '{header_title}' (style: {header_style}) inserted {position} paragraph (index {anchor_index})."
-        else:
-            return f"Header '{header_title}' (style: {header_style}) inserted {position} the target paragraph."
+        return message
     except Exception as e:
         return f"Failed to insert header: {str(e)}"
 
 
+def insert_line_or_paragraph_in_document(doc, target_text: str = None, line_text: str = "", position: str = 'after', line_style: str = None, target_paragraph_index: int = None) -> str:
+    """Insert a line or paragraph into a loaded document. See insert_line_or_paragraph_near_text; raises ValueError if the target is not found."""
+    para, anchor_index = find_target_paragraph(doc, target_text, target_paragraph_index)
+    # Determine style: use provided or match target
+    style = line_style if line_style else para.style
+    new_para = doc.add_paragraph(line_text, style=style)
+    _move_new_paragraphs(doc, para, anchor_index, [new_para], position)
+    return f"Line/paragraph inserted {position} paragraph (index {anchor_index}) with style '{style}'."
+
+
 def insert_line_or_paragraph_near_text(doc_path: str, target_text: str = None, line_text: str = "", position: str = 'after', line_style: str = None, target_paragraph_index: int = None) -> str:
     """
     Insert a new line or paragraph (with specified or matched style) before or after the target paragraph.
@@ -252,45 +265,12 @@ def insert_line_or_paragraph_near_text(doc_path: str, target_text: str = None, l
         return f"Document {doc_path} does not exist"
     try:
         doc = Document(doc_path)
-        found = False
-        para = None
-        if target_paragraph_index is not None:
-            if target_paragraph_index < 0 or target_paragraph_index >= len(doc.paragraphs):
-                return f"Invalid target_paragraph_index: {target_paragraph_index}. Document has {len(doc.paragraphs)} paragraphs."
-            para = doc.paragraphs[target_paragraph_index]
-            found = True
-        else:
-            for i, p in enumerate(doc.paragraphs):
-                # Skip TOC paragraphs
-                if p.style and p.style.name.lower().startswith("toc"):
-                    continue
-                if target_text and target_text in p.text:
-                    para = p
-                    found = True
-                    break
-        if not found or para is None:
-            return f"Target paragraph not found (by index or text). (TOC paragraphs are skipped in text search)"
-        # Save anchor index before insertion
-        if target_paragraph_index is not None:
-            anchor_index = target_paragraph_index
-        else:
-            anchor_index = None
-            for i, p in enumerate(doc.paragraphs):
-                if p is para:
-                    anchor_index = i
-                    break
-        # Determine style: use provided or match target
-        style = line_style if line_style else para.style
-        new_para = doc.add_paragraph(line_text, style=style)
-        if position == 'before':
-            para._element.addprevious(new_para._element)
-        else:
-            para._element.addnext(new_para._element)
+        try:
+            message = insert_line_or_paragraph_in_document(doc, target_text, line_text, position, line_style, target_paragraph_index)
+        except ValueError as e:
+            return str(e)
         doc.save(doc_path)
-        if anchor_index is not None:
-            return f"Line/paragraph inserted {position} paragraph (index {anchor_index}) with style '{style}'."
-        else:
-            return f"Line/paragraph inserted {position} the target paragraph with style '{style}'."
+        return message
     except Exception as e:
         return f"Failed to insert line/paragraph: {str(e)}"
 
@@ -334,6 +314,34 @@ def add_bullet_numbering(paragraph, num_id=1, level=0):
     return paragraph
 
 
+def insert_numbered_list_in_document(doc, target_text: str = None, list_items: list = None, position: str = 'after', target_paragraph_index: int = None, bullet_type: str = 'bullet') -> str:
+    """Insert a list into a loaded document. See insert_numbered_list_near_text; raises ValueError if the target is not found."""
+    para, anchor_index = find_target_paragraph(doc, target_text, target_paragraph_index)
+    # Determine numbering ID based on bullet_type
+    num_id = 1 if bullet_type == 'bullet' else 2
+
+    # Use ListParagraph style for proper list formatting
+    style_name = None
+    for candidate in ['List Paragraph', 'ListParagraph', 'Normal']:
+        try:
+            _ = doc.styles[candidate]
+            style_name = candidate
+            break
+        except KeyError:
+            continue
+
+    new_paras = []
+    for item in (list_items or []):
+        p = doc.add_paragraph(item, style=style_name)
+        # Add bullet numbering XML - this is the fix!
+        add_bullet_numbering(p, num_id=num_id, level=0)
+        new_paras.append(p)
+    # Move the new paragraphs to the correct position
+    _move_new_paragraphs(doc, para, anchor_index, new_paras, position)
+    list_type = "bulleted" if bullet_type == 'bullet' else "numbered"
+    return f"{list_type.capitalize()} list with {len(new_paras)} items inserted {position} paragraph (index {anchor_index})."
+
+
 def insert_numbered_list_near_text(doc_path: str, target_text: str = None, list_items: list = None, position: str = 'after', target_paragraph_index: int = None, bullet_type: str = 'bullet') -> str:
     """
     Insert a bulleted or numbered list before or after the target paragraph. Specify by text or paragraph index. Skips TOC paragraphs in text search.
@@ -353,66 +361,12 @@ def insert_numbered_list_near_text(doc_path: str, target_text: str = None, list_
         return f"Document {doc_path} does not exist"
     try:
         doc = Document(doc_path)
-        found = False
-        para = None
-        if target_paragraph_index is not None:
-            if target_paragraph_index < 0 or target_paragraph_index >= len(doc.paragraphs):
-                return f"Invalid target_paragraph_index: {target_paragraph_index}. Document has {len(doc.paragraphs)} paragraphs."
-            para = doc.paragraphs[target_paragraph_index]
-            found = True
-        else:
-            for i, p in enumerate(doc.paragraphs):
-                # Skip TOC paragraphs
-                if p.style and p.style.name.lower().startswith("toc"):
-                    continue
-                if target_text and target_text in p.text:
-                    para = p
-                    found = True
-                    break
-        if not found or para is None:
-            return f"Target paragraph not found (by index or text). (TOC paragraphs are skipped in text search)"
-        # Save anchor index before insertion
-        if target_paragraph_index is not None:
-            anchor_index = target_paragraph_index
-        else:
-            anchor_index = None
-            for i, p in enumerate(doc.paragraphs):
-                if p is para:
-                    anchor_index = i
-                    break
-        # Determine numbering ID based on bullet_type
-        num_id = 1 if bullet_type == 'bullet' else 2
-
-        # Use ListParagraph style for proper list formatting
-        style_name = None
-        for candidate in ['List Paragraph', 'ListParagraph', 'Normal']:
-            try:
-                _ = doc.styles[candidate]
-                style_name = candidate
-                break
-            except KeyError:
-                continue
-        if not style_name:
-            style_name = None  # fallback to default
-
-        new_paras = []
-        for item in (list_items or []):
-            p = doc.add_paragraph(item, style=style_name)
-            # Add bullet numbering XML - this is the fix!
-            add_bullet_numbering(p, num_id=num_id, level=0)
-            new_paras.append(p)
-        # Move the new paragraphs to the correct position
-        for p in reversed(new_paras):
-            if position == 'before':
-                para._element.addprevious(p._element)
-            else:
-                para._element.addnext(p._element)
+        try:
+            message = insert_numbered_list_in_document(doc, target_text, list_items, position, target_paragraph_index, bullet_type)
+        except ValueError as e:
+            return str(e)
         doc.save(doc_path)
-        list_type = "bulleted" if bullet_type == 'bullet' else "numbered"
-        if anchor_index is not None:
-            return f"{list_type.capitalize()} list with {len(new_paras)} items inserted {position} paragraph (index {anchor_index})."
-        else:
-            return f"{list_type.capitalize()} list with {len(new_paras)} items inserted {position} the target paragraph."
+        return message
     except Exception as e:
         return f"Failed to insert numbered list: {str(e)}"
 
@@ -443,41 +397,35 @@ def delete_block_under_header(doc, header_text):
     Remove all elements (paragraphs, tables, etc.) after the header (by text) and before the next heading/TOC (by style).
     Returns: (header_element, elements_removed)
     """
-    # Find the header paragraph by text (like delete_paragraph finds by index)
-    header_para = None
-    header_idx = None
-    
-    for i, para in enumerate(doc.paragraphs):
-        if para.text.strip().lower() == header_text.strip().lower():
-            header_para = para
-            header_idx = i
-            break
+    index = get_paragraph_index(doc)
     
-    if header_para is None:
+    # Find the header paragraph by text
+    matches = index.find_normalized(header_text)
+    if not matches:
         return None, 0
+    header_idx = matches[0]
+    header_el = index.element(header_idx)
     
-    # Find the next heading/TOC paragraph to determine the end of the block
-    end_idx = None
-    for i in range(header_idx + 1, len(doc.paragraphs)):
-        para = doc.paragraphs[i]
-        if para.style and para.style.name.lower().startswith(('heading', 'título', 'toc')):
-            end_idx = i
-            break
-    
-    # If no next heading found, delete until end of document
-    if end_idx is None:
-        end_idx = len(doc.paragraphs)
+    # Single pass over the following body children, up to the next heading/TOC
+    # paragraph or the end of the body (the final sectPr is never removed)
+    to_remove = []
+    paragraphs_removed = 0
+    el = header_el.getnext()
+    while el is not None and el.tag != _W_SECTPR:
+        if el.tag == _W_P:
+            if index.style_name(header_idx + 1 + paragraphs_removed).lower().startswith(('heading', 'título', 'toc')):
+                break
+            paragraphs_removed += 1
+        to_remove.append(el)
+        el = el.getnext()
     
-    # Remove paragraphs by index (like delete_paragraph does)
-    removed_count = 0
-    for i in range(header_idx + 1, end_idx):
-        if i < len(doc.paragraphs):  # Safety check
-            para = doc.paragraphs[header_idx + 1]  # Always remove the first paragraph after header
-            p = para._p
-            p.getparent().remove(p)
-            removed_count += 1
+    body = header_el.getparent()
+    for el in to_remove:
+        body.remove(el)
+    index.remove(header_idx + 1, header_idx + 1 + paragraphs_removed)
+    index.note_removed_elements(len(to_remove) - paragraphs_removed)
     
-    return header_para._p, removed_count
+    return header_el, len(to_remove)
 
 # --- Usage in replace_paragraph_block_below_header ---
 def replace_paragraph_block_below_header(
@@ -497,37 +445,98 @@ def replace_paragraph_block_below_header(
     
     doc = Document(doc_path)
     
-    # Find the header paragraph first
-    header_para = None
-    header_idx = None
-    for i, para in enumerate(doc.paragraphs):
-        para_text = para.text.strip().lower()
-        is_toc = is_toc_paragraph(para)
-        if para_text == header_text.strip().lower() and not is_toc:
-            header_para = para
-            header_idx = i
-            break
-    
-    if header_para is None:
+    # Find the header paragraph first, skipping TOC entries
+    index = get_paragraph_index(doc)
+    matches = index.find_normalized(header_text, skip_toc=True)
+    if not matches:
         return f"Header '{header_text}' not found in document."
+    header_para = Paragraph(index.element(matches[0]), doc._body)
     
     # Delete everything under the header using the same document instance
     header_el, removed_count = delete_block_under_header(doc, header_text)
     
     # Now insert new paragraphs after the header (which should still be in the document)
     style_to_use = new_paragraph_style or "Normal"
-    
-    # Find the header again after deletion (it should still be there)
-    current_para = header_para
-    for text in new_paragraphs:
-        new_para = doc.add_paragraph(text, style=style_to_use)
-        current_para._element.addnext(new_para._element)
-        current_para = new_para
+    header_idx = get_paragraph_index(doc).position(header_para._element)
+    new_paras = [doc.add_paragraph(text, style=style_to_use) for text in new_paragraphs]
+    _move_new_paragraphs(doc, header_para, header_idx, new_paras)
     
     doc.save(doc_path)
     return f"Replaced content under '{header_text}' with {len(new_paragraphs)} paragraph(s), style: {style_to_use}, removed {removed_count} elements."
 
 
+def _paragraph_xml_text(el) -> str:
+    """Text of a <w:p> element as the manual-anchor functions compare it (w:t nodes only, stripped)."""
+    return "".join([node.text or '' for node in el.iter() if node.tag.endswith('}t')]).strip()
+
+
+def _is_visually_distinct(el) -> bool:
+    """True if any run in the paragraph element is bold, all caps or has an explicit font size."""
+    for run in el.iter(qn('w:r')):
+        rpr = run.find(qn('w:rPr'))
+        if rpr is not None:
+            if rpr.find(qn('w:b')) is not None or rpr.find(qn('w:caps')) is not None or rpr.find(qn('w:sz')) is not None:
+                return True
+    return False
+
+
+def replace_block_between_manual_anchors_in_document(
+    doc,
+    start_anchor_text: str,
+    new_paragraphs: list,
+    end_anchor_text: str = None,
+    match_fn=None,
+    new_paragraph_style: str = None
+) -> str:
+    """Replace a block between manual anchors in a loaded document. See replace_block_between_manual_anchors; raises ValueError if the start anchor is not found."""
+    index = get_paragraph_index(doc)
+    body = doc.element.body
+    start_el = None
+    if match_fn:
+        for el in body.iterchildren(_W_P):
+            if match_fn(_paragraph_xml_text(el), el):
+                start_el = el
+                break
+    else:
+        for position in index.find_normalized(start_anchor_text):
+            el = index.element(position)
+            if _paragraph_xml_text(el) == start_anchor_text.strip():
+                start_el = el
+                break
+    if start_el is None:
+        raise ValueError(f"Start anchor '{start_anchor_text}' not found.")
+
+    # Single pass from the start anchor to the end anchor, the next visually
+    # distinct paragraph, or the end of the body (the final sectPr is kept)
+    to_remove = []
+    paragraphs_removed = 0
+    el = start_el.getnext()
+    while el is not None and el.tag != _W_SECTPR:
+        if el.tag == _W_P:
+            if end_anchor_text:
+                if match_fn:
+                    if match_fn(_paragraph_xml_text(el), el, is_end=True):
+                        break
+                elif _paragraph_xml_text(el) == end_anchor_text.strip():
+                    break
+            elif _is_visually_distinct(el):
+                break
+            paragraphs_removed += 1
+        to_remove.append(el)
+        el = el.getnext()
+
+    start_idx = index.position(start_el)
+    for el in to_remove:
+        body.remove(el)
+    index.remove(start_idx + 1, start_idx + 1 + paragraphs_removed)
+    index.note_removed_elements(len(to_remove) - paragraphs_removed)
+
+    style_to_use = new_paragraph_style or "Normal"
+    new_paras = [doc.add_paragraph(text, style=style_to_use) for text in new_paragraphs]
+    _move_new_paragraphs(doc, Paragraph(start_el, doc._body), start_idx, new_paras)
+    return f"Replaced content between '{start_anchor_text}' and '{end_anchor_text or 'next logical header'}' with {len(new_paragraphs)} paragraph(s), style: {style_to_use}, removed {len(to_remove)} elements."
+
+
 def replace_block_between_manual_anchors(
     doc_path: str,
     start_anchor_text: str,
@@ -546,73 +555,11 @@ def replace_block_between_manual_anchors(
     if not os.path.exists(doc_path):
         return f"Document {doc_path} not found."
     doc = Document(doc_path)
-    body = doc.element.body
-    elements = list(body)
-    start_idx = None
-    end_idx = None
-    # Find start anchor
-    for i, el in enumerate(elements):
-        if el.tag == CT_P.tag:
-            p_text = "".join([node.text or '' for node in el.iter() if node.tag.endswith('}t')]).strip()
-            if match_fn:
-                if match_fn(p_text, el):
-                    start_idx = i
-                    break
-            elif p_text == start_anchor_text.strip():
-                start_idx = i
-                break
-    if start_idx is None:
-        return f"Start anchor '{start_anchor_text}' not found."
-    # Find end anchor
-    if end_anchor_text:
-        for i in range(start_idx + 1, len(elements)):
-            el = elements[i]
-            if el.tag == CT_P.tag:
-                p_text = "".join([node.text or '' for node in el.iter() if node.tag.endswith('}t')]).strip()
-                if match_fn:
-                    if match_fn(p_text, el, is_end=True):
-                        end_idx = i
-                        break
-                elif p_text == end_anchor_text.strip():
-                    end_idx = i
-                    break
-    else:
-        # Heuristic: next visually distinct paragraph (bold, all caps, or different font size), or end of document
-        for i in range(start_idx + 1, len(elements)):
-            el = elements[i]
-            if el.tag == CT_P.tag:
-                # Check for bold, all caps, or font size
-                runs = [node for node in el.iter() if node.tag.endswith('}r')]
-                for run in runs:
-                    rpr = run.find(qn('w:rPr'))
-                    if rpr is not None:
-                        if rpr.find(qn('w:b')) is not None or rpr.find(qn('w:caps')) is not None or rpr.find(qn('w:sz')) is not None:
-                            end_idx = i
-                            break
-                if end_idx is not None:
-                    break
-    # Mark elements for removal
-    to_remove = []
-    for i in range(start_idx + 1, end_idx if end_idx is not None else len(elements)):
-        to_remove.append(elements[i])
-    for el in to_remove:
-        body.remove(el)
-    doc.save(doc_path)
-    # Reload and find start anchor for insertion
-    doc = Document(doc_path)
-    paras = doc.paragraphs
-    anchor_idx = None
-    for i, para in enumerate(paras):
-        if para.text.strip() == start_anchor_text.strip():
-            anchor_idx = i
-            break
-    if anchor_idx is None:
-        return f"Start anchor '{start_anchor_text}' not found after deletion (unexpected)."
-    anchor_para = paras[anchor_idx]
-    style_to_use = new_paragraph_style or "Normal"
-    for text in new_paragraphs:
-        new_para = doc.add_paragraph(text, style=style_to_use)
-        anchor_para._element.addnext(new_para._element)
-        anchor_para = new_para
+    try:
+        message = replace_block_between_manual_anchors_in_document(
+            doc, start_anchor_text, new_paragraphs, end_anchor_text, match_fn, new_paragraph_style
+        )
+    except ValueError as e:
+        return str(e)
     doc.save(doc_path)
-    return f"Replaced content between '{start_anchor_text}' and '{end_anchor_text or 'next logical header'}' with {len(new_paragraphs)} paragraph(s), style: {style_to_use}, removed {len(to_remove)} elements."
+    return message
@@ -0,0 +1,218 @@
+"""
+Streaming readers for Word Document Server.
+
+These read word/document.xml straight from the zip with lxml.etree.iterparse
+instead of building a python-docx Document. Elements are cleared as soon as
+their text has been taken, so memory stays roughly flat however large the
+document is. Use them for read-only tools that only need text or counts.
+"""
+import re
+import zipfile
+from typing import IO, Any, Dict, Iterator, Optional, Tuple, Union
+
+from lxml import etree
+from docx.opc.coreprops import CoreProperties
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+
+# A package can be given as a path or as a binary file object
+DocxSource = Union[str, IO[bytes]]
+
+# Extended properties (docProps/app.xml) elements mapped to result keys
+_EP_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/extended-properties'
+_APP_STATISTICS = {
+    'Pages': 'pages',
+    'Words': 'words',
+    'Paragraphs': 'paragraphs',
+    'Characters': 'characters',
+    'CharactersWithSpaces': 'characters_with_spaces',
+}
+
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_W_PREFIX = re.compile(rb'xmlns:([\w.-]+)="' + _W_NS.encode() + rb'"')
+_STREAM_CHUNK = 64 * 1024
+
+_W_BODY = qn('w:body')
+_W_P = qn('w:p')
+_W_R = qn('w:r')
+_W_T = qn('w:t')
+_W_TBL = qn('w:tbl')
+_W_SECTPR = qn('w:sectPr')
+# Run content that python-docx renders as characters in Run.text (w:tab also
+# appears in w:pPr/w:tabs as a tab stop, hence the parent check below)
+_W_SPECIAL = {
+    qn('w:tab'): '\t',
+    qn('w:ptab'): '\t',
+    qn('w:br'): '\n',
+    qn('w:cr'): '\n',
+    qn('w:noBreakHyphen'): '-',
+}
+
+
+def _iter_paragraphs(source: DocxSource, counts: Optional[Dict[str, int]] = None) -> Iterator[Tuple[str, bool]]:
+    """
+    Yield (text, is_top_level) for every paragraph in word/document.xml, in document order.
+
+    Paragraphs inside tables (and text boxes) are yielded where they occur;
+    is_top_level is True only for direct children of w:body, i.e. the
+    paragraphs python-docx lists in doc.paragraphs. If counts is given it is
+    filled with top-level table and section counts as the parse goes.
+    """
+    with zipfile.ZipFile(source) as zf:
+        with zf.open('word/document.xml') as stream:
+            # One text buffer per open paragraph; text boxes nest paragraphs
+            buffers = []
+            for event, elem in etree.iterparse(stream, events=('start', 'end'), huge_tree=True):
+                tag = elem.tag
+                if event == 'start':
+                    if tag == _W_P:
+                        buffers.append([])
+                    continue
+                if tag == _W_T:
+                    if buffers and elem.text:
+                        buffers[-1].append(elem.text)
+                elif tag in _W_SPECIAL:
+                    if buffers and elem.getparent().tag == _W_R:
+                        buffers[-1].append(_W_SPECIAL[tag])
+                elif tag == _W_P:
+                    text = ''.join(buffers.pop())
+                    parent = elem.getparent()
+                    yield text, parent is not None and parent.tag == _W_BODY
+                    _release(elem)
+                elif tag == _W_TBL:
+                    if counts is not None:
+                        parent = elem.getparent()
+                        if parent is not None and parent.tag == _W_BODY:
+                            counts['tables'] += 1
+                    _release(elem)
+                elif tag == _W_SECTPR and counts is not None:
+                    counts['sections'] += 1
+
+
+def _release(elem) -> None:
+    """Free a fully processed element and the already processed siblings before it."""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def iter_document_text(source: DocxSource) -> Iterator[str]:
+    """Yield the text of every paragraph, including table cells, in document order."""
+    for text, _ in _iter_paragraphs(source):
+        yield text
+
+
+def scan_document(source: DocxSource) -> Dict[str, int]:
+    """
+    Count words, characters, paragraphs, tables and sections in a single streaming pass.
+
+    word_count and character_count (excluding whitespace) cover all
+    paragraphs including table cells; paragraph_count and table_count count
+    top-level body elements, as doc.paragraphs and doc.tables do.
+    """
+    counts = {'tables': 0, 'sections': 0}
+    word_count = 0
+    character_count = 0
+    paragraph_count = 0
+    for text, top_level in _iter_paragraphs(source, counts):
+        words = text.split()
+        word_count += len(words)
+        character_count += sum(map(len, words))
+        if top_level:
+            paragraph_count += 1
+    return {
+        'word_count': word_count,
+        'character_count': character_count,
+        'paragraph_count': paragraph_count,
+        'table_count': counts['tables'],
+        'section_count': counts['sections'],
+    }
+
+
+def count_tables(source: DocxSource) -> int:
+    """
+    Count top-level tables (doc.tables) by scanning word/document.xml for table tags.
+
+    Much cheaper than parsing; if the main namespace is not bound to a prefix
+    the count comes from scan_document instead.
+    """
+    with zipfile.ZipFile(source) as zf:
+        with zf.open('word/document.xml') as stream:
+            buffer = stream.read(_STREAM_CHUNK)
+            prefix = _W_PREFIX.search(buffer)
+            if prefix is None:
+                return scan_document(source)['table_count']
+            tags = re.compile(rb'<(/?)' + re.escape(prefix.group(1)) + rb':tbl[\s/>]')
+            depth = 0
+            tables = 0
+            while buffer:
+                chunk = stream.read(_STREAM_CHUNK)
+                # A tag may straddle chunks; keep it for the next round
+                cut = buffer.rfind(b'<') if chunk else len(buffer)
+                if cut == -1:
+                    cut = len(buffer)
+                for match in tags.finditer(buffer, 0, cut):
+                    if match.group(1):
+                        depth -= 1
+                    else:
+                        if depth == 0:
+                            tables += 1
+                        if not match.group(0).endswith(b'/'):
+                            depth += 1
+                buffer = buffer[cut:] + chunk
+            return tables
+
+
+def _core_properties(zf: zipfile.ZipFile) -> Dict[str, Any]:
+    try:
+        core_xml = zf.read('docProps/core.xml')
+    except KeyError:
+        return {
+            "title": "", "author": "", "subject": "", "keywords": "",
+            "created": "", "modified": "", "last_modified_by": "", "revision": 0,
+        }
+    core_props = CoreProperties(parse_xml(core_xml))
+    return {
+        "title": core_props.title or "",
+        "author": core_props.author or "",
+        "subject": core_props.subject or "",
+        "keywords": core_props.keywords or "",
+        "created": str(core_props.created) if core_props.created else "",
+        "modified": str(core_props.modified) if core_props.modified else "",
+        "last_modified_by": core_props.last_modified_by or "",
+        "revision": core_props.revision or 0,
+    }
+
+
+def _app_statistics(zf: zipfile.ZipFile) -> Dict[str, Optional[int]]:
+    """Document statistics from docProps/app.xml; None where absent or unreadable."""
+    statistics = {key: None for key in _APP_STATISTICS.values()}
+    statistics['application'] = None
+    try:
+        root = etree.fromstring(zf.read('docProps/app.xml'))
+    except (KeyError, etree.XMLSyntaxError):
+        return statistics
+    statistics['application'] = root.findtext(f'{{{_EP_NS}}}Application')
+    for element_name, key in _APP_STATISTICS.items():
+        value = root.findtext(f'{{{_EP_NS}}}{element_name}')
+        try:
+            statistics[key] = int(value) if value is not None else None
+        except ValueError:
+            pass
+    return statistics
+
+
+def read_document_metadata(source: DocxSource) -> Dict[str, Any]:
+    """
+    Read docProps/core.xml and docProps/app.xml without touching the document body.
+
+    The statistics in app.xml (page, word, paragraph and character counts) are
+    whatever the last application to save the file wrote there; files that were
+    never saved by Word may carry stale or zero values.
+    """
+    with zipfile.ZipFile(source) as zf:
+        metadata = _core_properties(zf)
+        metadata.update(_app_statistics(zf))
+    return metadata
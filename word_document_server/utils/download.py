@@ -0,0 +1,129 @@
+"""
+HTTP download responses for Word Document Server.
+
+Documents are streamed from the document store (or its spill file) in
+chunks instead of being copied into one response body. Each response
+carries a strong ETag from the SHA-256 of the document bytes, so clients
+can revalidate with If-None-Match, and single byte ranges are served for
+resumed downloads.
+"""
+from typing import Iterator, Mapping, Optional, Tuple
+
+from starlette.responses import Response, StreamingResponse
+
+from word_document_server.utils.document_store import DownloadSource
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+CHUNK_SIZE = 64 * 1024
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Return True if an If-None-Match header matches etag (weak comparison)."""
+    if header.strip() == '*':
+        return True
+    candidates = (tag.strip() for tag in header.split(','))
+    return etag in (tag[2:] if tag.startswith('W/') else tag for tag in candidates)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header into an inclusive (start, end) byte range.
+
+    Returns None when the header should be ignored (not a single byte
+    range), and raises ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        # Multiple ranges are rare for downloads; answering with the whole body is allowed
+        return None
+    first, sep, last = (part.strip() for part in spec.strip().partition('-'))
+    if not sep or not (first or last) or not (first or '0').isdigit() or not (last or '0').isdigit():
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else None
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def iter_chunks(source: DownloadSource, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a download source, closing its file at the end."""
+    try:
+        if source.file is None:
+            view = memoryview(source.data)
+            for offset in range(start, end + 1, chunk_size):
+                yield bytes(view[offset:min(offset + chunk_size, end + 1)])
+            return
+        source.file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = source.file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        if source.file is not None:
+            source.file.close()
+
+
+def download_response(source: DownloadSource, request_headers: Mapping[str, str]) -> Response:
+    """
+    Build the response for downloading a document.
+
+    Handles If-None-Match (304), If-Range and Range (206 / 416); anything
+    else gets the whole document with status 200. The response takes
+    ownership of source.file.
+    """
+    etag = f'"{source.digest}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+        "Content-Disposition": f'attachment; filename="{source.filename}"',
+    }
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        _close(source)
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, source.size)
+        except ValueError:
+            _close(source)
+            headers["Content-Range"] = f"bytes */{source.size}"
+            return Response("Requested range not satisfiable", status_code=416, headers=headers)
+
+    status_code = 200
+    start, end = 0, source.size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{source.size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        iter_chunks(source, start, end),
+        status_code=status_code,
+        media_type=DOCX_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+def _close(source: DownloadSource) -> None:
+    if source.file is not None:
+        source.file.close()
@@ -0,0 +1,281 @@
+"""
+Worker pool for Word Document Server.
+
+Tool functions are async, but their bodies parse and save documents, zip and
+encrypt files and wait on LibreOffice, all of which block. Run inline on the
+event loop, one slow save under the HTTP transports stalls every other
+client. Tools decorated with @offload run their body in a worker pool
+instead, and calls on the same document (file_id or path) are serialized so
+concurrent edits to it never interleave.
+
+MCP_WORKER_MODE selects the pool:
+
+- "thread" (default): a thread pool of MCP_WORKERS threads;
+- "process": tools marked process_safe (those that only work on files on
+  disk) run in a pool of MCP_WORKERS processes, which also spreads
+  python-docx's pure-Python parsing over several cores; everything else,
+  including tools on in-memory documents, still uses the thread pool;
+- "inline": run on the event loop as before, e.g. for debugging.
+"""
+import asyncio
+import functools
+import importlib
+import inspect
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+
+from word_document_server.utils.read_cache import get_read_cache
+
+WORKER_MODES = ("thread", "process", "inline")
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+_local = threading.local()
+
+
+class KeyedLock:
+    """
+    Async locks created on demand per key.
+
+    A key's lock exists only while it is held or awaited, so the table does
+    not grow with the number of documents ever seen. The locks may be taken
+    from several event loops in different threads (the download server runs
+    its own loop): the table is guarded by a threading lock, and a released
+    key is handed to the next waiter on that waiter's loop.
+    """
+
+    def __init__(self):
+        # key -> waiters queued behind the current holder
+        self._held: Dict[Hashable, Deque[asyncio.Future]] = {}
+        self._guard = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._guard:
+            return len(self._held)
+
+    def locked(self, key: Hashable) -> bool:
+        with self._guard:
+            return key in self._held
+
+    def hold(self, key: Hashable) -> "_KeyedLockContext":
+        """Return an async context manager holding the lock for key."""
+        return _KeyedLockContext(self, key)
+
+    async def _acquire(self, key: Hashable) -> None:
+        with self._guard:
+            waiters = self._held.get(key)
+            if waiters is None:
+                self._held[key] = deque()
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            waiters.append(waiter)
+        try:
+            await waiter
+        except BaseException:
+            with self._guard:
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                    raise
+            # The lock was handed over just as this waiter was cancelled
+            self._release(key)
+            raise
+
+    def _release(self, key: Hashable) -> None:
+        with self._guard:
+            waiters = self._held[key]
+            if not waiters:
+                del self._held[key]
+                return
+            waiter = waiters.popleft()
+        waiter.get_loop().call_soon_threadsafe(_grant, waiter)
+
+
+def _grant(waiter: asyncio.Future) -> None:
+    # A waiter cancelled meanwhile passes the lock on itself (see _acquire)
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class _KeyedLockContext:
+    __slots__ = ("_owner", "_key")
+
+    def __init__(self, owner: KeyedLock, key: Hashable):
+        self._owner = owner
+        self._key = key
+
+    async def __aenter__(self):
+        await self._owner._acquire(self._key)
+
+    async def __aexit__(self, *exc_info):
+        self._owner._release(self._key)
+
+
+class WorkerPool:
+    """
+    Runs blocking callables off the event loop, one document at a time.
+
+    Use the module-level offload decorator rather than this class directly.
+    """
+
+    def __init__(self, mode: str = "thread", workers: int = DEFAULT_WORKERS):
+        if mode not in WORKER_MODES:
+            raise ValueError(f"Invalid worker mode '{mode}'. Valid modes: {', '.join(WORKER_MODES)}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.document_locks = KeyedLock()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "WorkerPool":
+        """Create a pool configured by MCP_WORKER_MODE and MCP_WORKERS."""
+        return cls(
+            mode=os.getenv('MCP_WORKER_MODE', 'thread').lower(),
+            workers=int(os.getenv('MCP_WORKERS', DEFAULT_WORKERS)),
+        )
+
+    async def run(self, func: Callable[..., Any], *args, key: Optional[Hashable] = None,
+                  process_safe: bool = False, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) in the pool and return its result.
+
+        Args:
+            func: Blocking function to run
+            key: Document key; calls with the same key run one after another
+            process_safe: Whether func may run in a worker process (func must
+                then be picklable and only touch files on disk)
+        """
+        call = functools.partial(func, *args, **kwargs)
+        if key is None:
+            return await self._dispatch(call, process_safe)
+        async with self.document_locks.hold(key):
+            return await self._dispatch(call, process_safe)
+
+    async def _dispatch(self, call: Callable[[], Any], process_safe: bool) -> Any:
+        if self.mode == "inline":
+            return call()
+        executor = self._executor(process_safe)
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+    def _executor(self, process_safe: bool) -> Executor:
+        with self._pool_lock:
+            if process_safe and self.mode == "process":
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(max_workers=self.workers)
+                return self._processes
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.workers,
+                                                   thread_name_prefix="word-worker")
+            return self._threads
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._pool_lock:
+            for executor in (self._threads, self._processes):
+                if executor is not None:
+                    executor.shutdown(wait=wait)
+            self._threads = self._processes = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "locked_documents": len(self.document_locks),
+        }
+
+
+def document_key(name: str) -> str:
+    """
+    Lock key for a file_id or document path.
+
+    Paths are made absolute and given the .docx extension the tools add, so
+    "report" and "./report.docx" share a lock; file_ids map to a unique key
+    the same way.
+    """
+    key = os.path.abspath(name)
+    if not key.lower().endswith('.docx'):
+        key += '.docx'
+    return key
+
+
+def in_worker() -> bool:
+    """Return True when called from a tool body already running in a worker."""
+    return getattr(_local, "active", False)
+
+
+def _run_coroutine(func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    """Run an async tool body to completion on this worker's own event loop."""
+    loop = getattr(_local, "loop", None)
+    if loop is None:
+        loop = _local.loop = asyncio.new_event_loop()
+    _local.active = True
+    try:
+        return loop.run_until_complete(func(*args, **kwargs))
+    finally:
+        _local.active = False
+
+
+def _run_in_process(module_name: str, qualname: str, args: tuple, kwargs: dict) -> Any:
+    # Decorated tools cannot be pickled (their module attribute is the
+    # wrapper), so the worker process looks the original up by name
+    target = importlib.import_module(module_name)
+    for part in qualname.split('.'):
+        target = getattr(target, part)
+    return _run_coroutine(inspect.unwrap(target), args, kwargs)
+
+
+def offload(key: Optional[str] = None, process_safe: bool = False):
+    """
+    Decorator running an async tool body in the worker pool.
+
+    The body must not await anything that needs the server's event loop; it
+    runs on a private loop in the worker.
+
+    Args:
+        key: Name of the parameter holding the file_id or path; calls with the
+            same document are serialized
+        process_safe: Whether the tool only works on files on disk and may
+            run in a worker process when MCP_WORKER_MODE is "process"
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            worker_pool = get_worker_pool()
+            # Tools calling other tools are already in a worker and hold the lock
+            if in_worker() or worker_pool.mode == "inline":
+                return await func(*args, **kwargs)
+            lock_key = None
+            if key is not None:
+                value = signature.bind_partial(*args, **kwargs).arguments.get(key)
+                if isinstance(value, str) and value:
+                    lock_key = document_key(value)
+            if process_safe and worker_pool.mode == "process":
+                result = await worker_pool.run(_run_in_process, func.__module__, func.__qualname__,
+                                               args, kwargs, key=lock_key, process_safe=True)
+                # The worker's own read cache invalidation does not reach this process
+                if lock_key is not None:
+                    get_read_cache().invalidate(lock_key)
+                return result
+            return await worker_pool.run(_run_coroutine, func, args, kwargs, key=lock_key)
+
+        return wrapper
+
+    return decorator
+
+
+# Shared by all tools
+_worker_pool: Optional[WorkerPool] = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> WorkerPool:
+    """Return the shared pool, created from the environment on first use (after .env is loaded)."""
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = WorkerPool.from_env()
+        return _worker_pool
@@ -1,9 +1,12 @@
 """
 Extended document utilities for Word Document Server.
 """
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 from docx import Document
 
+from word_document_server.utils.read_cache import get_read_cache
+from word_document_server.utils.search_index import SearchIndex
+
 
 def get_paragraph_text(doc_path: str, paragraph_index: int) -> Dict[str, Any]:
     """
@@ -39,18 +42,24 @@ def get_paragraph_text(doc_path: str, paragraph_index: int) -> Dict[str, Any]:
         return {"error": f"Failed to get paragraph text: {str(e)}"}
 
 
-def find_text(doc_path: str, text_to_find: str, match_case: bool = True, whole_word: bool = False) -> Dict[str, Any]:
+def find_text(doc_path: str, text_to_find: str, match_case: bool = True, whole_word: bool = False,
+              offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
     """
-    Find all occurrences of specific text in a Word document.
+    Find occurrences of specific text in a Word document.
+
+    The document's search index is built on the first query and reused by
+    later queries until the file changes (see utils/search_index.py).
     
     Args:
         doc_path: Path to the Word document
         text_to_find: Text to search for
         match_case: Whether to perform case-sensitive search
         whole_word: Whether to match whole words only
+        offset: Number of occurrences to skip
+        limit: Maximum number of occurrences to return (None for all)
     
     Returns:
-        Dictionary with search results
+        Dictionary with one page of occurrences and the total count
     """
     import os
     if not os.path.exists(doc_path):
@@ -60,106 +69,18 @@ def find_text(doc_path: str, text_to_find: str, match_case: bool = True, whole_w
         return {"error": "Search text cannot be empty"}
     
     try:
-        doc = Document(doc_path)
-        results = {
+        index = get_read_cache().get_or_compute(doc_path, "search_index", (), lambda: SearchIndex.from_docx(doc_path))
+        found = index.search(text_to_find, match_case, whole_word, offset, limit)
+        returned = len(found["occurrences"])
+        return {
             "query": text_to_find,
             "match_case": match_case,
             "whole_word": whole_word,
-            "occurrences": [],
-            "total_count": 0
+            "occurrences": found["occurrences"],
+            "total_count": found["total_count"],
+            "offset": offset,
+            "limit": limit,
+            "has_more": offset + returned < found["total_count"]
         }
-        
-        # Search in paragraphs
-        for i, para in enumerate(doc.paragraphs):
-            # Prepare text for comparison
-            para_text = para.text
-            search_text = text_to_find
-            
-            if not match_case:
-                para_text = para_text.lower()
-                search_text = search_text.lower()
-            
-            # Find all occurrences (simple implementation)
-            start_pos = 0
-            while True:
-                if whole_word:
-                    # For whole word search, we need to check word boundaries
-                    words = para_text.split()
-                    found = False
-                    for word_idx, word in enumerate(words):
-                        if (word == search_text or 
-                            (not match_case and word.lower() == search_text.lower())):
-                            results["occurrences"].append({
-                                "paragraph_index": i,
-                                "position": word_idx,
-                                "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                            })
-                            results["total_count"] += 1
-                            found = True
-                    
-                    # Break after checking all words
-                    break
-                else:
-                    # For substring search
-                    pos = para_text.find(search_text, start_pos)
-                    if pos == -1:
-                        break
-                    
-                    results["occurrences"].append({
-                        "paragraph_index": i,
-                        "position": pos,
-                        "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                    })
-                    results["total_count"] += 1
-                    start_pos = pos + len(search_text)
-        
-        # Search in tables
-        for table_idx, table in enumerate(doc.tables):
-            for row_idx, row in enumerate(table.rows):
-                for col_idx, cell in enumerate(row.cells):
-                    for para_idx, para in enumerate(cell.paragraphs):
-                        # Prepare text for comparison
-                        para_text = para.text
-                        search_text = text_to_find
-                        
-                        if not match_case:
-                            para_text = para_text.lower()
-                            search_text = search_text.lower()
-                        
-                        # Find all occurrences (simple implementation)
-                        start_pos = 0
-                        while True:
-                            if whole_word:
-                                # For whole word search, check word boundaries
-                                words = para_text.split()
-                                found = False
-                                for word_idx, word in enumerate(words):
-                                    if (word == search_text or 
-                                        (not match_case and word.lower() == search_text.lower())):
-                                        results["occurrences"].append({
-                                            "location": f"Table {table_idx}, Row {row_idx}, Column {col_idx}",
-                                            "position": word_idx,
-                                            "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                                        })
-                                        results["total_count"] += 1
-                                        found = True
-                                
-                                # Break after checking all words
-                                break
-                            else:
-                                # For substring search
-                                pos = para_text.find(search_text, start_pos)
-                                if pos == -1:
-                                    break
-                                
-                                results["occurrences"].append({
-                                    "location": f"Table {table_idx}, Row {row_idx}, Column {col_idx}",
-                                    "position": pos,
-                                    "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                                })
-                                results["total_count"] += 1
-                                start_pos = pos + len(search_text)
-        
-        return results
     except Exception as e:
         return {"error": f"Failed to search for text: {str(e)}"}
@@ -5,6 +5,8 @@ import os
 from typing import Tuple, Optional
 import shutil
 
+from word_document_server.utils.read_cache import get_read_cache
+
 
 def check_file_writeable(filepath: str) -> Tuple[bool, str]:
     """
@@ -16,6 +18,9 @@ def check_file_writeable(filepath: str) -> Tuple[bool, str]:
     Returns:
         Tuple of (is_writeable, error_message)
     """
+    # Callers are about to write the file, so cached read results are stale
+    get_read_cache().invalidate(filepath)
+    
     # If file doesn't exist, check if directory is writeable
     if not os.path.exists(filepath):
         directory = os.path.dirname(filepath)
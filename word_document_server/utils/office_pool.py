@@ -0,0 +1,456 @@
+"""
+LibreOffice conversion pool for Word Document Server.
+
+Starting `soffice --headless` for every conversion costs seconds of cold
+start, and concurrent conversions that share the default user profile
+collide on its lock. The pool here runs a fixed number of workers, each with
+its own profile directory, fed from a bounded job queue.
+
+When LibreOffice's Python-UNO bridge (the `uno` module) is importable, each
+worker keeps one headless soffice process running and converts over a UNO
+pipe, so only its first job pays the start-up. Otherwise each job runs
+`soffice --convert-to pdf` against the worker's already initialized profile.
+Either way a worker is recycled after max_jobs conversions and after a crash
+or timeout.
+"""
+import atexit
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_JOBS = 200
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_TIMEOUT = 60
+
+_POLL_INTERVAL = 0.25
+
+
+class OfficeConversionError(Exception):
+    """A document could not be converted by the office pool."""
+
+
+def find_office_binary() -> Optional[str]:
+    """Return the LibreOffice executable to use, or None if none is installed."""
+    configured = os.getenv('MCP_OFFICE_BINARY')
+    if configured:
+        return configured
+    candidates = ["soffice", "libreoffice"]
+    if platform.system() == "Darwin":
+        candidates.append("/Applications/LibreOffice.app/Contents/MacOS/soffice")
+    for name in candidates:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+class OfficeWorker:
+    """One LibreOffice instance with a private profile, used by a single pool thread."""
+
+    def __init__(self, binary: str, directory: str, timeout: float, use_uno: bool = uno is not None):
+        self.binary = binary
+        self.directory = directory
+        self.profile_dir = os.path.join(directory, "profile")
+        self.timeout = timeout
+        self.use_uno = use_uno
+        self.jobs = 0
+        self.restarts = 0
+        # Set until the first start and after a failed job
+        self.needs_restart = True
+        self._started = False
+        self._pipe = f"word_mcp_{os.getpid()}_{os.path.basename(directory)}"
+        self._process: Optional[subprocess.Popen] = None
+        self._desktop = None
+
+    def healthy(self) -> bool:
+        """Return whether the worker can take a job without being restarted first."""
+        if not self.use_uno:
+            return True
+        if self._process is None or self._process.poll() is not None:
+            return False
+        try:
+            self._desktop.getComponents()
+        except Exception:
+            return False
+        return True
+
+    def restart(self) -> None:
+        """Stop the worker and start it again with a fresh profile."""
+        if self._started:
+            self.restarts += 1
+        self._started = True
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+        self.jobs = 0
+        self.needs_restart = False
+        if self.use_uno:
+            self._start_listener()
+
+    def stop(self) -> None:
+        process, self._process = self._process, None
+        desktop, self._desktop = self._desktop, None
+        if process is None:
+            return
+        if desktop is not None and process.poll() is None:
+            try:
+                desktop.terminate()
+            except Exception:
+                pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def convert_many(self, pairs: List[Tuple[str, str]]) -> List[Optional[OfficeConversionError]]:
+        """
+        Convert each (source, target) pair to a PDF at target.
+
+        Returns None or the error for each pair, in order. Sets needs_restart
+        when LibreOffice crashed or hung on the way.
+        """
+        self.jobs += len(pairs)
+        if self.use_uno:
+            errors = []
+            for source, target in pairs:
+                try:
+                    self._convert_uno(source, target)
+                    errors.append(_missing_output(target))
+                except OfficeConversionError as e:
+                    errors.append(e)
+                    if not self.healthy():
+                        self.restart()
+            return errors
+        # One soffice run converts several files, but names each output
+        # after its source, so a run takes at most one source per name
+        errors: Dict[int, Optional[OfficeConversionError]] = {}
+        remaining = list(enumerate(pairs))
+        while remaining:
+            batch, deferred, names = [], [], set()
+            for index, pair in remaining:
+                name = _pdf_name(pair[0])
+                if name in names:
+                    deferred.append((index, pair))
+                else:
+                    names.add(name)
+                    batch.append((index, pair))
+            for (index, _), error in zip(batch, self._convert_cli([pair for _, pair in batch])):
+                errors[index] = error
+            remaining = deferred
+        return [errors[index] for index in range(len(pairs))]
+
+    def _profile_url(self) -> str:
+        return Path(self.profile_dir).absolute().as_uri()
+
+    def _convert_cli(self, pairs: List[Tuple[str, str]]) -> List[Optional[OfficeConversionError]]:
+        # A private output directory, so concurrent workers never see each other's files
+        out_dir = os.path.join(self.directory, "out")
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir)
+        timeout = self.timeout * len(pairs)
+        cmd = [self.binary, '--headless', '--norestore', '--nologo',
+               f'-env:UserInstallation={self._profile_url()}',
+               '--convert-to', 'pdf', '--outdir', out_dir, *(source for source, _ in pairs)]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, check=False)
+        except subprocess.TimeoutExpired:
+            self.needs_restart = True
+            error = OfficeConversionError(f"Conversion timed out after {timeout} seconds")
+            return [error] * len(pairs)
+        if result.returncode != 0:
+            self.needs_restart = True
+        detail = result.stderr.strip() or f"exit code {result.returncode}"
+        errors = []
+        for source, target in pairs:
+            produced = os.path.join(out_dir, _pdf_name(source))
+            if os.path.exists(produced):
+                shutil.move(produced, target)
+                errors.append(_missing_output(target))
+            else:
+                errors.append(OfficeConversionError(f"LibreOffice failed: {detail}"))
+        return errors
+
+    def _start_listener(self) -> None:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        cmd = [self.binary, '--headless', '--invisible', '--norestore', '--nologo', '--nodefault',
+               f'-env:UserInstallation={self._profile_url()}',
+               f'--accept=pipe,name={self._pipe};urp;StarOffice.ComponentContext']
+        self._process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                context = resolver.resolve(f"uno:pipe,name={self._pipe};urp;StarOffice.ComponentContext")
+                break
+            except Exception:
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise OfficeConversionError("LibreOffice did not start")
+                time.sleep(_POLL_INTERVAL)
+        self._desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def _convert_uno(self, source: str, target: str) -> None:
+        # UNO calls cannot be interrupted; a hung conversion is ended by
+        # killing soffice, which makes the call fail and the worker restart
+        watchdog = threading.Timer(self.timeout, self._process.kill)
+        watchdog.start()
+        try:
+            document = self._desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(source)), "_blank", 0, (_property("Hidden", True),))
+            if document is None:
+                raise OfficeConversionError(f"LibreOffice could not open '{source}'")
+            try:
+                document.storeToURL(uno.systemPathToFileUrl(os.path.abspath(target)),
+                                    (_property("FilterName", "writer_pdf_Export"),))
+            finally:
+                document.close(True)
+        except OfficeConversionError:
+            raise
+        except Exception as e:
+            if not watchdog.is_alive():
+                raise OfficeConversionError(f"Conversion timed out after {self.timeout} seconds")
+            raise OfficeConversionError(f"LibreOffice failed: {e}")
+        finally:
+            watchdog.cancel()
+
+
+def _property(name: str, value: Any):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+def _pdf_name(source: str) -> str:
+    """Name LibreOffice gives the PDF converted from source."""
+    return os.path.splitext(os.path.basename(source))[0] + ".pdf"
+
+
+def _missing_output(target: str) -> Optional[OfficeConversionError]:
+    if not os.path.exists(target) or os.path.getsize(target) == 0:
+        return OfficeConversionError(f"LibreOffice did not produce '{target}'")
+    return None
+
+
+class _Job:
+    __slots__ = ("pairs", "future")
+
+    def __init__(self, pairs: List[Tuple[str, str]]):
+        self.pairs = pairs
+        self.future: Future = Future()
+
+
+class OfficePool:
+    """
+    Fixed-size pool of LibreOffice workers fed from a bounded queue.
+
+    Workers are started on the first conversion. convert() blocks the calling
+    thread (a tool worker thread) until its job is done.
+    """
+
+    def __init__(self, binary: Optional[str] = None, workers: int = DEFAULT_WORKERS,
+                 max_jobs: int = DEFAULT_MAX_JOBS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT, profile_root: Optional[str] = None,
+                 use_uno: bool = uno is not None):
+        """
+        Args:
+            binary: LibreOffice executable; found on PATH if None
+            workers: Number of workers, i.e. of concurrent conversions
+            max_jobs: Conversions after which a worker is recycled (0 for never)
+            queue_size: Jobs that may wait for a worker before convert() fails
+            timeout: Seconds allowed for one conversion
+            profile_root: Directory for worker profiles; a temporary directory if None
+            use_uno: Keep soffice running and convert over UNO
+        """
+        self.binary = binary or find_office_binary()
+        self.workers = max(1, workers)
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.use_uno = use_uno
+        self._profile_root = profile_root
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue(maxsize=queue_size)
+        self._workers: List[OfficeWorker] = []
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._counters = {"conversions": 0, "failures": 0}
+        self._converter_id: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "OfficePool":
+        """
+        Create a pool configured from environment variables.
+
+        MCP_OFFICE_WORKERS, MCP_OFFICE_MAX_JOBS, MCP_OFFICE_QUEUE_SIZE,
+        MCP_OFFICE_TIMEOUT and MCP_OFFICE_PROFILE_DIR map to the constructor
+        arguments; MCP_OFFICE_BINARY selects the executable.
+        """
+        return cls(
+            workers=int(os.getenv('MCP_OFFICE_WORKERS', DEFAULT_WORKERS)),
+            max_jobs=int(os.getenv('MCP_OFFICE_MAX_JOBS', DEFAULT_MAX_JOBS)),
+            queue_size=int(os.getenv('MCP_OFFICE_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)),
+            timeout=float(os.getenv('MCP_OFFICE_TIMEOUT', DEFAULT_TIMEOUT)),
+            profile_root=os.getenv('MCP_OFFICE_PROFILE_DIR') or None,
+        )
+
+    @property
+    def available(self) -> bool:
+        """Whether a LibreOffice executable was found."""
+        return self.binary is not None
+
+    @property
+    def binary_name(self) -> str:
+        return os.path.basename(self.binary) if self.binary else ""
+
+    def converter_id(self) -> str:
+        """Identify the LibreOffice build, e.g. to key cached conversion results."""
+        if self._converter_id is None:
+            version = ""
+            try:
+                result = subprocess.run([self.binary, '--version'], capture_output=True, text=True,
+                                        timeout=self.timeout, check=False)
+                if result.returncode == 0:
+                    version = result.stdout.strip()
+            except (OSError, subprocess.SubprocessError):
+                pass
+            if not version:
+                # No usable --version output: the installed executable stands in for it
+                path = os.path.realpath(self.binary)
+                st = os.stat(path)
+                version = f"{path}:{st.st_mtime_ns}:{st.st_size}"
+            self._converter_id = version
+        return self._converter_id
+
+    def convert(self, source: str, target: str) -> str:
+        """
+        Convert the document at source to a PDF at target.
+
+        Raises:
+            OfficeConversionError: If LibreOffice is unavailable, the queue is
+                full or the conversion failed
+        """
+        error = self.convert_many([(source, target)])[0]
+        if error is not None:
+            raise error
+        return target
+
+    def convert_many(self, pairs: List[Tuple[str, str]]) -> List[Optional[OfficeConversionError]]:
+        """
+        Convert several (source, target) pairs as one job on one worker.
+
+        Without UNO this takes a single soffice run for the whole job, so
+        grouping documents saves start-ups.
+
+        Returns:
+            None or the error for each pair, in order
+
+        Raises:
+            OfficeConversionError: If LibreOffice is unavailable or the queue is full
+        """
+        if not self.available:
+            raise OfficeConversionError("LibreOffice is not installed")
+        self._start()
+        job = _Job(list(pairs))
+        try:
+            self._queue.put(job, timeout=self.timeout)
+        except queue.Full:
+            raise OfficeConversionError("Too many conversions waiting; try again later")
+        return job.future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "binary": self.binary,
+                "uno": self.use_uno,
+                "workers": self.workers,
+                "started": bool(self._workers),
+                "queued": self._queue.qsize(),
+                "restarts": sum(worker.restarts for worker in self._workers),
+                **self._counters,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+            workers, self._workers = self._workers, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+        for worker in workers:
+            worker.stop()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._workers:
+                return
+            root = self._profile_root or tempfile.mkdtemp(prefix="word-mcp-office-")
+            for index in range(self.workers):
+                worker = OfficeWorker(self.binary, os.path.join(root, f"worker-{index}"),
+                                      self.timeout, self.use_uno)
+                os.makedirs(worker.directory, exist_ok=True)
+                thread = threading.Thread(target=self._run_worker, args=(worker,),
+                                          name=f"office-worker-{index}", daemon=True)
+                self._workers.append(worker)
+                self._threads.append(thread)
+                thread.start()
+
+    def _run_worker(self, worker: OfficeWorker) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                if (worker.needs_restart or not worker.healthy()
+                        or (self.max_jobs and worker.jobs >= self.max_jobs)):
+                    worker.restart()
+                errors = worker.convert_many(job.pairs)
+            except Exception as e:
+                # LibreOffice would not start: fail the whole job
+                error = e if isinstance(e, OfficeConversionError) else OfficeConversionError(str(e))
+                errors = [error] * len(job.pairs)
+                worker.needs_restart = True
+            if worker.needs_restart:
+                # Start from a clean process and profile on the next job
+                worker.stop()
+            failed = sum(error is not None for error in errors)
+            with self._lock:
+                self._counters["conversions"] += len(errors) - failed
+                self._counters["failures"] += failed
+            job.future.set_result(errors)
+
+_pool: Optional[OfficePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_office_pool() -> OfficePool:
+    """Return the shared pool, creating it from the environment on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OfficePool.from_env()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def office_pool_stats() -> Optional[Dict[str, Any]]:
+    """Stats of the shared pool, or None if no conversion has created it yet."""
+    return _pool.stats() if _pool is not None else None
@@ -0,0 +1,221 @@
+"""
+Document outline for Word Document Server.
+
+get_document_outline used to parse the whole document with python-docx and
+return every paragraph in one pretty-printed JSON blob, which for a large
+document is several MB. The outline here is read in one streaming pass
+over word/document.xml and kept as compact tables:
+
+- the (truncated) text and style of every top-level paragraph;
+- the positions and levels of the headings among them;
+- a small preview of every top-level table.
+
+The outline is kept in the read cache, so further pages, heading-only or
+style-filtered views of an unchanged document are served from these tables
+without parsing it again.
+"""
+import re
+import zipfile
+from typing import Any, Dict, IO, Iterable, List, Optional, Tuple, Union
+
+from lxml import etree
+from docx.oxml.ns import qn
+from docx.styles import BabelFish
+
+from word_document_server.utils.docx_stream import _release
+
+_W_BODY = qn('w:body')
+_W_P = qn('w:p')
+_W_R = qn('w:r')
+_W_T = qn('w:t')
+_W_HYPERLINK = qn('w:hyperlink')
+_W_PPR = qn('w:pPr')
+_W_PSTYLE = qn('w:pStyle')
+_W_TBL = qn('w:tbl')
+_W_TBLGRID = qn('w:tblGrid')
+_W_GRIDCOL = qn('w:gridCol')
+_W_TR = qn('w:tr')
+_W_TC = qn('w:tc')
+_W_TCPR = qn('w:tcPr')
+_W_GRIDSPAN = qn('w:gridSpan')
+_W_VMERGE = qn('w:vMerge')
+_W_STYLE = qn('w:style')
+_W_NAME = qn('w:name')
+_W_VAL = qn('w:val')
+_W_TYPE = qn('w:type')
+_W_DEFAULT = qn('w:default')
+_W_STYLE_ID = qn('w:styleId')
+_W_SPECIAL = {qn('w:tab'): '\t', qn('w:ptab'): '\t', qn('w:br'): '\n', qn('w:cr'): '\n',
+              qn('w:noBreakHyphen'): '-'}
+_HEADING = re.compile(r'Heading (\d)$')
+
+TEXT_LENGTH = 100
+PREVIEW_SIZE = 3
+PREVIEW_TEXT_LENGTH = 20
+
+
+def _truncate(text: str, length: int) -> str:
+    return text[:length] + ("..." if len(text) > length else "")
+
+
+def heading_level(style_name: str) -> Optional[int]:
+    """Return the outline level of a heading style (0 for Title), or None."""
+    if style_name == "Title":
+        return 0
+    match = _HEADING.match(style_name)
+    return int(match.group(1)) if match else None
+
+
+class DocumentOutline:
+    """
+    Paragraph and table outline of one document.
+
+    Paragraph positions match doc.paragraphs and table positions match
+    doc.tables.
+    """
+
+    def __init__(self, texts: List[str], styles: List[str], tables: List[Dict[str, Any]]):
+        self.texts = texts
+        self.styles = styles
+        self.tables = tables
+        # (position, level) of every heading, the offset table for headings_only
+        self.headings: List[Tuple[int, int]] = []
+        for position, style in enumerate(styles):
+            level = heading_level(style)
+            if level is not None:
+                self.headings.append((position, level))
+        # Approximate memory use, for the read cache's byte budget
+        self.nbytes = sum(map(len, texts)) * 2 + 80 * len(texts) + 200 * len(tables)
+
+    @classmethod
+    def from_docx(cls, source: Union[str, IO[bytes]]) -> "DocumentOutline":
+        """Read the outline in one streaming pass over word/document.xml."""
+        texts: List[str] = []
+        styles: List[str] = []
+        tables: List[Dict[str, Any]] = []
+        with zipfile.ZipFile(source) as zf:
+            style_names, default_style = _read_style_names(zf)
+            with zf.open('word/document.xml') as stream:
+                for _, elem in etree.iterparse(stream, events=('end',), huge_tree=True):
+                    parent = elem.getparent()
+                    if parent is None or parent.tag != _W_BODY:
+                        continue
+                    if elem.tag == _W_P:
+                        texts.append(_truncate(_paragraph_text(elem), TEXT_LENGTH))
+                        ppr = elem.find(_W_PPR)
+                        style = ppr.find(_W_PSTYLE) if ppr is not None else None
+                        style_id = style.get(_W_VAL) if style is not None else None
+                        styles.append(style_names.get(style_id, default_style))
+                    elif elem.tag == _W_TBL:
+                        tables.append(_table_summary(len(tables), elem))
+                    # Only top-level elements are released, so tables stay whole until their end
+                    _release(elem)
+        return cls(texts, styles, tables)
+
+    def select(self, headings_only: bool = False, styles: Optional[Iterable[str]] = None) -> List[int]:
+        """Return the positions of the paragraphs in a view, in document order."""
+        if headings_only:
+            positions = [position for position, _ in self.headings]
+        else:
+            positions = range(len(self.texts))
+        if styles:
+            wanted = {name.lower() for name in styles}
+            positions = [p for p in positions if self.styles[p].lower() in wanted]
+        return list(positions)
+
+    def page(self, headings_only: bool = False, start: int = 0, limit: Optional[int] = None,
+             styles: Optional[Iterable[str]] = None, include_tables: bool = True) -> Dict[str, Any]:
+        """
+        Return one page of the outline.
+
+        start and limit count paragraphs in the selected view (all paragraphs,
+        headings only, and/or the given styles); next_start is None on the
+        last page.
+        """
+        positions = self.select(headings_only, styles)
+        end = len(positions) if limit is None else min(start + limit, len(positions))
+        paragraphs = []
+        for position in positions[start:end]:
+            entry = {"index": position, "text": self.texts[position], "style": self.styles[position]}
+            if headings_only:
+                entry["level"] = heading_level(self.styles[position])
+            paragraphs.append(entry)
+        structure = {
+            "paragraphs": paragraphs,
+            "total_paragraphs": len(positions),
+            "next_start": end if end < len(positions) else None,
+        }
+        if include_tables:
+            structure["tables"] = self.tables
+        return structure
+
+
+def _paragraph_text(p) -> str:
+    """Text of a paragraph as Paragraph.text computes it (runs and hyperlinks)."""
+    parts = []
+    for child in p:
+        if child.tag == _W_R:
+            runs = (child,)
+        elif child.tag == _W_HYPERLINK:
+            runs = child.iterchildren(_W_R)
+        else:
+            continue
+        for run in runs:
+            for item in run:
+                if item.tag == _W_T:
+                    parts.append(item.text or "")
+                elif item.tag in _W_SPECIAL:
+                    parts.append(_W_SPECIAL[item.tag])
+    return "".join(parts)
+
+
+def _cell_text(tc) -> str:
+    return "\n".join(_paragraph_text(p) for p in tc.iterchildren(_W_P))
+
+
+def _table_summary(index: int, tbl) -> Dict[str, Any]:
+    """Rows, columns and a 3x3 text preview, as table.cell(row, col) would report them."""
+    grid = tbl.find(_W_TBLGRID)
+    columns = len(grid.findall(_W_GRIDCOL)) if grid is not None else 0
+    rows = tbl.findall(_W_TR)
+    preview = []
+    above: Dict[int, str] = {}
+    for tr in rows[:PREVIEW_SIZE]:
+        # Text per grid column; spanned columns repeat the cell, vertical merges the cell above
+        by_column: Dict[int, str] = {}
+        column = 0
+        for tc in tr.iterchildren(_W_TC):
+            tc_pr = tc.find(_W_TCPR)
+            span_el = tc_pr.find(_W_GRIDSPAN) if tc_pr is not None else None
+            merge_el = tc_pr.find(_W_VMERGE) if tc_pr is not None else None
+            span = int(span_el.get(_W_VAL)) if span_el is not None else 1
+            if merge_el is not None and merge_el.get(_W_VAL) != "restart":
+                text = above.get(column, "")
+            else:
+                text = _cell_text(tc)
+            for c in range(column, column + span):
+                by_column[c] = text
+            column += span
+        above = by_column
+        preview.append([_truncate(by_column[c], PREVIEW_TEXT_LENGTH) if c in by_column else "N/A"
+                        for c in range(min(PREVIEW_SIZE, columns))])
+    return {"index": index, "rows": len(rows), "columns": columns, "preview": preview}
+
+
+def _read_style_names(zf: zipfile.ZipFile) -> Tuple[Dict[str, str], str]:
+    """Map paragraph style ids to the names python-docx reports, plus the default style name."""
+    names: Dict[str, str] = {}
+    default = "Normal"
+    try:
+        root = etree.fromstring(zf.read('word/styles.xml'))
+    except KeyError:
+        return names, default
+    for style in root.iterchildren(_W_STYLE):
+        if style.get(_W_TYPE) != 'paragraph':
+            continue
+        name_el = style.find(_W_NAME)
+        name = BabelFish.internal2ui(name_el.get(_W_VAL)) if name_el is not None else style.get(_W_STYLE_ID)
+        names[style.get(_W_STYLE_ID)] = name
+        if style.get(_W_DEFAULT) in ('1', 'true', 'on'):
+            default = name
+    return names, default
@@ -0,0 +1,233 @@
+"""
+Package writing utilities for Word Document Server.
+
+A .docx file is a zip package. Rewriting it with zipfile or python-docx's
+doc.save() decompresses and recompresses every member, including large
+images and fonts that never change. The writer here copies the raw
+compressed bytes of unchanged members straight from the source package and
+only compresses members whose content actually changed.
+"""
+import os
+import stat
+import struct
+import tempfile
+import zipfile
+import zlib
+from io import BytesIO
+from typing import IO, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.pkgwriter import _ContentTypesItem
+
+# A package can be given as a path, as raw bytes, or as a binary file object
+PackageSource = Union[str, bytes, IO[bytes]]
+
+# Size of the fixed part of a zip local file header
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+_MASK_USE_DATA_DESCRIPTOR = 0x08
+
+# Read once at import: os.umask can only be read by setting it, which is not
+# safe once worker threads create files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _open_source(source: PackageSource) -> zipfile.ZipFile:
+    if isinstance(source, (bytes, bytearray)):
+        return zipfile.ZipFile(BytesIO(source))
+    return zipfile.ZipFile(source)
+
+
+def _read_raw_member(zin: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    """Return the still-compressed bytes of a member of zin."""
+    fp = zin.fp
+    fp.seek(info.header_offset)
+    header = fp.read(_LOCAL_HEADER_SIZE)
+    if header[:4] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    fp.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+    return fp.read(info.compress_size)
+
+
+# ZipFile internals used by _write_raw_member. They are the ones
+# ZipFile.writestr uses in CPython 3.11 through 3.13 (tests/test_package_writer.py
+# checks the running interpreter); if any is missing, members are copied
+# through the public API instead.
+_ZIPFILE_INTERNALS = ('_lock', '_writecheck', '_didModify', 'start_dir', 'fp', 'filelist', 'NameToInfo')
+
+
+def raw_copy_supported(zout: zipfile.ZipFile) -> bool:
+    """Whether compressed members can be appended to zout without recompressing."""
+    return all(hasattr(zout, name) for name in _ZIPFILE_INTERNALS) and not getattr(zout, '_writing', False)
+
+
+def _write_raw_member(zout: zipfile.ZipFile, info: zipfile.ZipInfo, raw: bytes) -> None:
+    """
+    Append an already compressed member to zout.
+
+    zipfile has no public API for this, so this mirrors what ZipFile.writestr
+    does around its compressor. Check raw_copy_supported(zout) first.
+    """
+    zinfo = _member_info(info)
+    # Sizes and CRC go in the local header, so no trailing data descriptor
+    zinfo.flag_bits = info.flag_bits & ~_MASK_USE_DATA_DESCRIPTOR
+    zinfo.CRC = info.CRC
+    zinfo.compress_size = info.compress_size
+    zinfo.file_size = info.file_size
+    zip64 = max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT
+
+    with zout._lock:
+        zout.fp.seek(zout.start_dir)
+        zinfo.header_offset = zout.fp.tell()
+        zout._writecheck(zinfo)
+        zout._didModify = True
+        zout.fp.write(zinfo.FileHeader(zip64))
+        zout.fp.write(raw)
+        zout.filelist.append(zinfo)
+        zout.NameToInfo[zinfo.filename] = zinfo
+        zout.start_dir = zout.fp.tell()
+
+
+def _member_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.external_attr = info.external_attr
+    zinfo.create_system = info.create_system
+    zinfo.comment = info.comment
+    return zinfo
+
+
+def _copy_member(zout: zipfile.ZipFile, zin: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+    """Copy a member of zin to zout unchanged, raw if this zipfile allows it."""
+    if raw_copy_supported(zout):
+        _write_raw_member(zout, info, _read_raw_member(zin, info))
+    else:
+        zout.writestr(_member_info(info), zin.read(info))
+
+
+def write_package(target: Union[str, IO[bytes]], members: Iterable[Tuple[str, Optional[bytes]]],
+                  source: Optional[PackageSource] = None) -> Dict[str, int]:
+    """
+    Write a zip package, reusing compressed data from source where possible.
+
+    Args:
+        target: Path or writable binary file object for the new package
+        members: (name, data) pairs in output order. data of None copies the
+            member from source unchanged; otherwise data is compared with the
+            source member (size and CRC) and copied raw if identical.
+        source: Optional package the new one is derived from
+
+    Returns:
+        Dict with the number of members copied raw and members compressed
+    """
+    counts = {"copied": 0, "compressed": 0}
+    zin = _open_source(source) if source is not None else None
+    try:
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for name, data in members:
+                info = None
+                if zin is not None:
+                    try:
+                        info = zin.getinfo(name)
+                    except KeyError:
+                        info = None
+                if data is None:
+                    if info is None:
+                        raise KeyError(f"Member {name} not found in source package")
+                    _copy_member(zout, zin, info)
+                    counts["copied"] += 1
+                elif (info is not None and info.file_size == len(data)
+                        and info.CRC == zlib.crc32(data)):
+                    _copy_member(zout, zin, info)
+                    counts["copied"] += 1
+                else:
+                    zout.writestr(name, data)
+                    counts["compressed"] += 1
+    finally:
+        if zin is not None:
+            zin.close()
+    return counts
+
+
+def _write_to_path(path: str, members: Iterable[Tuple[str, Optional[bytes]]],
+                   source: Optional[PackageSource]) -> Dict[str, int]:
+    """
+    Write a package to path via a temporary file, so path may also be the source.
+
+    The result keeps the permissions of the file it replaces, or gets the
+    umask default for a new file (mkstemp alone would leave it at 0600).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        counts = write_package(temp_path, members, source)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+        return counts
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _document_members(doc) -> Iterator[Tuple[str, bytes]]:
+    """Yield the members of a python-docx Document the way doc.save() lays them out."""
+    package = doc.part.package
+    parts = list(package.iter_parts())
+    yield CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob
+    yield PACKAGE_URI.rels_uri.membername, package.rels.xml
+    for part in parts:
+        yield part.partname.membername, part.blob
+        if len(part.rels):
+            yield part.partname.rels_uri.membername, part.rels.xml
+
+
+def save_document(doc, target: Union[str, IO[bytes]],
+                  source: Optional[PackageSource] = None) -> Dict[str, int]:
+    """
+    Save a python-docx Document, copying unchanged members from source.
+
+    Equivalent to doc.save(target), except that parts whose bytes match the
+    package the document was loaded from (images, fonts, untouched XML) are
+    copied without being recompressed.
+
+    Args:
+        doc: python-docx Document
+        target: Path or writable binary file object
+        source: The package doc was loaded from (path, bytes or file object)
+    """
+    if isinstance(target, str):
+        return _write_to_path(target, _document_members(doc), source)
+    return write_package(target, _document_members(doc), source)
+
+
+def rewrite_package(source: str, target: str, replacements: Dict[str, bytes]) -> Dict[str, int]:
+    """
+    Rewrite a package on disk, replacing some members.
+
+    Members not in replacements are copied raw in their original order;
+    replacements for members the source does not have are appended.
+
+    Args:
+        source: Path of the existing package
+        target: Path to write to (may be the same as source)
+        replacements: Member name to new content
+    """
+    with zipfile.ZipFile(source) as zin:
+        names = zin.namelist()
+
+    def members():
+        for name in names:
+            yield name, replacements.get(name)
+        for name, data in replacements.items():
+            if name not in names:
+                yield name, data
+
+    return _write_to_path(target, members(), source)
@@ -0,0 +1,158 @@
+"""
+Paragraph text index for Word Document Server.
+
+Anchor lookups ("the paragraph whose text is X") used to walk doc.paragraphs
+and rebuild every paragraph's text from its runs on each call. The index
+here computes each body paragraph's text and style name once per parsed
+document, keeps a hash map from normalized text to paragraphs, and is
+updated in place by the functions that insert or remove paragraphs.
+
+Positions match doc.paragraphs (top-level body paragraphs only).
+"""
+import weakref
+from typing import Dict, List, Optional
+
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml.ns import qn
+
+_W_P = qn('w:p')
+# Direct <w:p> children that carry text, as in CT_P.text
+_TEXT_CONTAINERS = (qn('w:r'), qn('w:hyperlink'))
+
+# Index per parsed Document, keyed by its root element; entries go away with it
+_indexes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def normalize_text(text: str) -> str:
+    """Normalize paragraph text for anchor matching (case and surrounding whitespace)."""
+    return text.strip().lower()
+
+
+class _IndexedParagraph:
+    """A body paragraph with its cached text and style name."""
+
+    __slots__ = ("element", "style_name", "text", "key")
+
+    def __init__(self, element, style_name: str, text: str):
+        self.element = element
+        self.style_name = style_name
+        self.text = text
+        self.key = normalize_text(text)
+
+
+class ParagraphIndex:
+    """
+    Ordered index of the top-level paragraphs of a document.
+
+    Use get_paragraph_index(doc) rather than constructing this directly, so
+    the index is shared between calls on the same Document. Code that adds or
+    removes body paragraphs behind the index's back is detected by a change
+    in the number of body children; code that edits paragraph text or style
+    in place must call invalidate_paragraph_index(doc). DocumentStore.mark_dirty
+    does so for documents kept in the store.
+    """
+
+    def __init__(self, doc):
+        self._body = doc.element.body
+        self._style_names: Dict[str, str] = {}
+        self._default_style = "Normal"
+        for style in doc.styles:
+            if style.type == WD_STYLE_TYPE.PARAGRAPH:
+                self._style_names[style.style_id] = style.name
+                if style.element.default:
+                    self._default_style = style.name
+        self._entries: List[_IndexedParagraph] = [
+            self._make_entry(el) for el in self._body.iterchildren(_W_P)
+        ]
+        self._by_key: Dict[str, List[_IndexedParagraph]] = {}
+        for entry in self._entries:
+            self._by_key.setdefault(entry.key, []).append(entry)
+        self._positions: Optional[Dict[object, int]] = None
+        self._body_len = len(self._body)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_current(self) -> bool:
+        """Return False if body children were added or removed without updating the index."""
+        return len(self._body) == self._body_len
+
+    def element(self, position: int):
+        return self._entries[position].element
+
+    def text(self, position: int) -> str:
+        return self._entries[position].text
+
+    def style_name(self, position: int) -> str:
+        return self._entries[position].style_name
+
+    def position(self, element) -> int:
+        """Return the paragraph index of a body paragraph element."""
+        if self._positions is None:
+            self._positions = {entry.element: i for i, entry in enumerate(self._entries)}
+        return self._positions[element]
+
+    def find_exact(self, text: str) -> List[int]:
+        """Positions of paragraphs whose text equals text."""
+        return sorted(self.position(entry.element)
+                      for entry in self._by_key.get(normalize_text(text), ())
+                      if entry.text == text)
+
+    def find_normalized(self, text: str, skip_toc: bool = False) -> List[int]:
+        """Positions of paragraphs whose normalized text equals normalize_text(text)."""
+        return sorted(self.position(entry.element)
+                      for entry in self._by_key.get(normalize_text(text), ())
+                      if not (skip_toc and _is_toc_style(entry.style_name)))
+
+    def find_containing(self, text: str, skip_toc: bool = False) -> List[int]:
+        """Positions of paragraphs whose text contains text."""
+        return [i for i, entry in enumerate(self._entries)
+                if text in entry.text and not (skip_toc and _is_toc_style(entry.style_name))]
+
+    def insert(self, position: int, element) -> None:
+        """Record that element was inserted into the body as paragraph number position."""
+        entry = self._make_entry(element)
+        self._entries.insert(position, entry)
+        self._by_key.setdefault(entry.key, []).append(entry)
+        self._positions = None
+        self._body_len += 1
+
+    def remove(self, start: int, stop: Optional[int] = None) -> None:
+        """Record that paragraphs start..stop-1 (or just start) were removed from the body."""
+        stop = start + 1 if stop is None else stop
+        for entry in self._entries[start:stop]:
+            bucket = self._by_key[entry.key]
+            bucket.remove(entry)
+            if not bucket:
+                del self._by_key[entry.key]
+        del self._entries[start:stop]
+        self._positions = None
+        self._body_len -= stop - start
+
+    def note_removed_elements(self, count: int) -> None:
+        """Record that count non-paragraph body children (tables etc.) were removed."""
+        self._body_len -= count
+
+    def _make_entry(self, element) -> _IndexedParagraph:
+        style_name = self._style_names.get(element.style, self._default_style)
+        # Same result as element.text, without compiling an XPath per paragraph
+        text = "".join(child.text for child in element if child.tag in _TEXT_CONTAINERS)
+        return _IndexedParagraph(element, style_name, text)
+
+
+def _is_toc_style(style_name: str) -> bool:
+    return style_name.lower().startswith("toc")
+
+
+def get_paragraph_index(doc) -> ParagraphIndex:
+    """Return the paragraph index for doc, building it on first use or if it went stale."""
+    index = _indexes.get(doc.element)
+    if index is None or not index.is_current():
+        index = ParagraphIndex(doc)
+        _indexes[doc.element] = index
+    return index
+
+
+def invalidate_paragraph_index(doc) -> None:
+    """Drop the cached index for doc, e.g. after paragraph text was edited in place."""
+    _indexes.pop(doc.element, None)
@@ -0,0 +1,181 @@
+"""
+Content-addressed PDF cache for Word Document Server.
+
+Converting the same unchanged document to PDF again is common, and each
+conversion costs seconds of LibreOffice time. Converted PDFs are kept on
+disk under a SHA-256 of the input .docx bytes and the converter version, so
+a repeat conversion becomes a hard link (or a copy across file systems).
+
+The cache is an LRU bounded by total bytes. File modification times record
+the LRU order, so it survives restarts.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Union
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB of PDFs
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    if os.path.lexists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+class PdfCache:
+    """
+    On-disk LRU of converted PDFs keyed by key(docx, converter).
+
+    A max_bytes of 0 disables the cache.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        if max_bytes:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> "PdfCache":
+        """Create a cache configured by MCP_PDF_CACHE_DIR and MCP_PDF_CACHE_MAX_BYTES."""
+        return cls(
+            directory=os.getenv('MCP_PDF_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'word-mcp-pdf-cache'),
+            max_bytes=int(os.getenv('MCP_PDF_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+        )
+
+    @staticmethod
+    def key(source: Union[str, bytes], converter: str) -> str:
+        """
+        Return the cache key for a document and converter.
+
+        Args:
+            source: The .docx bytes, or the path of the .docx file
+            converter: Identifier of the converter build (see OfficePool.converter_id)
+        """
+        digest = hashlib.sha256(converter.encode('utf-8') + b'\0')
+        if isinstance(source, (bytes, bytearray)):
+            digest.update(source)
+        else:
+            with open(source, 'rb') as f:
+                for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def fetch(self, key: str, target: str) -> bool:
+        """Place the cached PDF for key at target; return False on a miss."""
+        if not self.max_bytes:
+            return False
+        with self._lock:
+            size = self._entries.get(key)
+            if size is None:
+                self._misses += 1
+                return False
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            # A hard-linked output that was rewritten in place changed the entry too
+            if os.path.getsize(path) != size:
+                raise OSError("cached PDF was modified")
+            os.utime(path)
+            _link_or_copy(path, target)
+        except OSError:
+            with self._lock:
+                self._drop(key)
+                self._misses += 1
+            return False
+        with self._lock:
+            self._hits += 1
+        return True
+
+    def store(self, key: str, pdf_path: str) -> None:
+        """Add the PDF at pdf_path to the cache under key."""
+        if not self.max_bytes:
+            return
+        size = os.path.getsize(pdf_path)
+        if size > self.max_bytes:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            _link_or_copy(pdf_path, temp_path)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        with self._lock:
+            self._bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _drop(self, key: str) -> None:
+        """Remove an entry and its file (caller holds self._lock)."""
+        self._bytes -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _load(self) -> None:
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.tmp'):
+                # Left over from an interrupted store()
+                os.remove(path)
+            elif name.endswith('.pdf'):
+                st = os.stat(path)
+                found.append((st.st_mtime_ns, name[:-4], st.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+
+
+# Shared by the conversion tools
+_cache: Optional[PdfCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache() -> PdfCache:
+    """Return the shared cache, created from the environment on first conversion."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PdfCache.from_env()
+        return _cache
+
+
+def pdf_cache_stats() -> Optional[Dict[str, Any]]:
+    """Stats of the shared cache, or None if no conversion has created it yet."""
+    return _cache.stats() if _cache is not None else None
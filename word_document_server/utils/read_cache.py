@@ -0,0 +1,176 @@
+"""
+Result cache for read-only tools in Word Document Server.
+
+Tools such as get_document_text or get_document_outline reparse the file on
+every call, and agents tend to call them repeatedly on a document that has
+not changed. Results are memoized here, keyed on the tool, its arguments and
+the identity of the document contents:
+
+- files on disk by (absolute path, mtime_ns, size), so any write to the file
+  changes the key;
+- in-memory documents by a SHA-256 of their bytes.
+
+Besides tool results, structures derived from a document (such as its
+search index) are kept here so they are dropped with the document state.
+
+Write tools also drop a path's entries explicitly (see check_file_writeable),
+which covers rewrites that keep the same size within one mtime tick.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple, Union
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MB of cached results
+DEFAULT_MAX_ENTRIES = 1024
+
+# Files modified this recently are not cached: another write in the same
+# timestamp tick could leave mtime and size unchanged (cf. git's "racy clean")
+_RACY_WINDOW_NS = 50_000_000
+
+
+def _result_size(value: Any) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    # Derived structures such as a SearchIndex report their own size
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return len(repr(value))
+
+
+class ReadCache:
+    """
+    Size-bounded LRU of read-only tool results.
+
+    Use get_or_compute(); a max_bytes of 0 disables caching.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._keys_by_path: Dict[str, Set[Tuple]] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ReadCache":
+        """Create a cache sized by MCP_READ_CACHE_MAX_BYTES and MCP_READ_CACHE_MAX_ENTRIES."""
+        return cls(
+            max_bytes=int(os.getenv('MCP_READ_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            max_entries=int(os.getenv('MCP_READ_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+        )
+
+    def get_or_compute(self, source: Union[str, bytes], name: str, args: Tuple[Hashable, ...],
+                       compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result of compute() for this document state, computing it on a miss.
+
+        Args:
+            source: Path of the document, or the bytes of an in-memory document
+            name: Name of the operation (e.g. the tool name)
+            args: Hashable arguments that affect the result
+            compute: Function producing the result
+        """
+        if not self.max_bytes:
+            return compute()
+
+        path = None
+        if isinstance(source, (bytes, bytearray)):
+            source_key = ('sha256', hashlib.sha256(source).hexdigest())
+            cacheable = True
+        else:
+            path = os.path.abspath(source)
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Let compute() produce its usual "does not exist" result
+                return compute()
+            source_key = ('path', path, st.st_mtime_ns, st.st_size)
+            cacheable = time.time_ns() - st.st_mtime_ns > _RACY_WINDOW_NS
+
+        key = (name, args, source_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        value = compute()
+        if cacheable:
+            self._store(key, path, value)
+        return value
+
+    def invalidate(self, path: str) -> None:
+        """Drop every cached result for a file path."""
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in self._keys_by_path.pop(path, ()):
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+            }
+
+    def _store(self, key: Tuple, path, value: Any) -> None:
+        size = _result_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            if path is not None:
+                self._keys_by_path.setdefault(path, set()).add(key)
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        key, (_, size) = self._entries.popitem(last=False)
+        self._bytes -= size
+        source_key = key[2]
+        if source_key[0] == 'path':
+            keys = self._keys_by_path.get(source_key[1])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_path[source_key[1]]
+
+
+# Shared by all read-only tools
+_cache: Optional[ReadCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_read_cache() -> ReadCache:
+    """Return the shared cache, created from the environment on first use (after .env is loaded)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReadCache.from_env()
+        return _cache
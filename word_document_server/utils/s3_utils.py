@@ -1,20 +1,108 @@
 """
-S3 utility functions for generating presigned URLs.
+S3 utility functions for uploading documents and generating presigned URLs.
+
+A single S3 client is created on first use and shared by all tools (boto3
+clients are thread-safe), so stdio users who never touch S3 do not pay for
+importing boto3 or resolving credentials, and worker threads share one
+connection pool instead of opening a client per call.
 """
 import os
-import boto3
-from botocore.exceptions import ClientError
+import threading
+from io import BytesIO
+from typing import Optional
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+DEFAULT_MULTIPART_THRESHOLD = 8 * 1024 * 1024  # 8 MB
+DEFAULT_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+DEFAULT_MULTIPART_CONCURRENCY = 4
+
+_client = None
+_transfer_config = None
+_client_lock = threading.Lock()
+
 
 def get_s3_client():
-    """Create and return an S3 client with credentials from environment variables."""
-    return boto3.client(
-        's3',
-        aws_access_key_id=os.getenv('AMAZON_ACCESS_KEY_ID'),
-        aws_secret_access_key=os.getenv('AMAZON_SECRET_ACCESS_KEY'),
-        region_name=os.getenv('AMAZON_DEFAULT_REGION', 'us-east-1')
-    )
-
-def generate_presigned_url(bucket_name, object_key, expiration=3600):
+    """Return the shared S3 client, creating it with credentials from environment variables on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import boto3
+                from botocore.config import Config
+
+                _client = boto3.client(
+                    's3',
+                    aws_access_key_id=os.getenv('AMAZON_ACCESS_KEY_ID'),
+                    aws_secret_access_key=os.getenv('AMAZON_SECRET_ACCESS_KEY'),
+                    region_name=os.getenv('AMAZON_DEFAULT_REGION', 'us-east-1'),
+                    endpoint_url=os.getenv('MCP_S3_ENDPOINT_URL') or None,
+                    config=Config(
+                        # One connection per worker thread plus multipart part uploads
+                        max_pool_connections=int(os.getenv('MCP_S3_MAX_POOL_CONNECTIONS',
+                                                           DEFAULT_MAX_POOL_CONNECTIONS)),
+                        retries={'max_attempts': 3, 'mode': 'standard'},
+                        tcp_keepalive=True,
+                    ),
+                )
+    return _client
+
+
+def reset_s3_client() -> None:
+    """Drop the shared client so the next call picks up changed environment variables."""
+    global _client, _transfer_config
+    with _client_lock:
+        _client = None
+        _transfer_config = None
+
+
+def _get_transfer_config():
+    global _transfer_config
+    if _transfer_config is None:
+        from boto3.s3.transfer import TransferConfig
+
+        _transfer_config = TransferConfig(
+            multipart_threshold=int(os.getenv('MCP_S3_MULTIPART_THRESHOLD', DEFAULT_MULTIPART_THRESHOLD)),
+            multipart_chunksize=int(os.getenv('MCP_S3_MULTIPART_CHUNKSIZE', DEFAULT_MULTIPART_CHUNKSIZE)),
+            max_concurrency=int(os.getenv('MCP_S3_MULTIPART_CONCURRENCY', DEFAULT_MULTIPART_CONCURRENCY)),
+            use_threads=True,
+        )
+    return _transfer_config
+
+
+def upload_bytes(bucket_name: str, object_key: str, data: bytes,
+                 content_type: str = DOCX_CONTENT_TYPE) -> None:
+    """
+    Upload bytes to S3.
+
+    Small bodies go up in one PUT; bodies of at least MCP_S3_MULTIPART_THRESHOLD
+    bytes use a multipart upload with parts sent in parallel. Blocks until the
+    upload finishes, so call it from a worker thread (tools run in the worker
+    pool), not on the event loop.
+    """
+    s3_client = get_s3_client()
+    config = _get_transfer_config()
+    if len(data) < config.multipart_threshold:
+        s3_client.put_object(Bucket=bucket_name, Key=object_key, Body=data, ContentType=content_type)
+        return
+    s3_client.upload_fileobj(BytesIO(data), bucket_name, object_key,
+                             ExtraArgs={'ContentType': content_type}, Config=config)
+
+
+def object_exists(bucket_name: str, object_key: str) -> bool:
+    """Return True if object_key exists in bucket_name."""
+    from botocore.exceptions import ClientError
+
+    try:
+        get_s3_client().head_object(Bucket=bucket_name, Key=object_key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+    return True
+
+
+def generate_presigned_url(bucket_name, object_key, expiration=3600) -> Optional[str]:
     """
     Generate a presigned URL to share an S3 object
 
@@ -23,12 +111,13 @@ def generate_presigned_url(bucket_name, object_key, expiration=3600):
     :param expiration: Time in seconds for the presigned URL to remain valid
     :return: Presigned URL as string. If error, returns None.
     """
-    s3_client = get_s3_client()
+    from botocore.exceptions import ClientError
+
     try:
-        response = s3_client.generate_presigned_url('get_object',
-                                                    Params={'Bucket': bucket_name,
-                                                            'Key': object_key},
-                                                    ExpiresIn=expiration)
+        response = get_s3_client().generate_presigned_url('get_object',
+                                                          Params={'Bucket': bucket_name,
+                                                                  'Key': object_key},
+                                                          ExpiresIn=expiration)
     except ClientError as e:
         print(f"Error generating presigned URL: {e}")
         return None
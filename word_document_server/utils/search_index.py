@@ -0,0 +1,147 @@
+"""
+Text search index for Word Document Server.
+
+find_text_in_document used to reparse the document for every query, lower-
+case every paragraph again and, for whole-word searches, split every
+paragraph into words. A SearchIndex is built once per document state (it is
+kept in the read cache, so an edit to the file makes a new one) and holds:
+
+- the text of every searchable paragraph, in result order, concatenated
+  into one string so a query is a single compiled-regex scan;
+- a word -> paragraphs inverted index, used to narrow whole-word queries to
+  the paragraphs that contain every word of the query.
+
+Table cells are read from the XML directly instead of through row.cells,
+which python-docx recomputes per cell and which repeats merged cells.
+"""
+import bisect
+import re
+import zipfile
+from typing import Any, Dict, IO, Iterable, List, Optional, Set, Union
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+
+_W_P = qn('w:p')
+_W_TBL = qn('w:tbl')
+_W_TR = qn('w:tr')
+_W_TC = qn('w:tc')
+_W_TCPR = qn('w:tcPr')
+_W_GRIDSPAN = qn('w:gridSpan')
+_W_VAL = qn('w:val')
+_WORD = re.compile(r'\w+')
+# Joins paragraph texts; queries cannot match across it
+_SEPARATOR = '\x00'
+_CONTEXT_LENGTH = 100
+
+
+class _Entry:
+    """A searchable paragraph: where it is and what it says."""
+
+    __slots__ = ("paragraph_index", "location", "text")
+
+    def __init__(self, text: str, paragraph_index: Optional[int] = None, location: Optional[str] = None):
+        self.text = text
+        self.paragraph_index = paragraph_index
+        self.location = location
+
+    def occurrence(self, position: int) -> Dict[str, Any]:
+        result = {"position": position,
+                  "context": self.text[:_CONTEXT_LENGTH] + ("..." if len(self.text) > _CONTEXT_LENGTH else "")}
+        if self.location is None:
+            return {"paragraph_index": self.paragraph_index, **result}
+        return {"location": self.location, **result}
+
+
+class SearchIndex:
+    """
+    Searchable text of one document.
+
+    Entries are the top-level paragraphs (with their doc.paragraphs index)
+    followed by the paragraphs of top-level table cells, located as
+    "Table t, Row r, Column c" where c is the cell's first grid column.
+    """
+
+    def __init__(self, entries: List[_Entry]):
+        self._entries = entries
+        self._text = _SEPARATOR.join(entry.text for entry in entries)
+        self._starts: List[int] = []
+        offset = 0
+        for entry in entries:
+            self._starts.append(offset)
+            offset += len(entry.text) + 1
+        self._words: Optional[Dict[str, List[int]]] = None
+        # Approximate memory use, for the read cache's byte budget
+        self.nbytes = 2 * len(self._text) + 100 * len(entries)
+
+    @classmethod
+    def from_docx(cls, source: Union[str, IO[bytes]]) -> "SearchIndex":
+        """Build the index from a .docx path or binary file object."""
+        with zipfile.ZipFile(source) as zf:
+            body = parse_xml(zf.read('word/document.xml')).find(qn('w:body'))
+        entries = [_Entry(p.text, paragraph_index=i) for i, p in enumerate(body.iterchildren(_W_P))]
+        for t, table in enumerate(body.iterchildren(_W_TBL)):
+            for r, row in enumerate(table.iterchildren(_W_TR)):
+                column = 0
+                for cell in row.iterchildren(_W_TC):
+                    location = f"Table {t}, Row {r}, Column {column}"
+                    entries.extend(_Entry(p.text, location=location) for p in cell.iterchildren(_W_P))
+                    column += _grid_span(cell)
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(self, text: str, match_case: bool = True, whole_word: bool = False,
+               offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Find text and return one page of occurrences with the total count.
+
+        Positions are character offsets into the paragraph text. Whole-word
+        matching requires that the match is not preceded or followed by a
+        letter, digit or underscore.
+        """
+        pattern = re.escape(text)
+        if whole_word:
+            pattern = rf'(?<!\w){pattern}(?!\w)'
+        compiled = re.compile(pattern, 0 if match_case else re.IGNORECASE)
+
+        occurrences = []
+        total = 0
+        for i, position in self._matches(compiled, text, whole_word):
+            if total >= offset and (limit is None or len(occurrences) < limit):
+                occurrences.append(self._entries[i].occurrence(position))
+            total += 1
+        return {"occurrences": occurrences, "total_count": total}
+
+    def _matches(self, compiled, text: str, whole_word: bool) -> Iterable:
+        """Yield (entry number, position) of each match, in entry order."""
+        query_words = [w.lower() for w in _WORD.findall(text)]
+        if whole_word and query_words:
+            for i in self._candidates(query_words):
+                for match in compiled.finditer(self._entries[i].text):
+                    yield i, match.start()
+            return
+        for match in compiled.finditer(self._text):
+            i = bisect.bisect_right(self._starts, match.start()) - 1
+            yield i, match.start() - self._starts[i]
+
+    def _candidates(self, words: List[str]) -> List[int]:
+        """Entries that contain every word, in entry order."""
+        if self._words is None:
+            index: Dict[str, List[int]] = {}
+            for i, entry in enumerate(self._entries):
+                for word in set(_WORD.findall(entry.text.lower())):
+                    index.setdefault(word, []).append(i)
+            self._words = index
+        postings = sorted((self._words.get(word, []) for word in set(words)), key=len)
+        found: Set[int] = set(postings[0])
+        for other in postings[1:]:
+            found.intersection_update(other)
+        return sorted(found)
+
+
+def _grid_span(cell) -> int:
+    tc_pr = cell.find(_W_TCPR)
+    span = tc_pr.find(_W_GRIDSPAN) if tc_pr is not None else None
+    return int(span.get(_W_VAL)) if span is not None else 1
@@ -0,0 +1,172 @@
+"""
+Template cache for Word Document Server.
+
+Every session used to start by downloading its template from S3. Templates
+are now kept in memory after the first download and revalidated against
+the S3 ETag once their TTL has passed (a conditional GET that transfers
+nothing while the template is unchanged).
+
+New documents share the cached bytes: the store only parses them on first
+access and re-serializes only the parts an edit touched, so starting a
+session from a cached template is a memory operation.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from word_document_server.utils.s3_utils import get_s3_client
+
+DEFAULT_TTL = 300  # seconds before a cached template is revalidated
+DEFAULT_TEMPLATE_FILENAME = "Record_of_advice.docx"
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class TemplateError(Exception):
+    """Raised when a template cannot be resolved or downloaded."""
+
+
+class _CachedTemplate:
+    __slots__ = ("data", "etag", "checked")
+
+    def __init__(self, data: bytes, etag: Optional[str], checked: float):
+        self.data = data
+        self.etag = etag
+        self.checked = checked
+
+
+def parse_templates(spec: str) -> Dict[str, str]:
+    """Parse MCP_TEMPLATES ("name=key,name=key") into a name -> S3 key mapping."""
+    templates = {}
+    for item in spec.split(','):
+        name, sep, key = item.partition('=')
+        if sep and name.strip() and key.strip():
+            templates[name.strip()] = key.strip()
+    return templates
+
+
+class TemplateCache:
+    """
+    In-memory cache of template documents stored in S3.
+
+    Templates are looked up by name in a name -> object key mapping; the
+    default template (name None) is S3_OBJECT_KEY. A ttl of 0 revalidates
+    on every get().
+    """
+
+    def __init__(self, bucket: Optional[str], default_key: Optional[str] = None,
+                 templates: Optional[Dict[str, str]] = None, ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.bucket = bucket
+        self.default_key = default_key
+        self.templates = dict(templates or {})
+        self.ttl = ttl
+        self._clock = clock
+        self._cache: Dict[str, _CachedTemplate] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "revalidations": 0, "downloads": 0}
+
+    @classmethod
+    def from_env(cls) -> "TemplateCache":
+        """Create a cache configured by S3_BUCKET_NAME, S3_OBJECT_KEY, MCP_TEMPLATES and MCP_TEMPLATE_TTL."""
+        return cls(
+            bucket=os.getenv('S3_BUCKET_NAME'),
+            default_key=os.getenv('S3_OBJECT_KEY'),
+            templates=parse_templates(os.getenv('MCP_TEMPLATES', '')),
+            ttl=float(os.getenv('MCP_TEMPLATE_TTL', DEFAULT_TTL)),
+        )
+
+    def resolve(self, name: Optional[str] = None) -> Tuple[str, str]:
+        """Return (object key, filename) for a template name."""
+        if name is None:
+            if not self.default_key:
+                raise TemplateError("S3_OBJECT_KEY environment variable not set")
+            return self.default_key, DEFAULT_TEMPLATE_FILENAME
+        key = self.templates.get(name)
+        if key is None:
+            available = ", ".join(sorted(self.templates)) or "none configured"
+            raise TemplateError(f"Unknown template '{name}' (available: {available})")
+        filename = os.path.basename(key)
+        return key, filename if filename.lower().endswith('.docx') else f"{filename}.docx"
+
+    def get(self, name: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Return (docx bytes, filename) of a template, downloading it if needed.
+
+        The returned bytes are the cached object itself, not a copy.
+        """
+        if not self.bucket:
+            raise TemplateError("S3_BUCKET_NAME environment variable not set")
+        key, filename = self.resolve(name)
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        # One download per template even when many sessions start at once
+        with key_lock:
+            cached = self._cache.get(key)
+            now = self._clock()
+            if cached is not None and now - cached.checked < self.ttl:
+                self._count("hits")
+                return cached.data, filename
+            self._cache[key] = self._fetch(key, cached, now)
+            return self._cache[key].data, filename
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop a cached template (all of them if name is None)."""
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(self.resolve(name)[0], None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "templates": len(self._cache),
+                "bytes": sum(len(t.data) for t in self._cache.values()),
+            }
+
+    def _fetch(self, key: str, cached: Optional[_CachedTemplate], now: float) -> _CachedTemplate:
+        from botocore.exceptions import ClientError
+
+        params = {"Bucket": self.bucket, "Key": key}
+        if cached is not None and cached.etag:
+            params["IfNoneMatch"] = cached.etag
+        try:
+            response = get_s3_client().get_object(**params)
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            if cached is not None and error.get('Code') in ('304', 'NotModified'):
+                self._count("revalidations")
+                cached.checked = now
+                return cached
+            raise TemplateError(f"Failed to download template {key}: {error.get('Message') or e}")
+        content_type = response.get('ContentType', '')
+        if DOCX_CONTENT_TYPE not in content_type:
+            raise TemplateError("The template is not a valid Word document")
+        data = response['Body'].read()
+        self._count("downloads")
+        return _CachedTemplate(data, response.get('ETag'), now)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+
+_cache: Optional[TemplateCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_template_cache() -> TemplateCache:
+    """Return the shared cache, created from the environment on first use (after .env is loaded)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TemplateCache.from_env()
+        return _cache
+
+
+def template_cache_stats() -> Optional[Dict[str, Any]]:
+    """Stats of the shared cache, or None if no template has been loaded yet."""
+    return _cache.stats() if _cache is not None else None
@@ -0,0 +1,189 @@
+"""
+Multi-pattern find and replace for Word Document Server.
+
+Word splits text into runs wherever formatting, spell-check state or edit
+history changes, so a placeholder such as "{{client_name}}" is often spread
+over several runs and never appears in any single run's text. Replacement
+here works on the concatenated text of each paragraph, with a map from
+text offsets back to the <w:t> elements that hold it:
+
+- Literal patterns are compiled into one alternation, so each paragraph is
+  scanned once no matter how many patterns there are (longest literal
+  wins when several match at the same position). Regular expressions are
+  searched one by one, since joining them would renumber their groups,
+  and their matches are merged by position (the earlier pattern wins
+  when two start at the same place).
+- A match spanning runs is written into the run where it starts, and the
+  matched characters are removed from the following runs. Run properties
+  are left alone, so formatting is kept.
+"""
+import re
+from typing import Dict, List, Mapping, Optional, Pattern, Tuple
+
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml.ns import qn
+
+from word_document_server.utils.paragraph_index import invalidate_paragraph_index
+
+_W_P = qn('w:p')
+_W_R = qn('w:r')
+_W_T = qn('w:t')
+_W_HYPERLINK = qn('w:hyperlink')
+_XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+# Run children that render as text but are not <w:t>; matches may not span them
+_BREAKS = {qn('w:tab'): '\t', qn('w:br'): '\n', qn('w:cr'): '\n'}
+
+
+class Replacer:
+    """
+    A compiled set of replacements.
+
+    Args:
+        replacements: Mapping of pattern to replacement text
+        regex: Treat patterns as regular expressions; replacements may then
+            use group references such as \\1 or \\g<name>
+    """
+
+    def __init__(self, replacements: Mapping[str, str], regex: bool = False):
+        self.patterns: List[str] = [p for p in replacements if p]
+        if not self.patterns:
+            raise ValueError("No patterns to replace")
+        self.replacements = [replacements[p] for p in self.patterns]
+        self.regex = regex
+        if regex:
+            self._compiled: List[Pattern] = [re.compile(p) for p in self.patterns]
+        else:
+            order = sorted(range(len(self.patterns)), key=lambda i: -len(self.patterns[i]))
+            # Each pattern is wrapped in its own group; lastgroup tells which matched
+            alternation = "|".join(f"(?P<_p{i}>{re.escape(self.patterns[i])})" for i in order)
+            self._combined = re.compile(alternation)
+
+    def matches(self, text: str) -> List[Tuple[int, int, int, str]]:
+        """Return (start, end, pattern number, replacement) for each match in text."""
+        if self.regex:
+            return self._regex_matches(text)
+        found = []
+        for match in self._combined.finditer(text):
+            i = int(match.lastgroup[2:])
+            found.append((match.start(), match.end(), i, self.replacements[i]))
+        return found
+
+    def _regex_matches(self, text: str) -> List[Tuple[int, int, int, str]]:
+        # Next non-empty match of every pattern at or after the scan position
+        pending = [_search(pattern, text, 0) for pattern in self._compiled]
+        found = []
+        position = 0
+        while True:
+            best = None
+            for i, match in enumerate(pending):
+                if match is not None and match.start() < position:
+                    match = pending[i] = _search(self._compiled[i], text, position)
+                if match is not None and (best is None or match.start() < pending[best].start()):
+                    best = i
+            if best is None:
+                return found
+            match = pending[best]
+            found.append((match.start(), match.end(), best, match.expand(self.replacements[best])))
+            position = match.end()
+
+
+def _search(pattern: Pattern, text: str, position: int):
+    """Return the first non-empty match of pattern at or after position, or None."""
+    while position <= len(text):
+        match = pattern.search(text, position)
+        if match is None or match.end() > match.start():
+            return match
+        position = match.start() + 1
+    return None
+
+
+def replace_in_paragraph(p, replacer: Replacer, counts: List[int]) -> bool:
+    """Apply replacer to one <w:p> element; return True if it changed."""
+    segments, text = _text_segments(p)
+    if not segments:
+        return False
+    changed = False
+    # Right to left, so offsets of earlier matches stay valid
+    for start, end, i, replacement in reversed(replacer.matches(text)):
+        spans = [seg for seg in segments if seg[1] < end and seg[2] > start]
+        if any(seg[0] is None for seg in spans):
+            # The match crosses a tab or line break
+            continue
+        first = spans[0]
+        for t, seg_start, seg_end in spans:
+            old = t.text or ""
+            head = old[:max(start - seg_start, 0)]
+            tail = old[min(end, seg_end) - seg_start:]
+            _set_text(t, head + replacement + tail if t is first[0] else head + tail)
+        counts[i] += 1
+        changed = True
+    return changed
+
+
+def replace_text_many(doc, replacements: Mapping[str, str], regex: bool = False) -> Dict[str, int]:
+    """
+    Replace many patterns throughout the document body in one pass.
+
+    Paragraphs in tables (including nested tables) are covered; paragraphs
+    with a TOC style are skipped, since Word regenerates them.
+
+    Args:
+        doc: Document object
+        replacements: Mapping of pattern to replacement text
+        regex: Treat patterns as regular expressions
+
+    Returns:
+        Number of replacements made per pattern
+    """
+    replacer = Replacer(replacements, regex)
+    toc_styles = {style.style_id for style in doc.styles
+                  if style.type == WD_STYLE_TYPE.PARAGRAPH and (style.name or "").lower().startswith("toc")}
+    counts = [0] * len(replacer.patterns)
+    changed = False
+    for p in doc.element.body.iter(_W_P):
+        if toc_styles and p.style in toc_styles:
+            continue
+        changed = replace_in_paragraph(p, replacer, counts) or changed
+    if changed:
+        invalidate_paragraph_index(doc)
+    return dict(zip(replacer.patterns, counts))
+
+
+def _text_segments(p) -> Tuple[List[Tuple[Optional[object], int, int]], str]:
+    """
+    Return the paragraph's text and (t element, start, end) segments covering it.
+
+    Breaks and tabs get a segment with element None. Only runs directly in the
+    paragraph or in hyperlinks count, matching Paragraph.text.
+    """
+    segments = []
+    parts = []
+    offset = 0
+    for child in p:
+        if child.tag == _W_R:
+            runs = (child,)
+        elif child.tag == _W_HYPERLINK:
+            runs = child.iterchildren(_W_R)
+        else:
+            continue
+        for run in runs:
+            for item in run:
+                if item.tag == _W_T:
+                    value = item.text or ""
+                    element = item
+                elif item.tag in _BREAKS:
+                    value = _BREAKS[item.tag]
+                    element = None
+                else:
+                    continue
+                if value:
+                    segments.append((element, offset, offset + len(value)))
+                    parts.append(value)
+                    offset += len(value)
+    return segments, "".join(parts)
+
+
+def _set_text(t, value: str) -> None:
+    t.text = value
+    if value != value.strip():
+        t.set(_XML_SPACE, 'preserve')